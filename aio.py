@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import time
+from http import HTTPStatus
+
+import aiohttp
+from telegram.error import RetryAfter
+
+from checkpoints import CheckpointStore
+from dedup import Deduplicator
+from engine import (CYCLE_SUMMARY, ERROR_NOT_SENT, advance, error_retry_at,
+                    render_answer, report_error, share_news, sleep_time)
+from exceptions import CircuitOpen, ErrorInResponse, SendMessageError
+from homework import (MAX_IN_FLIGHT, RESPONSE_ERROR, SEND_ATTEMPTS,
+                      SEND_MESSAGE_ERROR, SEND_MESSAGE_SUCCESSFUL,
+                      api_endpoint, check_status_code)
+from http_pool import (CONNECT_TIMEOUT, KEEPALIVE_TIMEOUT, POOL_MAXSIZE,
+                       READ_TIMEOUT)
+from lifecycle import Lifecycle
+from logs import lazy
+from metrics import (API_RESPONSES, MESSAGES_SENT, OUTBOX_DEPTH,
+                     TELEGRAM_RETRY_AFTER, timed)
+from outbox import AsyncOutbox
+from ratelimit import PRACTICUM_LIMITER, TELEGRAM_LIMITER, parse_retry_after
+from records import decode_answer
+from resilience import RetryPolicy
+from startup import report_startup
+from templates import parse_mode
+
+TELEGRAM_API = 'https://api.telegram.org/bot{token}/{method}'
+
+
+class AsyncTelegramBot:
+    """Асинхронный аналог telegram.Bot: умеет только send_message."""
+
+    def __init__(self, session, token):
+        self.session = session
+        self.url = TELEGRAM_API.format(token=token, method='sendMessage')
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        """Отправляет сообщение через Bot API."""
+        payload = {'chat_id': chat_id, 'text': text}
+        if parse_mode:
+            payload['parse_mode'] = parse_mode
+        async with self.session.post(self.url, json=payload) as answer:
+            result = await answer.json(content_type=None)
+        if answer.status == HTTPStatus.TOO_MANY_REQUESTS:
+            raise RetryAfter(parse_retry_after(
+                result.get('parameters', {}).get('retry_after')))
+        if not result.get('ok'):
+            raise ErrorInResponse(result.get('description'))
+        return result['result']
+
+
+@timed('send_to_chat')
+async def send_to_chat_async(bot, chat_id, message, parse_mode=None):
+    """Асинхронная отправка сообщения в конкретный чат телеграма."""
+    error = None
+    options = {'parse_mode': parse_mode} if parse_mode else {}
+    for _ in range(SEND_ATTEMPTS):
+        await TELEGRAM_LIMITER.wait_async(chat_id)
+        try:
+            await bot.send_message(chat_id, message, **options)
+        except RetryAfter as retry:
+            TELEGRAM_RETRY_AFTER.inc()
+            TELEGRAM_LIMITER.defer(retry.retry_after, chat_id)
+            error = retry
+            continue
+        except Exception as failure:
+            error = failure
+            break
+        MESSAGES_SENT.inc()
+        logging.info(lazy(SEND_MESSAGE_SUCCESSFUL, message=message))
+        return
+    raise SendMessageError(
+        SEND_MESSAGE_ERROR.format(error=error, message=message))
+
+
+class AsyncDirectDelivery:
+    """Отправка прямо из корутины опроса, без очереди."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def send(self, chat_id, message, parse_mode=None):
+        """Отправляет сообщение сразу."""
+        await send_to_chat_async(self.bot, chat_id, message, parse_mode)
+
+
+@timed('fetch_api_answer')
+async def fetch_api_answer_async(session, timestamp, headers):
+    """Асинхронный запрос к сайту от имени владельца заголовков headers."""
+    _, _, body, request_params = await request_api_async(session, timestamp,
+                                                         headers)
+    return decode_answer(body, request_params)
+
+
+async def request_api_async(session, timestamp, headers):
+    """Асинхронный запрос к сайту с проверкой кода ответа.
+
+    Возвращает код, заголовки и тело ответа вместе с параметрами запроса.
+    """
+    request_params = dict(url=api_endpoint(),
+                          headers=headers,
+                          params={'from_date': timestamp})
+    await PRACTICUM_LIMITER.wait_async()
+    try:
+        async with session.get(**request_params) as response:
+            API_RESPONSES.inc(str(response.status))
+            if response.status == HTTPStatus.TOO_MANY_REQUESTS:
+                PRACTICUM_LIMITER.defer(
+                    parse_retry_after(response.headers.get('Retry-After')))
+            if response.status != HTTPStatus.NOT_MODIFIED:
+                check_status_code(response.status, request_params)
+            body = await response.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        raise ConnectionError(
+            RESPONSE_ERROR.format(error=error, **request_params))
+    return response.status, response.headers, body, request_params
+
+
+class AsyncPollingEngine:
+    """Опрашивает студентов реестра в одном цикле событий asyncio.
+
+    Запросы к API и отправка сообщений перекрываются во времени,
+    число одновременных запросов ограничено семафором.
+    """
+
+    def __init__(self, bot, registry, session, checkpoints=None,
+                 dedup=None, retry=None, outbox=None, responses=None,
+                 shard=None, history=None, lifecycle=None,
+                 max_in_flight=MAX_IN_FLIGHT):
+        self.bot = bot
+        self.outbox = outbox or AsyncDirectDelivery(bot)
+        self.registry = registry
+        self.session = session
+        self.checkpoints = checkpoints or CheckpointStore()
+        self.dedup = dedup or Deduplicator()
+        self.responses = responses
+        self.shard = shard
+        self.history = history
+        self.lifecycle = lifecycle or Lifecycle()
+        self.retry = retry or RetryPolicy(lifecycle=self.lifecycle)
+        self.in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def fetch(self, tenant):
+        """Ответ API для студента или None, если он не изменился."""
+        if self.responses is None:
+            return await fetch_api_answer_async(
+                self.session, tenant.timestamp, tenant.headers)
+        return await self.responses.fetch_async(
+            self.session, tenant.key, tenant.timestamp, tenant.headers)
+
+    async def poll_tenant(self, tenant):
+        """Один цикл get_api_answer -> check_response -> parse_status."""
+        async with self.in_flight:
+            if self.lifecycle.stopping.is_set():
+                return
+            try:
+                response = await self.retry.call_async(self.fetch, tenant)
+                messages, news, errors = render_answer(tenant, response,
+                                                       self.dedup)
+                for message in messages:
+                    await self.outbox.send(tenant.chat_id, message,
+                                           parse_mode(tenant.markup))
+                self.dedup.remember(tenant, news)
+                if self.history is not None:
+                    self.history.record_news(tenant, news)
+                self.registry.reschedule(tenant,
+                                         advance(tenant, response, news))
+                share_news(self.shard, tenant, news)
+                self.checkpoints.set(tenant.key, tenant.timestamp)
+                for error in errors:
+                    await self.notify_error(tenant, error)
+            except CircuitOpen as error:
+                logging.debug(error)
+                self.registry.reschedule(
+                    tenant, time.time() + self.retry.breaker.probe_delay())
+            except Exception as error:
+                if self.responses is not None:
+                    self.responses.forget(tenant.key, tenant.timestamp)
+                self.registry.reschedule(tenant, error_retry_at())
+                await self.notify_error(tenant, error)
+
+    async def notify_error(self, tenant, error):
+        """Сообщает студенту о сбое, если не сообщали о таком недавно."""
+        message = report_error(tenant, error)
+        if not self.dedup.error_is_new(tenant, error):
+            return
+        try:
+            await self.outbox.send(tenant.chat_id, message,
+                                   parse_mode(tenant.markup))
+        except Exception as send_error:
+            logging.error(ERROR_NOT_SENT.format(tenant=tenant,
+                                                error=send_error))
+
+    async def run_cycle(self):
+        """Опрашивает всех студентов, которым подошёл срок."""
+        started = time.time()
+        due = self.registry.due(started)
+        if self.shard is not None:
+            due = self.shard.claim(self.registry, due, started)
+        await asyncio.gather(*(self.poll_tenant(tenant) for tenant in due))
+        self.checkpoints.flush()
+        if self.history is not None:
+            self.history.flush()
+        if due:
+            logging.debug(lazy(CYCLE_SUMMARY, count=len(due),
+                               elapsed=time.time() - started))
+        return len(due)
+
+    async def run(self):
+        """Цикл опроса до остановки.
+
+        Пауза прерывается сигналом и новым опросом раньше срока.
+        """
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+
+        def wakeup():
+            loop.call_soon_threadsafe(woken.set)
+
+        wakeups = self.registry.scheduler.wakeups
+        wakeups.add(wakeup)
+        try:
+            while not self.lifecycle.stopping.is_set():
+                woken.clear()
+                await self.run_cycle()
+                await self.lifecycle.wait_async(
+                    sleep_time(self.registry, self.shard), woken)
+        finally:
+            wakeups.discard(wakeup)
+
+
+async def run_async(registry, telegram_token, checkpoints=None,
+                    responses=None, shard=None, history=None,
+                    lifecycle=None, max_in_flight=MAX_IN_FLIGHT):
+    """Запускает асинхронный режим опроса с общим пулом соединений.
+
+    После остановки досылает очередь сообщений, пока не выйдет срок.
+    """
+    lifecycle = lifecycle or Lifecycle()
+    connector = aiohttp.TCPConnector(limit=max_in_flight,
+                                     limit_per_host=POOL_MAXSIZE,
+                                     keepalive_timeout=KEEPALIVE_TIMEOUT)
+    timeout = aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT,
+                                    sock_read=READ_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector,
+                                     timeout=timeout) as session:
+        bot = AsyncTelegramBot(session, telegram_token)
+        outbox = AsyncOutbox(bot, send_to_chat_async).start()
+        OUTBOX_DEPTH.set_function(outbox.__len__)
+        report_startup()
+        try:
+            await AsyncPollingEngine(bot, registry, session, checkpoints,
+                                     outbox=outbox, responses=responses,
+                                     shard=shard, history=history,
+                                     lifecycle=lifecycle,
+                                     max_in_flight=max_in_flight).run()
+        finally:
+            await outbox.close(lifecycle.remaining())
@@ -0,0 +1,57 @@
+"""Память на одного студента в реестре.
+
+Запуск: python benchmarks/bench_memory.py
+"""
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import advance  # noqa: E402
+from records import decode_answer  # noqa: E402
+from tenants import TenantRegistry  # noqa: E402
+
+SIZES = (10000, 100000)
+STATUSES = ('reviewing', 'approved', 'rejected')
+REPORT = ('{count:>7} студентов: {total:>8.1f} МБ, '
+          '{per_tenant:>5.0f} байт на студента')
+
+
+def fill(registry, count):
+    """Реестр как после первого опроса: у каждого по одной работе."""
+    now = time.time()
+    for number in range(count):
+        registry.add(f'y0_token_{number:032d}', 100000 + number,
+                     timestamp=int(now))
+    for number, tenant in enumerate(registry.due(now)):
+        body = json.dumps({
+            'homeworks': [{'id': number,
+                           'homework_name': f'student{number}__hw05_final',
+                           'status': STATUSES[number % 3]}],
+            'current_date': int(now)}).encode()
+        response = decode_answer(body, {})
+        news = response['homeworks']
+        registry.reschedule(tenant, advance(tenant, response, news))
+
+
+def measure(count):
+    """Байты, которые занимает реестр на count студентов."""
+    gc.collect()
+    tracemalloc.start()
+    registry = TenantRegistry()
+    fill(registry, count)
+    gc.collect()
+    total, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return total
+
+
+if __name__ == '__main__':
+    for count in SIZES:
+        total = measure(count)
+        print(REPORT.format(count=count, total=total / 2 ** 20,
+                            per_tenant=total / count))
@@ -0,0 +1,126 @@
+"""Пропускная способность цепочки опрос -> разбор -> отправка.
+
+Запуск: python benchmarks/bench_pipeline.py --polls 2000 --workers 32
+
+get_api_answer, check_response, parse_status и send_message работают как
+в боте, но ходят в локальные заменители API из stand_ins.py. Лимиты
+запросов бота отключаются: измеряется сам конвейер, а не лимиты.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import telegram  # noqa: E402
+from telegram.utils.request import Request  # noqa: E402
+
+import homework  # noqa: E402
+from ratelimit import RateLimiter  # noqa: E402
+from stand_ins import Behaviour, StandInServer  # noqa: E402
+
+BENCH_TOKEN = '123456:benchmark'
+REPORT = """\
+Опросов: {polls} за {elapsed:.2f} с, ошибок: {errors}
+Опросов в секунду: {polls_per_second:.1f}
+Сообщений в секунду: {messages_per_second:.1f}
+Опрос, мс: p50 {poll_p50:.1f}, p99 {poll_p99:.1f}
+Отправка, мс: p50 {send_p50:.1f}, p99 {send_p99:.1f}
+Пиковый RSS: {rss_mb:.1f} МБ"""
+
+
+def parse_args(argv=None):
+    """Параметры нагрузки и поведения заменителей."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--polls', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--api-latency', type=float, default=0.02)
+    parser.add_argument('--telegram-latency', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--throttle-rate', type=float, default=0.005)
+    parser.add_argument('--retry-after', type=float, default=0.1)
+    parser.add_argument('--json', action='store_true',
+                        help='вывести результат одной строкой JSON')
+    return parser.parse_args(argv)
+
+
+def percentile(samples, share):
+    """Перцентиль в миллисекундах; 0, если замеров нет."""
+    if not samples:
+        return 0.0
+    if len(samples) == 1:
+        return samples[0] * 1000
+    return statistics.quantiles(samples, n=100)[int(share) - 1] * 1000
+
+
+class Pipeline:
+    """Один опрос за другим, как их делал бы бот, с замером времени."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.poll_times = []
+        self.send_times = []
+        self.errors = Counter()
+        self.messages = 0
+
+    def poll(self, timestamp):
+        """get_api_answer -> check_response -> parse_status -> send_message."""
+        started = time.perf_counter()
+        try:
+            response = homework.get_api_answer(timestamp)
+            for work in homework.check_response(response):
+                message = homework.parse_status(work)
+                sent = time.perf_counter()
+                homework.send_message(self.bot, message)
+                self.send_times.append(time.perf_counter() - sent)
+                self.messages += 1
+        except Exception as error:
+            self.errors[type(error).__name__] += 1
+        self.poll_times.append(time.perf_counter() - started)
+
+
+def run(args):
+    """Гоняет конвейер против заменителей и возвращает сводку замеров."""
+    practicum = Behaviour(args.api_latency, args.error_rate,
+                          args.throttle_rate, args.retry_after)
+    telegram_api = Behaviour(args.telegram_latency, args.error_rate,
+                             args.throttle_rate, args.retry_after)
+    homework.PRACTICUM_LIMITER = RateLimiter()
+    homework.TELEGRAM_LIMITER = RateLimiter()
+    with StandInServer(practicum, telegram_api) as server:
+        homework.ENDPOINT = server.endpoint
+        homework.TELEGRAM_CHAT_ID = 1
+        bot = telegram.Bot(BENCH_TOKEN, base_url=server.bot_url,
+                           request=Request(con_pool_size=args.workers))
+        pipeline = Pipeline(bot)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.workers) as executor:
+            list(executor.map(pipeline.poll, range(args.polls)))
+        elapsed = time.perf_counter() - started
+    return {
+        'polls': args.polls,
+        'elapsed': elapsed,
+        'errors': dict(pipeline.errors),
+        'polls_per_second': args.polls / elapsed,
+        'messages_per_second': pipeline.messages / elapsed,
+        'poll_p50': percentile(pipeline.poll_times, 50),
+        'poll_p99': percentile(pipeline.poll_times, 99),
+        'send_p50': percentile(pipeline.send_times, 50),
+        'send_p99': percentile(pipeline.send_times, 99),
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    result = run(args)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        print(REPORT.format(**result))
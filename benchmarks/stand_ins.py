@@ -0,0 +1,147 @@
+"""Локальные заменители API Практикума и Bot API телеграма для бенчмарков."""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PRACTICUM_PATH = '/api/user_api/homework_statuses/'
+STATUSES = ('reviewing', 'approved', 'rejected')
+
+
+class Behaviour:
+    """Как ведёт себя заменитель: задержка, доля ошибок и доля 429."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+
+    def outcome(self):
+        """Ждёт задержку и выбирает исход запроса: ok, error или 429."""
+        if self.latency:
+            time.sleep(self.latency)
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return 'throttle'
+        if roll < self.throttle_rate + self.error_rate:
+            return 'error'
+        return 'ok'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Отвечает за Практикум на GET и за телеграм на POST sendMessage."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        """Не засоряет вывод бенчмарка строками журнала сервера."""
+
+    def _reply(self, status, payload, headers=()):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """Ответ API Практикума со случайным статусом одной работы."""
+        url = urlsplit(self.path)
+        if url.path != PRACTICUM_PATH:
+            return self._reply(404, {'code': 'not_found'})
+        behaviour = self.server.practicum
+        outcome = behaviour.outcome()
+        if outcome == 'throttle':
+            return self._reply(429, {'code': 'throttled'},
+                               [('Retry-After', str(behaviour.retry_after))])
+        if outcome == 'error':
+            return self._reply(500, {'code': 'server_error'})
+        from_date = int(parse_qs(url.query).get('from_date', ['0'])[0])
+        number = self.server.counter()
+        self._reply(200, {
+            'homeworks': [{
+                'id': number,
+                'homework_name': f'student__hw{number % 20:02d}_final',
+                'status': random.choice(STATUSES),
+                'reviewer_comment': 'Бенчмарк',
+                'date_updated': '2022-01-01T00:00:00Z',
+                'lesson_name': 'Бенчмарк',
+            }],
+            'current_date': max(from_date, int(time.time())),
+        })
+
+    def do_POST(self):
+        """Ответ Bot API на sendMessage."""
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        if not self.path.endswith('/sendMessage'):
+            return self._reply(404, {'ok': False, 'error_code': 404,
+                                     'description': 'Not Found'})
+        behaviour = self.server.telegram
+        outcome = behaviour.outcome()
+        if outcome == 'throttle':
+            return self._reply(429, {
+                'ok': False, 'error_code': 429,
+                'description': 'Too Many Requests',
+                'parameters': {'retry_after': behaviour.retry_after}})
+        if outcome == 'error':
+            return self._reply(500, {'ok': False, 'error_code': 500,
+                                     'description': 'Internal Server Error'})
+        self._reply(200, {'ok': True, 'result': {
+            'message_id': self.server.counter(),
+            'date': int(time.time()),
+            'chat': {'id': 1, 'type': 'private'},
+            'text': 'ok',
+        }})
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Сервер-заменитель обоих API в фоновом потоке."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, practicum=None, telegram=None, port=0):
+        super().__init__(('127.0.0.1', port), StandInHandler)
+        self.practicum = practicum or Behaviour()
+        self.telegram = telegram or Behaviour()
+        self.lock = threading.Lock()
+        self.served = 0
+        self.thread = threading.Thread(target=self.serve_forever,
+                                       daemon=True)
+
+    @property
+    def url(self):
+        """Адрес сервера вида http://127.0.0.1:port."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def endpoint(self):
+        """Адрес, которым подменяется homework.ENDPOINT."""
+        return self.url + PRACTICUM_PATH
+
+    @property
+    def bot_url(self):
+        """base_url для telegram.Bot."""
+        return self.url + '/bot'
+
+    def counter(self):
+        """Порядковый номер обслуженного запроса."""
+        with self.lock:
+            self.served += 1
+            return self.served
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,187 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from logs import lazy
+
+FLUSH_INTERVAL = float(os.getenv('CHECKPOINT_FLUSH_INTERVAL', 5))
+CHECKPOINTS_LOADED = 'Загружено контрольных точек из {path}: {count}'
+CHECKPOINTS_FLUSHED = 'Записано контрольных точек в {path}: {count}'
+CHECKPOINTS_NOT_SHARED = ('С SHARD_STORE контрольные точки должны лежать '
+                          'в общей базе SQLite (*.db), а не в {path}')
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+class CheckpointStore:
+    """Хранит current_date каждого студента между перезапусками.
+
+    Базовый класс держит значения только в памяти. Наследники реализуют
+    _load и _write_batch: изменения копятся в pending и сбрасываются
+    на диск одной пачкой не чаще раза в flush_interval секунд.
+    """
+
+    path = None
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self.values = None
+        self.pending = {}
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _load(self):
+        return {}
+
+    def _write_batch(self, batch):
+        pass
+
+    def _ensure_loaded(self):
+        if self.values is None:
+            self.values = self._load()
+            logging.info(CHECKPOINTS_LOADED.format(path=self.path,
+                                                   count=len(self.values)))
+
+    def get(self, key, default=None):
+        """Последний сохранённый timestamp студента."""
+        with self.lock:
+            self._ensure_loaded()
+            return self.values.get(key, default)
+
+    def set(self, key, timestamp):
+        """Запоминает timestamp; на диск он попадёт со следующей пачкой."""
+        with self.lock:
+            self._ensure_loaded()
+            if self.values.get(key) == timestamp:
+                return
+            self.values[key] = timestamp
+            self.pending[key] = timestamp
+        if time.monotonic() - self.flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Сбрасывает накопленные изменения одной записью."""
+        with self.lock:
+            batch, self.pending = self.pending, {}
+            self.flushed_at = time.monotonic()
+            if not batch:
+                return 0
+            try:
+                self._write_batch(batch)
+            except Exception:
+                batch.update(self.pending)
+                self.pending = batch
+                raise
+        logging.debug(lazy(CHECKPOINTS_FLUSHED, path=self.path,
+                           count=len(batch)))
+        return len(batch)
+
+    def reload(self):
+        """Сбрасывает свои изменения и перечитает чужие при следующем get."""
+        self.flush()
+        with self.lock:
+            self.values = None
+
+    def close(self):
+        """Сбрасывает изменения и освобождает ресурсы."""
+        self.flush()
+
+
+class SqliteCheckpointStore(CheckpointStore):
+    """Контрольные точки в таблице SQLite, пачка - одна транзакция."""
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        super().__init__(flush_interval)
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS checkpoints '
+            '(key TEXT PRIMARY KEY, timestamp INTEGER NOT NULL)')
+        self.connection.commit()
+
+    def _load(self):
+        return dict(self.connection.execute(
+            'SELECT key, timestamp FROM checkpoints'))
+
+    def _write_batch(self, batch):
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO checkpoints VALUES (?, ?)',
+                batch.items())
+
+    def close(self):
+        """Сбрасывает изменения и закрывает базу."""
+        super().close()
+        self.connection.close()
+
+
+class FileCheckpointStore(CheckpointStore):
+    """Контрольные точки в журнале строк "key timestamp" с одним fsync.
+
+    Журнал только дописывается; при загрузке побеждает последняя
+    запись ключа, а сам файл переписывается без устаревших строк.
+    """
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        super().__init__(flush_interval)
+        self.path = path
+        self.file = None
+
+    def _load(self):
+        values = {}
+        lines = 0
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as file:
+                for lines, line in enumerate(file, 1):
+                    key, _, timestamp = line.partition(' ')
+                    try:
+                        values[key] = int(timestamp)
+                    except ValueError:
+                        continue
+        if lines > len(values):
+            self._compact(values)
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.path, 'a', encoding='utf-8')
+        return values
+
+    def _compact(self, values):
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.writelines(f'{key} {timestamp}\n'
+                            for key, timestamp in values.items())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+    def _write_batch(self, batch):
+        self.file.writelines(f'{key} {timestamp}\n'
+                             for key, timestamp in batch.items())
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        """Сбрасывает изменения и закрывает журнал."""
+        super().close()
+        if self.file is not None:
+            self.file.close()
+
+
+def open_checkpoints(path=None, flush_interval=FLUSH_INTERVAL,
+                     shared=False):
+    """Открывает хранилище по пути: *.db/*.sqlite - SQLite, иначе журнал.
+
+    shared=True - хранилище общее для нескольких исполнителей. Тогда
+    годится только SQLite: журнал при загрузке переписывается заново,
+    и записи других исполнителей уходят в удалённый файл.
+    """
+    sqlite = bool(path) and path.endswith(SQLITE_SUFFIXES)
+    if shared and not sqlite:
+        raise ValueError(CHECKPOINTS_NOT_SHARED.format(path=path))
+    if not path:
+        return CheckpointStore(flush_interval)
+    if sqlite:
+        return SqliteCheckpointStore(path, flush_interval)
+    return FileCheckpointStore(path, flush_interval)
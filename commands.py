@@ -0,0 +1,176 @@
+import logging
+import time
+
+from telegram.ext import CommandHandler, Updater
+
+from homework import VERDICTS
+from templates import LOCALES, MARKUPS
+
+COMMAND_WORKERS = 4
+STATUS_LINE = 'Работа "{name}": {verdict}'
+STATUS_EMPTY = 'Пока нет данных о работах - новые статусы придут сюда.'
+STATUS_PAUSED = 'Опрос приостановлен, пришлите /resume, чтобы продолжить.'
+NOT_SUBSCRIBED = ('Этот чат ни на кого не подписан. '
+                  'Пришлите /subscribe <токен>.')
+SUBSCRIBE_USAGE = 'Пришлите токен Практикума: /subscribe <токен>'
+SUBSCRIBED = 'Подписка оформлена, первые статусы придут в ближайшее время.'
+PAUSED = 'Опрос приостановлен.'
+RESUMED = 'Опрос возобновлён.'
+LANGUAGE_USAGE = 'Выберите язык: /language <{choices}>'
+LANGUAGE_SET = 'Язык сообщений: {choice}.'
+FORMAT_USAGE = 'Выберите разметку: /format <{choices}>'
+FORMAT_SET = 'Разметка сообщений: {choice}.'
+COMMAND_RECEIVED = 'Команда {command} из чата {chat_id}'
+TOKEN_NOT_DELETED = 'Не удалось удалить сообщение с токеном: {error}'
+
+
+def render_status(registry, chat_id):
+    """Ответ на /status по последним известным статусам работ."""
+    tenants = registry.by_chat(chat_id)
+    if not tenants:
+        return NOT_SUBSCRIBED
+    lines = []
+    for tenant in tenants:
+        if tenant.paused:
+            lines.append(STATUS_PAUSED)
+        for name, status in tenant.known_homeworks():
+            lines.append(STATUS_LINE.format(
+                name=name, verdict=VERDICTS.get(status, status)))
+    return '\n'.join(lines) or STATUS_EMPTY
+
+
+def save_subscriptions(subscriptions, tenants):
+    """Сохраняет подписки студентов, чтобы пережить перезапуск."""
+    if subscriptions is None:
+        return
+    for tenant in tenants:
+        subscriptions.save(tenant)
+
+
+def subscribe_chat(registry, chat_id, args, checkpoints=None,
+                   subscriptions=None):
+    """Ответ на /subscribe: ставит токен на опрос немедленно."""
+    if len(args) != 1:
+        return SUBSCRIBE_USAGE
+    tenant = registry.add(args[0], chat_id, int(time.time()))
+    if checkpoints is not None:
+        tenant.timestamp = checkpoints.get(tenant.key, tenant.timestamp)
+    registry.resume(tenant)
+    save_subscriptions(subscriptions, [tenant])
+    return SUBSCRIBED
+
+
+def pause_chat(registry, chat_id, subscriptions=None):
+    """Ответ на /pause."""
+    tenants = registry.by_chat(chat_id)
+    for tenant in tenants:
+        registry.pause(tenant)
+    save_subscriptions(subscriptions, tenants)
+    return PAUSED if tenants else NOT_SUBSCRIBED
+
+
+def resume_chat(registry, chat_id, subscriptions=None):
+    """Ответ на /resume."""
+    tenants = registry.by_chat(chat_id)
+    for tenant in tenants:
+        registry.resume(tenant)
+    save_subscriptions(subscriptions, tenants)
+    return RESUMED if tenants else NOT_SUBSCRIBED
+
+
+def choose_option(registry, chat_id, args, field, choices, usage, done,
+                  subscriptions=None):
+    """Выставляет студентам чата значение field из choices."""
+    if len(args) != 1 or args[0].lower() not in choices:
+        return usage.format(choices='|'.join(choices))
+    tenants = registry.by_chat(chat_id)
+    for tenant in tenants:
+        setattr(tenant, field, args[0].lower())
+    save_subscriptions(subscriptions, tenants)
+    return done.format(choice=args[0].lower()) if tenants else NOT_SUBSCRIBED
+
+
+def language_chat(registry, chat_id, args, subscriptions=None):
+    """Ответ на /language."""
+    return choose_option(registry, chat_id, args, 'locale', tuple(LOCALES),
+                         LANGUAGE_USAGE, LANGUAGE_SET, subscriptions)
+
+
+def format_chat(registry, chat_id, args, subscriptions=None):
+    """Ответ на /format."""
+    return choose_option(registry, chat_id, args, 'markup', MARKUPS,
+                         FORMAT_USAGE, FORMAT_SET, subscriptions)
+
+
+class CommandInterface:
+    """Принимает команды студентов, не мешая опросу API.
+
+    Обновления телеграма читаются длинным опросом в собственных потоках
+    Updater; ответы строятся из реестра в памяти, без запросов к API.
+    """
+
+    def __init__(self, token, registry, checkpoints=None,
+                 subscriptions=None):
+        self.registry = registry
+        self.checkpoints = checkpoints
+        self.subscriptions = subscriptions
+        self.updater = Updater(token=token, workers=COMMAND_WORKERS)
+        for command in ('status', 'subscribe', 'pause', 'resume',
+                        'language', 'format'):
+            self.updater.dispatcher.add_handler(
+                CommandHandler(command, getattr(self, command)))
+
+    def start(self):
+        """Начинает принимать команды в фоновых потоках."""
+        self.updater.start_polling(drop_pending_updates=True)
+        return self
+
+    def stop(self):
+        """Прекращает приём команд."""
+        self.updater.stop()
+
+    def _reply(self, update, text):
+        logging.info(COMMAND_RECEIVED.format(
+            command=update.message.text.split()[0],
+            chat_id=update.effective_chat.id))
+        update.message.reply_text(text)
+
+    def status(self, update, context):
+        """Команда /status."""
+        self._reply(update, render_status(self.registry,
+                                          update.effective_chat.id))
+
+    def subscribe(self, update, context):
+        """Команда /subscribe <токен>; сообщение с токеном удаляется."""
+        text = subscribe_chat(self.registry, update.effective_chat.id,
+                              context.args, self.checkpoints,
+                              self.subscriptions)
+        try:
+            update.message.delete()
+        except Exception as error:
+            logging.warning(TOKEN_NOT_DELETED.format(error=error))
+        update.effective_chat.send_message(text)
+
+    def pause(self, update, context):
+        """Команда /pause."""
+        self._reply(update, pause_chat(self.registry,
+                                       update.effective_chat.id,
+                                       self.subscriptions))
+
+    def resume(self, update, context):
+        """Команда /resume."""
+        self._reply(update, resume_chat(self.registry,
+                                        update.effective_chat.id,
+                                        self.subscriptions))
+
+    def language(self, update, context):
+        """Команда /language <ru|en>."""
+        self._reply(update, language_chat(self.registry,
+                                          update.effective_chat.id,
+                                          context.args, self.subscriptions))
+
+    def format(self, update, context):
+        """Команда /format <plain|markdown|html>."""
+        self._reply(update, format_chat(self.registry,
+                                        update.effective_chat.id,
+                                        context.args, self.subscriptions))
@@ -0,0 +1,179 @@
+import json
+import logging
+import os
+import signal
+import threading
+from collections import namedtuple
+
+from homework import ERROR_RETRY_TIME, RETRY_TIME
+from startup import ENV_FILE, ENV_FILE_KEYS, read_env
+
+CONFIG_FILE = os.getenv('CONFIG_FILE')
+CONFIG_WATCH_INTERVAL = float(os.getenv('CONFIG_WATCH_INTERVAL', 30))
+
+CONFIG_RELOADED = 'Настройки перечитаны, изменились: {changed}'
+CONFIG_INVALID = 'Настройки из {path} не применены: {error}'
+CONFIG_NOT_DICT = 'В файле настроек {path} ожидается объект JSON'
+LISTENER_FAILED = 'Не удалось применить новые настройки: {error}'
+
+
+def optional(value):
+    """Строка настройки или None для пустого значения."""
+    return str(value) if value not in (None, '') else None
+
+
+FIELDS = (
+    ('practicum_token', 'PRACTICUM_TOKEN', optional, None),
+    ('endpoint', 'ENDPOINT', optional, None),
+    ('chat_id', 'TELEGRAM_CHAT_ID', optional, None),
+    ('tenants_file', 'TENANTS_FILE', optional, None),
+    ('retry_time', 'RETRY_TIME', float, RETRY_TIME),
+    ('error_retry_time', 'ERROR_RETRY_TIME', float, ERROR_RETRY_TIME),
+    ('reviewing_interval', 'REVIEWING_INTERVAL', float, 300),
+    ('rejected_interval', 'REJECTED_INTERVAL', float, 900),
+    ('approved_interval', 'APPROVED_INTERVAL', float, 3600),
+    ('default_interval', 'DEFAULT_INTERVAL', float, RETRY_TIME),
+    ('min_interval', 'MIN_INTERVAL', float, 120),
+    ('max_interval', 'MAX_INTERVAL', float, 3 * 3600),
+)
+
+
+class Settings(namedtuple('Settings', [field for field, *_ in FIELDS])):
+    """Снимок настроек; новые настройки - новый снимок, а не правка старого."""
+
+    __slots__ = ()
+
+    def interval(self, status):
+        """Базовый интервал опроса студента со статусом status."""
+        return {
+            'reviewing': self.reviewing_interval,
+            'rejected': self.rejected_interval,
+            'approved': self.approved_interval,
+        }.get(status, self.default_interval)
+
+
+def read_config_file(path):
+    """Настройки из JSON-файла вида {"RETRY_TIME": 600}."""
+    if not path:
+        return {}
+    with open(path, encoding='utf-8') as file:
+        values = json.load(file)
+    if not isinstance(values, dict):
+        raise ValueError(CONFIG_NOT_DICT.format(path=path))
+    return values
+
+
+def environment():
+    """Переменные окружения без подставленных из .env при запуске."""
+    return {name: value for name, value in os.environ.items()
+            if name not in ENV_FILE_KEYS}
+
+
+def load_settings(path=CONFIG_FILE, environ=None, env_file=ENV_FILE):
+    """Собирает настройки: умолчания, .env, окружение, затем файл path.
+
+    Окружение главнее .env и при запуске, и после перечитывания.
+    """
+    if environ is None:
+        environ = environment()
+    values = {**read_env(env_file), **environ, **read_config_file(path)}
+    return Settings(*(
+        default if values.get(name) in (None, '') else cast(values[name])
+        for _, name, cast, default in FIELDS))
+
+
+def modified(path):
+    """Время изменения файла или None, если файла нет."""
+    try:
+        return os.stat(path).st_mtime_ns if path else None
+    except OSError:
+        return None
+
+
+class ConfigStore:
+    """Текущие настройки с перечитыванием на ходу.
+
+    Настройки перечитываются по SIGHUP или когда меняется файл настроек,
+    .env или файл студентов. Новый снимок подменяет старый одним
+    присваиванием, поэтому опрос не останавливается: текущий цикл
+    дорабатывает со старыми настройками, следующий берёт новые.
+    """
+
+    def __init__(self, path=CONFIG_FILE, env_file=ENV_FILE,
+                 interval=CONFIG_WATCH_INTERVAL):
+        self.path = path
+        self.env_file = env_file
+        self.interval = interval
+        self.settings = load_settings(path, env_file=env_file)
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.requested = threading.Event()
+        self.stopped = threading.Event()
+        self.stamps = self._stamps()
+        self.thread = threading.Thread(target=self._watch, daemon=True)
+
+    def current(self):
+        """Действующий снимок настроек."""
+        return self.settings
+
+    def subscribe(self, listener):
+        """listener(old, new) вызывается после каждого перечитывания."""
+        self.listeners.append(listener)
+        return listener
+
+    def _stamps(self):
+        return tuple(map(modified, (self.path, self.env_file,
+                                    self.settings.tenants_file)))
+
+    def reload(self):
+        """Перечитывает настройки; с ошибкой в файле оставляет старые."""
+        with self.lock:
+            try:
+                settings = load_settings(self.path, env_file=self.env_file)
+            except (OSError, ValueError, TypeError) as error:
+                logging.error(CONFIG_INVALID.format(path=self.path,
+                                                    error=error))
+                return None
+            old, self.settings = self.settings, settings
+            self.stamps = self._stamps()
+        changed = [field for field in Settings._fields
+                   if getattr(old, field) != getattr(settings, field)]
+        logging.info(CONFIG_RELOADED.format(changed=', '.join(changed)
+                                            or '-'))
+        for listener in self.listeners:
+            try:
+                listener(old, settings)
+            except Exception as error:
+                logging.error(LISTENER_FAILED.format(error=error),
+                              exc_info=error)
+        return settings
+
+    def _watch(self):
+        while not self.stopped.is_set():
+            requested = self.requested.wait(self.interval)
+            self.requested.clear()
+            if self.stopped.is_set():
+                return
+            if requested or self._stamps() != self.stamps:
+                self.reload()
+
+    def request_reload(self, *args):
+        """Просит перечитать настройки; годится в обработчики сигналов."""
+        self.requested.set()
+
+    def start(self):
+        """Следит за файлами в фоне и перечитывает настройки по SIGHUP."""
+        if (hasattr(signal, 'SIGHUP')
+                and threading.current_thread() is threading.main_thread()):
+            signal.signal(signal.SIGHUP, self.request_reload)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Прекращает следить за файлами."""
+        self.stopped.set()
+        self.requested.set()
+
+
+SETTINGS = ConfigStore()
+current = SETTINGS.current
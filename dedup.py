@@ -0,0 +1,96 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+STATUS_CACHE_SIZE = int(os.getenv('STATUS_CACHE_SIZE', 100000))
+STATUS_CACHE_TTL = int(os.getenv('STATUS_CACHE_TTL', 30 * 24 * 3600))
+ERROR_CACHE_SIZE = int(os.getenv('ERROR_CACHE_SIZE', 10000))
+ERROR_CACHE_TTL = int(os.getenv('ERROR_CACHE_TTL', 6 * 3600))
+VOLATILE_PARTS = re.compile(r'\d+(\.\d+)?')
+
+
+class ExpiringLRU:
+    """Словарь ограниченного размера с вытеснением по LRU и по TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, key, default=None):
+        """Значение ключа, если оно ещё не устарело."""
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires < time.monotonic():
+                del self.items[key]
+                return default
+            self.items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """Запоминает значение, вытесняя самые старые записи."""
+        with self.lock:
+            self.items[key] = (value, time.monotonic() + self.ttl)
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def pop(self, key):
+        """Забывает ключ, если он есть."""
+        with self.lock:
+            self.items.pop(key, None)
+
+
+def homework_key(homework):
+    """Идентификатор работы: id, а если его нет - название."""
+    return homework.get('id', homework.get('homework_name'))
+
+
+def error_fingerprint(error):
+    """Отпечаток ошибки без меняющихся от цикла к циклу чисел."""
+    text = VOLATILE_PARTS.sub('#', f'{type(error).__name__}: {error}')
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+class Deduplicator:
+    """Пропускает в телеграм только настоящие изменения.
+
+    Статус работы считается новым, если отличается от последнего
+    отправленного; одинаковые ошибки повторяются не чаще раза в error_ttl.
+    """
+
+    def __init__(self, status_size=STATUS_CACHE_SIZE,
+                 status_ttl=STATUS_CACHE_TTL, error_size=ERROR_CACHE_SIZE,
+                 error_ttl=ERROR_CACHE_TTL):
+        self.statuses = ExpiringLRU(status_size, status_ttl)
+        self.errors = ExpiringLRU(error_size, error_ttl)
+
+    def fresh_homeworks(self, tenant, homeworks):
+        """Работы, статус которых студенту ещё не сообщали."""
+        return [homework for homework in homeworks
+                if self.statuses.get((tenant.key, homework_key(homework)))
+                != homework.get('status')]
+
+    def remember(self, tenant, homeworks):
+        """Отмечает статусы работ как отправленные студенту."""
+        for homework in homeworks:
+            self.statuses.put((tenant.key, homework_key(homework)),
+                              homework.get('status'))
+
+    def error_is_new(self, tenant, error):
+        """Проверяет, сообщали ли студенту о такой ошибке недавно."""
+        key = (tenant.key, error_fingerprint(error))
+        if self.errors.get(key):
+            return False
+        self.errors.put(key, True)
+        return True
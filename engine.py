@@ -0,0 +1,254 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from checkpoints import CheckpointStore
+from dedup import Deduplicator, homework_key
+from exceptions import CircuitOpen
+from config import current
+from homework import (MAX_WORKERS, RUNTIME_ERROR, check_response,
+                      fetch_api_answer)
+from http_pool import pool_stats
+from lifecycle import Lifecycle
+from logs import known_secrets, lazy, redact
+from metrics import STATUS_TRANSITIONS
+from outbox import DirectDelivery, compose_messages
+from resilience import RetryPolicy
+from scheduler import jittered, next_interval
+from templates import parse_mode, render_error, render_status
+from tenants import intern_status
+
+MIN_SLEEP = 1
+CYCLE_SUMMARY = 'Опрошено студентов: {count} за {elapsed:.2f} с'
+POOL_STATS = 'Пулы соединений: {stats}'
+ERROR_NOT_SENT = 'Не удалось сообщить студенту {tenant} об ошибке: {error}'
+
+
+def split_rendered(news, texts):
+    """Разделяет работы на описанные и ошибки описания остальных.
+
+    texts - текст или исключение для каждой работы из news. Работа
+    с неожиданным статусом не мешает сообщить студенту об остальных.
+    """
+    rendered, messages, errors = [], [], []
+    for work, text in zip(news, texts):
+        if isinstance(text, Exception):
+            errors.append(text)
+            continue
+        rendered.append(work)
+        messages.append(text)
+    return compose_messages(messages), rendered, errors
+
+
+def render_one(work, locale, markup):
+    """Текст о статусе работы или исключение, если его не составить."""
+    try:
+        return render_status(work, locale, markup)
+    except (KeyError, ValueError) as error:
+        return error
+
+
+def render_answer(tenant, response, dedup):
+    """Сообщения о новых для студента статусах, эти работы и ошибки."""
+    if response is None:
+        return [], [], []
+    news = dedup.fresh_homeworks(tenant, check_response(response))
+    return split_rendered(news, [
+        render_one(work, tenant.locale, tenant.markup) for work in news])
+
+
+def hottest_status(homeworks):
+    """Статус, от которого зависит частота опроса: ревью важнее всего."""
+    statuses = [homework.get('status') for homework in homeworks]
+    return 'reviewing' if 'reviewing' in statuses else statuses[0]
+
+
+def advance(tenant, response, news):
+    """Сдвигает timestamp студента и возвращает момент следующего опроса.
+
+    Пока работ в ответе нет, from_date не меняется - так повторный
+    запрос совпадает с прошлым и отсекается кешем ответов.
+    """
+    now = time.time()
+    if response and response.get('homeworks'):
+        tenant.timestamp = response.get('current_date', tenant.timestamp)
+    if news:
+        tenant.status = intern_status(hottest_status(news))
+        tenant.changed_at = now
+        for homework in news:
+            STATUS_TRANSITIONS.inc(homework.get('status'))
+            tenant.remember(homework_key(homework),
+                            homework.get('homework_name'),
+                            homework.get('status'))
+    return now + next_interval(tenant, now)
+
+
+def report_error(tenant, error):
+    """Логирует сбой опроса студента и возвращает текст для него.
+
+    В тексте ошибки бывают заголовки запроса с токеном, а чат может
+    быть групповым, поэтому токены из текста вычищаются.
+    """
+    logging.error(RUNTIME_ERROR.format(error=error), exc_info=error)
+    text = redact(str(error), (tenant.token, *known_secrets()))
+    return render_error(text, tenant.locale, tenant.markup)
+
+
+def error_retry_at():
+    """Момент повторного опроса после сбоя."""
+    return time.time() + jittered(current().error_retry_time)
+
+
+def sleep_time(registry, shard=None):
+    """Сколько спать до ближайшего опроса.
+
+    С шардированием цикл идёт не реже heartbeat: в нём перестраивается
+    кольцо, приходят чужие подписки и статусы, занимаются роли.
+    """
+    next_due = registry.next_due()
+    if next_due is None:
+        seconds = current().retry_time
+    else:
+        seconds = max(next_due - time.time(), MIN_SLEEP)
+    if shard is not None:
+        seconds = min(seconds, shard.coordinator.heartbeat_interval)
+    return seconds
+
+
+def share_news(shard, tenant, news):
+    """Публикует новые статусы студента для других исполнителей."""
+    if shard is not None and news:
+        shard.publish(tenant)
+
+
+class PollingEngine:
+    """Опрашивает API Практикума за всех студентов реестра сразу.
+
+    Опросы выполняются в пуле потоков ограниченного размера, поэтому
+    на одного студента приходится лишь запись в реестре, а не процесс.
+    """
+
+    def __init__(self, bot, registry, checkpoints=None, dedup=None,
+                 retry=None, outbox=None, responses=None, shard=None,
+                 history=None, lifecycle=None, max_workers=MAX_WORKERS):
+        self.bot = bot
+        self.outbox = outbox or DirectDelivery(bot)
+        self.registry = registry
+        self.checkpoints = checkpoints or CheckpointStore()
+        self.dedup = dedup or Deduplicator()
+        self.responses = responses
+        self.shard = shard
+        self.history = history
+        self.lifecycle = lifecycle or Lifecycle()
+        self.retry = retry or RetryPolicy(lifecycle=self.lifecycle)
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def fetch(self, tenant):
+        """Ответ API для студента или None, если он не изменился."""
+        if self.responses is None:
+            return fetch_api_answer(tenant.timestamp, tenant.headers)
+        return self.responses.fetch(tenant.key, tenant.timestamp,
+                                    tenant.headers)
+
+    def poll_tenant(self, tenant):
+        """Один цикл get_api_answer -> check_response -> parse_status."""
+        if self.lifecycle.stopping.is_set():
+            return
+        try:
+            response = self.retry.call(self.fetch, tenant)
+            messages, news, errors = render_answer(tenant, response,
+                                                   self.dedup)
+            self.deliver(tenant, response, messages, news)
+        except Exception as error:
+            self.fail(tenant, error)
+            return
+        for error in errors:
+            self.notify_error(tenant, error)
+
+    def poll_many(self, due):
+        """Опрашивает студентов в пуле потоков."""
+        list(self.executor.map(self.poll_tenant, due))
+
+    def deliver(self, tenant, response, messages, news):
+        """Отправляет сообщения и назначает студенту следующий опрос."""
+        for message in messages:
+            self.outbox.send(tenant.chat_id, message,
+                             parse_mode(tenant.markup))
+        self.dedup.remember(tenant, news)
+        if self.history is not None:
+            self.history.record_news(tenant, news)
+        self.registry.reschedule(tenant, advance(tenant, response, news))
+        share_news(self.shard, tenant, news)
+        self.checkpoints.set(tenant.key, tenant.timestamp)
+
+    def fail(self, tenant, error):
+        """Откладывает опрос после сбоя и сообщает о нём студенту."""
+        if isinstance(error, CircuitOpen):
+            logging.debug(error)
+            self.registry.reschedule(
+                tenant, time.time() + self.retry.breaker.probe_delay())
+            return
+        if self.responses is not None:
+            self.responses.forget(tenant.key, tenant.timestamp)
+        self.registry.reschedule(tenant, error_retry_at())
+        self.notify_error(tenant, error)
+
+    def notify_error(self, tenant, error):
+        """Сообщает студенту о сбое, если не сообщали о таком недавно."""
+        message = report_error(tenant, error)
+        if not self.dedup.error_is_new(tenant, error):
+            return
+        try:
+            self.outbox.send(tenant.chat_id, message,
+                             parse_mode(tenant.markup))
+        except Exception as send_error:
+            logging.error(ERROR_NOT_SENT.format(tenant=tenant,
+                                                error=send_error))
+
+    def run_cycle(self):
+        """Опрашивает всех студентов, которым подошёл срок."""
+        started = time.time()
+        due = self.registry.due(started)
+        if self.shard is not None:
+            due = self.shard.claim(self.registry, due, started)
+        self.poll_many(due)
+        self.checkpoints.flush()
+        if self.history is not None:
+            self.history.flush()
+        if due:
+            logging.debug(lazy(CYCLE_SUMMARY, count=len(due),
+                               elapsed=time.time() - started))
+            logging.debug(lazy(POOL_STATS, stats=pool_stats))
+        return len(due)
+
+    def run(self):
+        """Цикл опроса до остановки.
+
+        Пауза прерывается сигналом и новым опросом раньше срока:
+        подписавшегося через /subscribe опрашивают сразу.
+        """
+        woken = threading.Event()
+        wakeups = self.registry.scheduler.wakeups
+        wakeups.add(woken.set)
+        try:
+            while not self.lifecycle.stopping.is_set():
+                woken.clear()
+                self.run_cycle()
+                self.lifecycle.wait(
+                    sleep_time(self.registry, self.shard), woken)
+        finally:
+            wakeups.discard(woken.set)
+
+    def close(self, timeout=None):
+        """Останавливает пул потоков, ожидая начатые опросы до timeout с.
+
+        Неначатые опросы отменяются; поток, не успевший к сроку,
+        не задерживает следующие шаги остановки.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in list(self.executor._threads):
+            thread.join(None if deadline is None
+                        else max(deadline - time.monotonic(), 0))
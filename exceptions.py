@@ -16,3 +16,15 @@ class WrongResponseCode(Exception):
 
 class ErrorInResponse(Exception):
     pass
+
+
+class TooManyRequests(WrongResponseCode):
+    pass
+
+
+class ServerError(WrongResponseCode):
+    pass
+
+
+class CircuitOpen(ConnectionError):
+    pass
@@ -0,0 +1,154 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from dedup import ExpiringLRU, homework_key
+from homework import VERDICTS
+from logs import lazy
+
+HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', 5))
+HISTORY_CACHE_SIZE = int(os.getenv('HISTORY_CACHE_SIZE', 100000))
+HISTORY_CACHE_TTL = 30 * 24 * 3600
+STATUS_CODES = {status: code for code, status in enumerate(VERDICTS, 1)}
+STATUS_NAMES = {code: status for status, code in STATUS_CODES.items()}
+REVIEWING = STATUS_CODES['reviewing']
+
+HISTORY_FLUSHED = 'Записано событий истории в {path}: {count}'
+
+Event = namedtuple('Event', 'homework old_status new_status at')
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS events ('
+    ' id INTEGER PRIMARY KEY,'
+    ' tenant TEXT NOT NULL,'
+    ' homework TEXT NOT NULL,'
+    ' old_status INTEGER,'
+    ' new_status INTEGER NOT NULL,'
+    ' at REAL NOT NULL,'
+    ' review_seconds REAL)',
+    'CREATE INDEX IF NOT EXISTS events_by_tenant '
+    'ON events (tenant, homework, at)',
+    'CREATE INDEX IF NOT EXISTS events_by_review '
+    'ON events (review_seconds) WHERE review_seconds IS NOT NULL',
+)
+
+
+def changed_at(homework, default):
+    """Момент смены статуса по date_updated из ответа API."""
+    value = homework.get('date_updated')
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return default
+
+
+class HistoryLog:
+    """Журнал смен статусов работ в SQLite; записи только добавляются.
+
+    Статусы хранятся кодами, события пишутся пачками, как контрольные
+    точки. Время ревью (reviewing -> итоговый статус) считается при
+    записи и лежит в отдельном индексе, поэтому медиана не требует
+    просмотра всей таблицы.
+    """
+
+    def __init__(self, path=':memory:',
+                 flush_interval=HISTORY_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+        self.pending = []
+        self.last = ExpiringLRU(HISTORY_CACHE_SIZE, HISTORY_CACHE_TTL)
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _last_event(self, tenant, homework):
+        last = self.last.get((tenant, homework))
+        if last is None:
+            last = self.connection.execute(
+                'SELECT new_status, at FROM events '
+                'WHERE tenant = ? AND homework = ? '
+                'ORDER BY at DESC LIMIT 1', (tenant, homework)).fetchone()
+        return last
+
+    def record(self, tenant, homework, status, at):
+        """Добавляет событие: работа homework студента tenant в status."""
+        homework = str(homework)
+        code = STATUS_CODES[status]
+        with self.lock:
+            last = self._last_event(tenant, homework)
+            old, since = last if last is not None else (None, None)
+            if old == code:
+                return
+            review = (at - since if old == REVIEWING and since is not None
+                      else None)
+            self.pending.append((tenant, homework, old, code, at, review))
+            self.last.put((tenant, homework), (code, at))
+        if time.monotonic() - self.flushed_at >= self.flush_interval:
+            self.flush()
+
+    def record_news(self, tenant, news, now=None):
+        """Записывает новые статусы работ студента из ответа API."""
+        now = time.time() if now is None else now
+        for homework in news:
+            self.record(tenant.key, homework_key(homework),
+                        homework.get('status'), changed_at(homework, now))
+
+    def flush(self):
+        """Сбрасывает накопленные события одной транзакцией."""
+        with self.lock:
+            batch, self.pending = self.pending, []
+            self.flushed_at = time.monotonic()
+            if not batch:
+                return 0
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT INTO events (tenant, homework, old_status, '
+                    'new_status, at, review_seconds) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', batch)
+        logging.debug(lazy(HISTORY_FLUSHED, path=self.path,
+                           count=len(batch)))
+        return len(batch)
+
+    def timeline(self, tenant, homework=None):
+        """События студента по времени, по всем работам или по одной."""
+        self.flush()
+        query = ('SELECT homework, old_status, new_status, at FROM events '
+                 'WHERE tenant = ?')
+        params = [tenant]
+        if homework is not None:
+            query += ' AND homework = ?'
+            params.append(str(homework))
+        with self.lock:
+            rows = self.connection.execute(query + ' ORDER BY at',
+                                           params).fetchall()
+        return [Event(work, STATUS_NAMES.get(old), STATUS_NAMES[new], at)
+                for work, old, new, at in rows]
+
+    def median_review_time(self):
+        """Медиана времени ревью в секундах или None, если ревью не было."""
+        self.flush()
+        with self.lock:
+            count, = self.connection.execute(
+                'SELECT COUNT(*) FROM events '
+                'WHERE review_seconds IS NOT NULL').fetchone()
+            if not count:
+                return None
+            middle = self.connection.execute(
+                'SELECT review_seconds FROM events '
+                'WHERE review_seconds IS NOT NULL '
+                'ORDER BY review_seconds LIMIT ? OFFSET ?',
+                (2 - count % 2, (count - 1) // 2)).fetchall()
+        return sum(value for value, in middle) / len(middle)
+
+    def close(self):
+        """Сбрасывает события и закрывает базу."""
+        self.flush()
+        self.connection.close()
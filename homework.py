@@ -1,16 +1,20 @@
+import functools
 import logging
 import os
-import sys
 import time
-
-import requests
-import telegram
-from dotenv import load_dotenv
+from http import HTTPStatus
 
 from exceptions import (ErrorInResponse, MissingKey, SendMessageError,
-                        WrongResponseCode)
+                        ServerError, TooManyRequests, WrongResponseCode)
+from http_pool import CONNECT_TIMEOUT, READ_TIMEOUT, TIMEOUT, get_session
+from logs import lazy, setup_logging
+from metrics import (API_RESPONSES, MESSAGES_SENT, METRICS_PORT,
+                     OUTBOX_DEPTH, SCHEDULED, TELEGRAM_RETRY_AFTER, TENANTS,
+                     start_metrics_server, timed)
+from ratelimit import PRACTICUM_LIMITER, TELEGRAM_LIMITER, parse_retry_after
+from startup import load_env, report_startup
 
-load_dotenv()
+load_env()
 
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
@@ -20,6 +24,20 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 TOKENS = ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID')
 
 RETRY_TIME = 600
+ERROR_RETRY_TIME = 1200
+SEND_ATTEMPTS = 2
+MAX_WORKERS = int(os.getenv('MAX_WORKERS', 32))
+MAX_IN_FLIGHT = int(os.getenv('MAX_IN_FLIGHT', 256))
+ASYNC_MODE = bool(os.getenv('ASYNC_MODE'))
+PROCESS_WORKERS = int(os.getenv('PROCESS_WORKERS', 0))
+SWEEP_MODE = os.getenv('SWEEP_MODE', 'no') == 'yes'
+COMMANDS = os.getenv('COMMANDS', 'yes') == 'yes'
+TENANTS_FILE = os.getenv('TENANTS_FILE')
+CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH')
+SHARD_STORE = os.getenv('SHARD_STORE')
+COMMANDS_ROLE = 'commands'
+HISTORY_PATH = os.getenv('HISTORY_PATH')
+SUBSCRIPTIONS_PATH = os.getenv('SUBSCRIPTIONS_PATH')
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
@@ -48,6 +66,8 @@ STATUS_SUMMARY = ('Изменился статус проверки работы
 TOKEN_ERROR = 'Отстутствует переменная окружения {name}'
 RUNTIME_TOKEN_ERROR = 'Не хватает переменной окружения!'
 RUNTIME_ERROR = 'Сбой в работе программы: {error}'
+SUBSCRIPTIONS_VOLATILE = ('Не задан SUBSCRIPTIONS_PATH: подписки из чата '
+                          'не переживут перезапуск')
 API_RESPONSE_ERROR = ('Сайт вернул ответ с ошибкой {error}. '
                       'Текст ошибки: {error_text}'
                       'API: {url}, токен авторизации: {headers}, '
@@ -56,29 +76,98 @@ API_RESPONSE_ERROR = ('Сайт вернул ответ с ошибкой {error
 
 def send_message(bot, message):
     """Отправка сообщения о статусе работы в телеграм."""
-    try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        logging.info(SEND_MESSAGE_SUCCESSFUL.format(message=message))
-    except Exception as error:
-        raise SendMessageError(
-            SEND_MESSAGE_ERROR.format(error=error, message=message))
+    send_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+@timed('send_to_chat')
+def send_to_chat(bot, chat_id, message, parse_mode=None):
+    """Отправка сообщения в конкретный чат телеграма.
+    Соблюдает лимиты телеграма, а на RetryAfter выжидает и повторяет.
+    """
+    from telegram.error import RetryAfter
+
+    error = None
+    options = {'parse_mode': parse_mode} if parse_mode else {}
+    for _ in range(SEND_ATTEMPTS):
+        TELEGRAM_LIMITER.wait(chat_id)
+        try:
+            bot.send_message(chat_id, message, **options)
+        except RetryAfter as retry:
+            TELEGRAM_RETRY_AFTER.inc()
+            TELEGRAM_LIMITER.defer(retry.retry_after, chat_id)
+            error = retry
+            continue
+        except Exception as failure:
+            error = failure
+            break
+        MESSAGES_SENT.inc()
+        logging.info(lazy(SEND_MESSAGE_SUCCESSFUL, message=message))
+        return
+    raise SendMessageError(
+        SEND_MESSAGE_ERROR.format(error=error, message=message))
 
 
 def get_api_answer(timestamp):
     """Делает запрос к сайту и, если ответ корректен, возвращает его."""
-    request_params = dict(url=ENDPOINT,
-                          headers=HEADERS,
+    return fetch_api_answer(timestamp, HEADERS)
+
+
+@timed('fetch_api_answer')
+def fetch_api_answer(timestamp, headers):
+    """Делает запрос к сайту от имени владельца заголовков headers."""
+    response, request_params = request_api(timestamp, headers)
+    return check_api_errors(response.json(), request_params)
+
+
+def api_endpoint():
+    """Адрес API из действующих настроек, а без него - ENDPOINT."""
+    from config import current
+
+    return current().endpoint or ENDPOINT
+
+
+def request_api(timestamp, headers):
+    """Делает запрос к сайту и проверяет код ответа.
+    Ответ 304 на условный запрос считается корректным.
+    """
+    request_params = dict(url=api_endpoint(),
+                          headers=headers,
                           params={'from_date': timestamp})
+    import requests
+
+    PRACTICUM_LIMITER.wait()
     try:
-        response = requests.get(**request_params)
+        response = get_session().get(**request_params, timeout=TIMEOUT)
     except requests.RequestException as error:
         raise ConnectionError(
             RESPONSE_ERROR.format(error=error, **request_params))
-    if response.status_code != 200:
+    API_RESPONSES.inc(str(response.status_code))
+    if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+        PRACTICUM_LIMITER.defer(
+            parse_retry_after(response.headers.get('Retry-After')))
+    if response.status_code != HTTPStatus.NOT_MODIFIED:
+        check_status_code(response.status_code, request_params)
+    return response, request_params
+
+
+def check_status_code(status_code, request_params):
+    """Проверяет код ответа сайта."""
+    if status_code == HTTPStatus.TOO_MANY_REQUESTS:
+        raise TooManyRequests(
+            RESPONSE_CODE_ERROR.format(response=status_code,
+                                       **request_params))
+    if status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+        raise ServerError(
+            RESPONSE_CODE_ERROR.format(response=status_code,
+                                       **request_params))
+    if status_code != 200:
         raise WrongResponseCode(
-            RESPONSE_CODE_ERROR.format(response=response.status_code,
+            RESPONSE_CODE_ERROR.format(response=status_code,
                                        **request_params))
-    response = response.json()
+
+
+def check_api_errors(response, request_params):
+    """Проверяет, что сайт не вернул ошибку в теле ответа."""
     for error in ['error', 'code']:
         if error in response:
             raise ErrorInResponse(
@@ -88,6 +177,7 @@ def get_api_answer(timestamp):
     return response
 
 
+@timed('check_response')
 def check_response(response):
     """Проверяет ответ сайта на корректность.
     если ответ корректен - возвращает список домашних работ.
@@ -101,6 +191,7 @@ def check_response(response):
     return response['homeworks']
 
 
+@timed('parse_status')
 def parse_status(homework):
     """Извлекает статус конкретной домашки из информации о ней."""
     name = homework['homework_name']
@@ -120,36 +211,189 @@ def check_tokens():
     return True
 
 
+def build_registry(checkpoints, tenants_file=TENANTS_FILE,
+                   subscriptions=None):
+    """Собирает реестр студентов из окружения, файла и подписок из чата."""
+    from tenants import TenantRegistry
+
+    registry = TenantRegistry()
+    registry.add(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, int(time.time()))
+    if tenants_file:
+        registry.load(tenants_file, int(time.time()))
+    if subscriptions is not None:
+        from subscriptions import restore_subscriptions
+
+        restore_subscriptions(registry, subscriptions, int(time.time()))
+    registry.restore(checkpoints)
+    return registry
+
+
+def open_subscriptions(lifecycle):
+    """Хранилище подписок из чата.
+
+    По умолчанию подписки лежат в общей базе исполнителей SHARD_STORE
+    или в базе контрольных точек, если это SQLite; без них подписки
+    не переживут перезапуск.
+    """
+    from checkpoints import SQLITE_SUFFIXES
+
+    path = SUBSCRIPTIONS_PATH or SHARD_STORE
+    if not path and CHECKPOINT_PATH and CHECKPOINT_PATH.endswith(
+            SQLITE_SUFFIXES):
+        path = CHECKPOINT_PATH
+    if not path:
+        if COMMANDS:
+            logging.warning(SUBSCRIPTIONS_VOLATILE)
+        return None
+    from subscriptions import SubscriptionStore
+
+    subscriptions = SubscriptionStore(path)
+    lifecycle.on_shutdown(subscriptions.close)
+    return subscriptions
+
+
+def watch_config(registry, checkpoints, lifecycle):
+    """Перечитывает настройки и реестр студентов без перезапуска."""
+    from config import SETTINGS
+    from tenants import sync_tenants
+
+    SETTINGS.subscribe(sync_tenants(registry, checkpoints))
+    lifecycle.on_shutdown(SETTINGS.stop)
+    return SETTINGS.start()
+
+
+def build_shard(checkpoints, lifecycle, subscriptions=None):
+    """Подключается к другим исполнителям, если задан SHARD_STORE."""
+    if not SHARD_STORE:
+        return None
+    from sharding import Coordinator, Shard
+
+    coordinator = Coordinator(SHARD_STORE).start()
+    lifecycle.on_shutdown(coordinator.leave)
+    return Shard(coordinator, checkpoints, subscriptions)
+
+
+def open_history(lifecycle):
+    """Журнал смен статусов, если задан HISTORY_PATH."""
+    if not HISTORY_PATH:
+        return None
+    from history import HistoryLog
+
+    history = HistoryLog(HISTORY_PATH)
+    lifecycle.on_shutdown(history.close)
+    return history
+
+
+def polling_engine():
+    """Класс движка опроса: с пулом процессов, если задан PROCESS_WORKERS.
+
+    SWEEP_MODE=yes включает опрос волнами с потоковой обработкой.
+    """
+    if PROCESS_WORKERS:
+        from procpool import ProcessPollingEngine
+
+        return ProcessPollingEngine
+    if SWEEP_MODE:
+        from sweep import SweepPollingEngine
+
+        return SweepPollingEngine
+    from engine import PollingEngine
+
+    return PollingEngine
+
+
+def start_commands(lifecycle, registry, checkpoints, subscriptions):
+    """Начинает принимать команды студентов."""
+    from commands import CommandInterface
+
+    commands = CommandInterface(TELEGRAM_TOKEN, registry, checkpoints,
+                                subscriptions)
+    lifecycle.on_shutdown(commands.start().stop)
+
+
+def run_threaded(lifecycle, registry, checkpoints, responses, shard,
+                 history):
+    """Опрос в пуле потоков с очередью отправки сообщений."""
+    import telegram
+    from telegram.utils.request import Request
+
+    from outbox import Outbox
+
+    bot = telegram.Bot(
+        token=TELEGRAM_TOKEN,
+        request=Request(con_pool_size=MAX_WORKERS,
+                        connect_timeout=CONNECT_TIMEOUT,
+                        read_timeout=READ_TIMEOUT))
+    outbox = Outbox(bot).start()
+    lifecycle.on_shutdown(lambda: outbox.close(lifecycle.remaining()))
+    OUTBOX_DEPTH.set_function(outbox.__len__)
+    engine = polling_engine()(bot, registry, checkpoints, outbox=outbox,
+                              responses=responses, shard=shard,
+                              history=history, lifecycle=lifecycle)
+    lifecycle.on_shutdown(lambda: engine.close(lifecycle.remaining()))
+    report_startup()
+    engine.run()
+
+
+def serve(lifecycle):
+    """Поднимает всё нужное для опроса и опрашивает до остановки."""
+    from checkpoints import open_checkpoints
+
+    from config import current
+    from response_cache import ResponseCache
+
+    checkpoints = open_checkpoints(CHECKPOINT_PATH,
+                                   shared=bool(SHARD_STORE))
+    lifecycle.on_shutdown(checkpoints.close)
+    lifecycle.on_stop(PRACTICUM_LIMITER.stop)
+    responses = ResponseCache()
+    subscriptions = open_subscriptions(lifecycle)
+    registry = build_registry(checkpoints, current().tenants_file,
+                              subscriptions)
+    shard = build_shard(checkpoints, lifecycle, subscriptions)
+    history = open_history(lifecycle)
+    watch_config(registry, checkpoints, lifecycle)
+    if METRICS_PORT:
+        TENANTS.set_function(registry.__len__)
+        SCHEDULED.set_function(registry.scheduler.__len__)
+        start_metrics_server(METRICS_PORT)
+    if COMMANDS and shard is not None:
+        shard.when_leading(COMMANDS_ROLE, functools.partial(
+            start_commands, lifecycle, registry, checkpoints,
+            subscriptions))
+    elif COMMANDS:
+        start_commands(lifecycle, registry, checkpoints, subscriptions)
+    if ASYNC_MODE:
+        import asyncio
+
+        from aio import run_async
+
+        asyncio.run(run_async(registry, TELEGRAM_TOKEN, checkpoints,
+                              responses, shard, history, lifecycle))
+        return
+    run_threaded(lifecycle, registry, checkpoints, responses, shard,
+                 history)
+
+
 def main():
-    """Основная логика работы бота."""
+    """Основная логика работы бота.
+
+    По SIGTERM опрос останавливается, очередь сообщений досылается,
+    а контрольные точки сбрасываются на диск.
+    """
     if not check_tokens():
         logging.critical(RUNTIME_TOKEN_ERROR)
         raise KeyError(RUNTIME_TOKEN_ERROR)
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    while True:
-        try:
-            response = get_api_answer(timestamp)
-            message = parse_status(check_response(response)[0])
-            send_message(bot, message)
-            timestamp = response.get(
-                'current_date',
-                timestamp
-            )
-            time.sleep(RETRY_TIME)
-        except Exception as error:
-            message = RUNTIME_ERROR.format(error=error)
-            logging.error(message, exc_info=True)
-            send_message(bot, message)
-            time.sleep(1200)
+    from lifecycle import Lifecycle
+
+    lifecycle = Lifecycle().install()
+    try:
+        serve(lifecycle)
+    finally:
+        lifecycle.shutdown()
 
 
 if __name__ == '__main__':
     LOG_FILE = __file__ + '.log'
-    logging.basicConfig(
-        handlers=[logging.FileHandler(LOG_FILE),
-                  logging.StreamHandler(sys.stdout)],
-        level=logging.DEBUG,
-        format=('%(asctime)s - %(funcName)s - %(lineno)d - '
-                '%(levelname)s - %(message)s'))
+    setup_logging(LOG_FILE)
     main()
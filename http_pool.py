@@ -0,0 +1,74 @@
+import os
+import threading
+
+POOL_CONNECTIONS = int(os.getenv('POOL_CONNECTIONS', 4))
+POOL_MAXSIZE = int(os.getenv('POOL_MAXSIZE', 32))
+POOL_BLOCK = os.getenv('POOL_BLOCK', 'yes') == 'yes'
+CONNECT_TIMEOUT = float(os.getenv('CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.getenv('READ_TIMEOUT', 27))
+KEEPALIVE_TIMEOUT = float(os.getenv('KEEPALIVE_TIMEOUT', 60))
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+_session = None
+_lock = threading.Lock()
+
+
+def build_session(pool_connections=POOL_CONNECTIONS,
+                  pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK):
+    """Создаёт сессию с пулом keep-alive соединений.
+
+    pool_connections - сколько хостов держать в пуле,
+    pool_maxsize - сколько соединений держать к одному хосту,
+    pool_block - ждать ли свободного соединения вместо открытия лишнего.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=pool_block,
+                          max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+def get_session():
+    """Общая для всех потоков сессия, создаётся при первом обращении."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def close_session():
+    """Закрывает общую сессию и все соединения её пула."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def pool_stats():
+    """Статистика пулов соединений общей сессии по хостам."""
+    if _session is None:
+        return {}
+    stats = {}
+    for adapter in set(_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats[f'{pool.scheme}://{pool.host}:{pool.port}'] = {
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle': pool.pool.qsize() if pool.pool else 0,
+                'maxsize': pool.pool.maxsize if pool.pool else 0,
+            }
+    return stats
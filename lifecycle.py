@@ -0,0 +1,117 @@
+import logging
+import os
+import signal
+import threading
+import time
+
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 25))
+SHUTDOWN_SIGNALS = ('SIGTERM', 'SIGINT')
+
+SHUTDOWN_REQUESTED = 'Получен сигнал {signal}: новые опросы не начинаются'
+SHUTDOWN_STEP_FAILED = 'Сбой при остановке на шаге {step}: {error}'
+SHUTDOWN_FINISHED = 'Бот остановлен за {elapsed:.2f} с'
+
+
+class Lifecycle:
+    """Остановка бота по SIGTERM: Heroku даёт на неё 30 секунд.
+
+    После сигнала опрос не начинает новых циклов, паузы между циклами
+    прерываются сразу, а shutdown выполняет зарегистрированные шаги
+    (дослать очередь, сбросить контрольные точки) в обратном порядке,
+    как atexit, укладываясь в общий срок timeout.
+    """
+
+    def __init__(self, timeout=SHUTDOWN_TIMEOUT):
+        self.timeout = timeout
+        self.stopping = threading.Event()
+        self.deadline = None
+        self.steps = []
+        self.wakeups = set()
+
+    def install(self, signals=SHUTDOWN_SIGNALS):
+        """Ставит обработчики сигналов; работает только в главном потоке."""
+        if threading.current_thread() is threading.main_thread():
+            for name in signals:
+                if hasattr(signal, name):
+                    signal.signal(getattr(signal, name), self.request_stop)
+        return self
+
+    def request_stop(self, signum=None, frame=None):
+        """Начинает остановку; повторный вызов ничего не меняет."""
+        if self.stopping.is_set():
+            return
+        self.deadline = time.monotonic() + self.timeout
+        name = signal.Signals(signum).name if signum else '-'
+        logging.warning(SHUTDOWN_REQUESTED.format(signal=name))
+        self.stopping.set()
+        for wakeup in list(self.wakeups):
+            wakeup()
+
+    def remaining(self):
+        """Сколько секунд осталось до срока остановки."""
+        if self.deadline is None:
+            return self.timeout
+        return max(self.deadline - time.monotonic(), 0)
+
+    def wait(self, seconds, woken=None):
+        """Пауза, прерываемая остановкой; True, если пора останавливаться.
+
+        woken - событие, которое тоже прерывает паузу, например новый
+        опрос раньше срока.
+        """
+        if woken is None:
+            return self.stopping.wait(seconds)
+        self.wakeups.add(woken.set)
+        try:
+            if not self.stopping.is_set():
+                woken.wait(seconds)
+        finally:
+            self.wakeups.discard(woken.set)
+        return self.stopping.is_set()
+
+    async def wait_async(self, seconds, woken=None):
+        """То же, что wait, но не блокирует цикл событий."""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        event = woken or asyncio.Event()
+
+        def wakeup():
+            loop.call_soon_threadsafe(event.set)
+
+        self.wakeups.add(wakeup)
+        try:
+            if not self.stopping.is_set():
+                await asyncio.wait_for(event.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.wakeups.discard(wakeup)
+        return self.stopping.is_set()
+
+    def on_stop(self, callback):
+        """Вызовет callback сразу после запроса остановки."""
+        self.wakeups.add(callback)
+        return callback
+
+    def on_shutdown(self, step):
+        """Регистрирует шаг остановки; шаги выполняются в обратном порядке."""
+        self.steps.append(step)
+        return step
+
+    def shutdown(self):
+        """Выполняет шаги остановки; сбой одного шага не отменяет прочие."""
+        if self.deadline is None:
+            self.deadline = time.monotonic() + self.timeout
+        self.stopping.set()
+        started = time.monotonic()
+        while self.steps:
+            step = self.steps.pop()
+            try:
+                step()
+            except Exception as error:
+                logging.error(SHUTDOWN_STEP_FAILED.format(
+                    step=getattr(step, '__qualname__', step), error=error),
+                    exc_info=error)
+        logging.info(SHUTDOWN_FINISHED.format(
+            elapsed=time.monotonic() - started))
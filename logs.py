@@ -0,0 +1,227 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from logging.handlers import (QueueHandler, QueueListener,
+                              RotatingFileHandler, TimedRotatingFileHandler)
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+LOG_JSON = os.getenv('LOG_JSON', 'no') == 'yes'
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 2 ** 20))
+LOG_BACKUPS = int(os.getenv('LOG_BACKUPS', 5))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN')
+LOG_SAMPLE_WINDOW = float(os.getenv('LOG_SAMPLE_WINDOW', 60))
+LOG_SAMPLE_BURST = int(os.getenv('LOG_SAMPLE_BURST', 10))
+LOG_SAMPLE_SITES = int(os.getenv('LOG_SAMPLE_SITES', 1000))
+TEXT_FORMAT = ('%(asctime)s - %(funcName)s - %(lineno)d - '
+               '%(levelname)s - %(message)s')
+SECRETS = ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN')
+REDACTED = '***'
+TOKEN_PATTERNS = (
+    re.compile(r'(OAuth\s+)[^\s\'",}]+'),
+    re.compile(r'(bot)?\d{6,}:[\w-]{30,}'),
+)
+SAMPLE_VOLATILE = re.compile(r'\d+(\.\d+)?')
+
+MESSAGES_SUPPRESSED = ' (ещё {count} таких же записей пропущено)'
+
+
+def lazy(template, **kwargs):
+    """Сообщение для журнала, которое форматируется только при записи.
+
+    Вызываемые значения в kwargs тоже вычисляются только при записи.
+    """
+    return LazyMessage(template, kwargs)
+
+
+class LazyMessage:
+    """Шаблон с аргументами; str() собирает текст."""
+
+    __slots__ = ('template', 'kwargs')
+
+    def __init__(self, template, kwargs):
+        self.template = template
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return self.template.format(**{
+            name: value() if callable(value) else value
+            for name, value in self.kwargs.items()})
+
+
+def redact(text, secrets=()):
+    """Прячет токены в тексте записи."""
+    for secret in secrets:
+        text = text.replace(secret, REDACTED)
+    for pattern in TOKEN_PATTERNS:
+        text = pattern.sub(lambda match: (match.group(1) or '') + REDACTED,
+                           text)
+    return text
+
+
+def known_secrets():
+    """Значения токенов из окружения, которые нельзя писать в журнал."""
+    return tuple(value for value in map(os.getenv, SECRETS) if value)
+
+
+class RedactingFormatter(logging.Formatter):
+    """Текстовый формат журнала без токенов."""
+
+    def __init__(self, fmt=TEXT_FORMAT, secrets=None):
+        super().__init__(fmt)
+        self.secrets = known_secrets() if secrets is None else secrets
+
+    def format(self, record):
+        """Форматирует запись и прячет в ней токены."""
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text += MESSAGES_SUPPRESSED.format(count=suppressed)
+        return redact(text, self.secrets)
+
+
+class JsonFormatter(RedactingFormatter):
+    """Запись журнала одной строкой JSON."""
+
+    def format(self, record):
+        """Собирает JSON из полей записи и прячет в нём токены."""
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'func': record.funcName,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        return redact(json.dumps(entry, ensure_ascii=False), self.secrets)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает не больше burst одинаковых предупреждений за window с.
+
+    Прореживаются только WARNING и ERROR: обычные записи о статусах
+    проходят всегда, CRITICAL - тоже. Одинаковыми считаются записи
+    из одного места с одним текстом без чисел, как в
+    dedup.error_fingerprint, поэтому разные ошибки друг друга
+    не заглушают. Сколько записей отброшено, сообщается в первой
+    такой же записи в следующем окне.
+    """
+
+    def __init__(self, window=LOG_SAMPLE_WINDOW, burst=LOG_SAMPLE_BURST,
+                 max_sites=LOG_SAMPLE_SITES):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.max_sites = max_sites
+        self.sites = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def site(record):
+        """Ключ записи: место в коде и текст без меняющихся чисел."""
+        try:
+            message = record.getMessage()
+        except (TypeError, ValueError):
+            message = str(record.msg)
+        return (record.pathname, record.lineno,
+                SAMPLE_VOLATILE.sub('#', message))
+
+    def _prune(self, now):
+        self.sites = {site: state for site, state in self.sites.items()
+                      if now - state[0] < self.window}
+
+    def filter(self, record):
+        """True, если запись нужно записать."""
+        if not (logging.WARNING <= record.levelno < logging.CRITICAL
+                and self.burst):
+            return True
+        site = self.site(record)
+        now = time.monotonic()
+        with self.lock:
+            if site not in self.sites and len(self.sites) >= self.max_sites:
+                self._prune(now)
+            started, passed, dropped = self.sites.get(site, (now, 0, 0))
+            if now - started >= self.window:
+                started, passed = now, 0
+            if passed >= self.burst:
+                self.sites[site] = (started, passed, dropped + 1)
+                return False
+            self.sites[site] = (started, passed + 1, 0)
+        record.suppressed = dropped
+        return True
+
+
+class BufferedQueueHandler(QueueHandler):
+    """Кладёт записи в очередь, не форматируя их в потоке опроса.
+
+    Если очередь переполнена, запись отбрасывается: журнал не должен
+    тормозить опрос.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        """Запись уходит в очередь как есть - форматирует её слушатель."""
+        return record
+
+    def enqueue(self, record):
+        """Ставит запись в очередь без ожидания."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def build_handlers(path=None, json_format=LOG_JSON):
+    """Обработчики, которые пишут журнал в потоке слушателя."""
+    formatter = JsonFormatter() if json_format else RedactingFormatter()
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if path and LOG_ROTATE_WHEN:
+        handlers.append(TimedRotatingFileHandler(
+            path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUPS,
+            encoding='utf-8'))
+    elif path:
+        handlers.append(RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+            encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def stop_logging(listener):
+    """Дописывает очередь журнала и останавливает слушателя."""
+    if listener._thread is not None:
+        listener.stop()
+
+
+def setup_logging(path=None, level=LOG_LEVEL, json_format=LOG_JSON):
+    """Настраивает корневой логгер на очередь и запускает слушателя.
+
+    Возвращает слушателя; при выходе из программы он дописывает очередь.
+    """
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    handler = BufferedQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter())
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+    listener = QueueListener(log_queue, *build_handlers(path, json_format))
+    listener.start()
+    atexit.register(stop_logging, listener)
+    return listener
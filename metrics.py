@@ -0,0 +1,256 @@
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1, 2.5, 5, 10, 30)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+METRICS_STARTED = 'Метрики доступны на http://{host}:{port}/metrics'
+METRIC_FAILED = 'Не удалось снять метрику {name}: {error}'
+
+
+def format_labels(names, values, extra=()):
+    """Метки в формате Prometheus: {name="value",...}."""
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in pairs) + '}'
+
+
+class Counter:
+    """Счётчик, который только растёт; по одному значению на набор меток."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        """Увеличивает счётчик с метками labels на amount."""
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        """Текущее значение счётчика."""
+        return self.values.get(labels, 0)
+
+    def samples(self):
+        """Строки выдачи /metrics без заголовка."""
+        with self.lock:
+            values = list(self.values.items())
+        return [f'{self.name}{format_labels(self.labels, labels)} {value}'
+                for labels, value in values]
+
+
+class Gauge:
+    """Мгновенное значение; вычисляется функцией только при опросе."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, function=None):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+
+    def set_function(self, function):
+        """Задаёт функцию, которая вернёт значение при опросе /metrics."""
+        self.function = function
+
+    def samples(self):
+        """Строки выдачи /metrics без заголовка."""
+        if self.function is None:
+            return []
+        try:
+            return [f'{self.name} {self.function()}']
+        except Exception as error:
+            logging.warning(METRIC_FAILED.format(name=self.name, error=error))
+            return []
+
+
+class Histogram:
+    """Распределение длительностей по корзинам, как в Prometheus."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(),
+                 buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """Добавляет замер value в ряд с метками labels."""
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels):
+        """Сколько замеров в ряду."""
+        series = self.series.get(labels)
+        return series[2] if series else 0
+
+    def samples(self):
+        """Строки выдачи /metrics без заголовка."""
+        with self.lock:
+            series = [(labels, list(counts), total, count)
+                      for labels, (counts, total, count)
+                      in self.series.items()]
+        lines = []
+        for labels, counts, total, count in series:
+            cumulative = 0
+            bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+            for bound, bucket in zip(bounds, counts):
+                cumulative += bucket
+                lines.append('{}_bucket{} {}'.format(
+                    self.name,
+                    format_labels(self.labels, labels, [('le', bound)]),
+                    cumulative))
+            suffix = format_labels(self.labels, labels)
+            lines.append(f'{self.name}_sum{suffix} {total}')
+            lines.append(f'{self.name}_count{suffix} {count}')
+        return lines
+
+
+class Registry:
+    """Набор метрик, который отдаётся по /metrics."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        """Добавляет метрику и возвращает её."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'homework_stage_seconds', 'Длительность стадий опроса, с.', ('stage',)))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    'homework_stage_errors_total', 'Сбои стадий опроса.',
+    ('stage', 'error')))
+API_RESPONSES = REGISTRY.register(Counter(
+    'homework_api_responses_total', 'Ответы API Практикума по кодам.',
+    ('code',)))
+MESSAGES_SENT = REGISTRY.register(Counter(
+    'homework_messages_sent_total', 'Сообщения, доставленные в телеграм.'))
+TELEGRAM_RETRY_AFTER = REGISTRY.register(Counter(
+    'homework_telegram_retry_after_total', 'Ответы RetryAfter от телеграма.'))
+RETRIES = REGISTRY.register(Counter(
+    'homework_retries_total', 'Повторы запросов к API Практикума.',
+    ('error',)))
+CIRCUIT_OPENINGS = REGISTRY.register(Counter(
+    'homework_circuit_opened_total', 'Сколько раз размыкалась цепь.'))
+STATUS_TRANSITIONS = REGISTRY.register(Counter(
+    'homework_status_transitions_total', 'Новые статусы работ.',
+    ('status',)))
+OUTBOX_DEPTH = REGISTRY.register(Gauge(
+    'homework_outbox_depth', 'Сообщения в очереди отправки.'))
+TENANTS = REGISTRY.register(Gauge(
+    'homework_tenants', 'Студенты в реестре.'))
+SCHEDULED = REGISTRY.register(Gauge(
+    'homework_scheduled_polls', 'Записи в очереди опросов.'))
+
+
+def timed(stage):
+    """Декоратор: время и сбои функции попадают в метрики стадии stage.
+
+    Годится и для обычных функций, и для корутин.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as error:
+                    STAGE_ERRORS.inc(stage, type(error).__name__)
+                    raise
+                finally:
+                    STAGE_SECONDS.observe(time.perf_counter() - started,
+                                          stage)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception as error:
+                STAGE_ERRORS.inc(stage, type(error).__name__)
+                raise
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage)
+        return wrapper
+    return decorator
+
+
+def serve_metrics(handler):
+    """Ответ на опрос Prometheus для обработчика запроса handler."""
+    if handler.path.split('?')[0] != '/metrics':
+        handler.send_error(404)
+        return
+    body = handler.server.registry.render().encode()
+    handler.send_response(200)
+    handler.send_header('Content-Type', CONTENT_TYPE)
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST,
+                         registry=REGISTRY):
+    """Поднимает /metrics в фоновом потоке и возвращает сервер.
+
+    http.server загружается только здесь: без METRICS_PORT он не нужен.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """Отдаёт метрики по GET /metrics."""
+
+        do_GET = serve_metrics
+
+        def log_message(self, format, *args):
+            """Опросы /metrics не пишутся в журнал."""
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(METRICS_STARTED.format(host=host,
+                                        port=server.server_address[1]))
+    return server
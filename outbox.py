@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+
+from exceptions import SendMessageError
+from homework import send_to_chat
+from resilience import backoff
+
+SENDER_WORKERS = int(os.getenv('SENDER_WORKERS', 8))
+OUTBOX_SIZE = int(os.getenv('OUTBOX_SIZE', 10000))
+OUTBOX_PUT_TIMEOUT = float(os.getenv('OUTBOX_PUT_TIMEOUT', 30))
+OUTBOX_ATTEMPTS = int(os.getenv('OUTBOX_ATTEMPTS', 3))
+BATCH_SIZE = 50
+TELEGRAM_MESSAGE_LIMIT = 4096
+SEPARATOR = '\n\n'
+
+OUTBOX_FULL = 'Очередь отправки переполнена, сообщение {message} не принято'
+OUTBOX_DROPPED = 'Сообщение {message} не доставлено после {attempts} попыток'
+
+
+def compose_messages(parts, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Склеивает вердикты в как можно меньшее число сообщений."""
+    messages = []
+    for part in parts:
+        joined = messages and messages[-1] + SEPARATOR + part
+        if joined and len(joined) <= limit:
+            messages[-1] = joined
+        else:
+            messages.append(part)
+    return messages
+
+
+def group_by_chat(batch):
+    """Собирает сообщения пачки по чатам и разметке, сохраняя порядок."""
+    chats = {}
+    for chat_id, message, parse_mode in batch:
+        chats.setdefault((chat_id, parse_mode), []).append(message)
+    return chats
+
+
+class DirectDelivery:
+    """Отправка прямо из потока опроса, без очереди."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    def send(self, chat_id, message, parse_mode=None):
+        """Отправляет сообщение сразу."""
+        send_to_chat(self.bot, chat_id, message, parse_mode)
+
+
+class Outbox:
+    """Очередь исходящих сообщений с пулом потоков-отправителей.
+
+    Сообщения одного чата всегда попадают в одну и ту же очередь, поэтому
+    сохраняют порядок и склеиваются, если накопились. Когда очередь
+    заполнена, send ждёт - это притормаживает опрос, а не теряет сообщения.
+    """
+
+    def __init__(self, bot, workers=SENDER_WORKERS, maxsize=OUTBOX_SIZE,
+                 put_timeout=OUTBOX_PUT_TIMEOUT, attempts=OUTBOX_ATTEMPTS):
+        self.bot = bot
+        self.put_timeout = put_timeout
+        self.attempts = attempts
+        self.queues = [queue.Queue(max(maxsize // workers, 1))
+                       for _ in range(workers)]
+        self.closing = threading.Event()
+        self.threads = [threading.Thread(target=self._work, args=(shard,),
+                                         daemon=True)
+                        for shard in self.queues]
+
+    def start(self):
+        """Запускает потоки-отправители."""
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def __len__(self):
+        return sum(shard.qsize() for shard in self.queues)
+
+    def send(self, chat_id, message, parse_mode=None):
+        """Ставит сообщение в очередь своего чата."""
+        shard = self.queues[hash(chat_id) % len(self.queues)]
+        try:
+            shard.put((chat_id, message, parse_mode),
+                      timeout=self.put_timeout)
+        except queue.Full:
+            raise SendMessageError(OUTBOX_FULL.format(message=message))
+
+    def _take(self, shard):
+        batch = [shard.get()]
+        while batch[-1] is not None and len(batch) < BATCH_SIZE:
+            try:
+                batch.append(shard.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self, shard):
+        while True:
+            batch = self._take(shard)
+            stop = batch[-1] is None
+            items = batch[:-1] if stop else batch
+            for (chat_id, parse_mode), messages in group_by_chat(
+                    items).items():
+                for message in compose_messages(messages):
+                    self.deliver(chat_id, message, parse_mode)
+            for _ in batch:
+                shard.task_done()
+            if stop:
+                return
+
+    def deliver(self, chat_id, message, parse_mode=None):
+        """Отправляет сообщение с повторами; True, если доставлено."""
+        for attempt in range(self.attempts):
+            try:
+                send_to_chat(self.bot, chat_id, message, parse_mode)
+                return True
+            except SendMessageError as error:
+                logging.error(error)
+                if attempt + 1 < self.attempts:
+                    self.closing.wait(backoff(attempt))
+        logging.error(OUTBOX_DROPPED.format(message=message,
+                                            attempts=self.attempts))
+        return False
+
+    def close(self, timeout=None):
+        """Дожидается отправки очереди и останавливает отправителей.
+
+        Паузы между повторами после этого не выдерживаются.
+        Возвращает, сколько сообщений не успело уйти за timeout.
+        """
+        self.closing.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def left():
+            if deadline is None:
+                return None
+            return max(deadline - time.monotonic(), 0)
+
+        for shard in self.queues:
+            try:
+                shard.put(None, timeout=left())
+            except queue.Full:
+                pass
+        for thread in self.threads:
+            thread.join(left())
+        return len(self)
+
+
+class AsyncOutbox:
+    """Очередь исходящих сообщений для асинхронного режима."""
+
+    def __init__(self, bot, send_async, workers=SENDER_WORKERS,
+                 maxsize=OUTBOX_SIZE, attempts=OUTBOX_ATTEMPTS):
+        self.bot = bot
+        self.send_async = send_async
+        self.attempts = attempts
+        self.queues = [asyncio.Queue(max(maxsize // workers, 1))
+                       for _ in range(workers)]
+        self.tasks = []
+
+    def start(self):
+        """Запускает задачи-отправители в текущем цикле событий."""
+        self.tasks = [asyncio.create_task(self._work(shard))
+                      for shard in self.queues]
+        return self
+
+    def __len__(self):
+        return sum(shard.qsize() for shard in self.queues)
+
+    async def send(self, chat_id, message, parse_mode=None):
+        """Ставит сообщение в очередь своего чата, ожидая места."""
+        await self.queues[hash(chat_id) % len(self.queues)].put(
+            (chat_id, message, parse_mode))
+
+    async def _take(self, shard):
+        batch = [await shard.get()]
+        while batch[-1] is not None and len(batch) < BATCH_SIZE:
+            try:
+                batch.append(shard.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _work(self, shard):
+        while True:
+            batch = await self._take(shard)
+            stop = batch[-1] is None
+            items = batch[:-1] if stop else batch
+            for (chat_id, parse_mode), messages in group_by_chat(
+                    items).items():
+                for message in compose_messages(messages):
+                    await self.deliver(chat_id, message, parse_mode)
+            for _ in batch:
+                shard.task_done()
+            if stop:
+                return
+
+    async def deliver(self, chat_id, message, parse_mode=None):
+        """Отправляет сообщение с повторами; True, если доставлено."""
+        for attempt in range(self.attempts):
+            try:
+                await self.send_async(self.bot, chat_id, message,
+                                      parse_mode)
+                return True
+            except SendMessageError as error:
+                logging.error(error)
+                if attempt + 1 < self.attempts:
+                    await asyncio.sleep(backoff(attempt))
+        logging.error(OUTBOX_DROPPED.format(message=message,
+                                            attempts=self.attempts))
+        return False
+
+    async def close(self, timeout=None):
+        """Дожидается отправки очереди и останавливает отправителей.
+
+        Возвращает, сколько сообщений не успело уйти за timeout.
+        """
+        async def drain():
+            for shard in self.queues:
+                await shard.put(None)
+            await asyncio.wait(self.tasks)
+
+        try:
+            await asyncio.wait_for(drain(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return len(self)
@@ -0,0 +1,144 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from engine import PollingEngine, render_one, split_rendered
+from homework import PROCESS_WORKERS, check_response, request_api
+from metrics import STAGE_SECONDS
+from records import Homework, decode_answer
+
+PROCESS_CHUNKSIZE = int(os.getenv('PROCESS_CHUNKSIZE', 16))
+PROCESS_START_METHOD = os.getenv('PROCESS_START_METHOD', 'forkserver')
+
+
+def decode_and_render(raw):
+    """В процессе-исполнителе: разбирает тело ответа и готовит тексты.
+
+    Обратно передаются только current_date и кортежи (id, название,
+    статус, сообщение) - остальные поля ответа не пересылаются. Ошибка
+    разбора возвращается как значение, чтобы не ронять всю пачку, а
+    вместо текста о работе, который не составить, - исключение.
+    """
+    body, request_params, locale, markup = raw
+    try:
+        answer = decode_answer(body, request_params)
+        return answer.get('current_date'), [
+            (work.id, work.homework_name, work.status,
+             render_one(work, locale, markup))
+            for work in check_response(answer)]
+    except Exception as error:
+        return error
+
+
+def restore_answer(rendered):
+    """Ответ API и тексты для каждой работы из итога decode_and_render."""
+    current_date, works = rendered
+    homeworks = []
+    texts = {}
+    for work_id, name, status, text in works:
+        work = Homework({'id': work_id, 'homework_name': name,
+                         'status': status})
+        homeworks.append(work)
+        texts[id(work)] = text
+    answer = {'homeworks': homeworks}
+    if current_date is not None:
+        answer['current_date'] = current_date
+    return answer, texts
+
+
+class ProcessPollingEngine(PollingEngine):
+    """Опрос, в котором разбор ответов и тексты готовит пул процессов.
+
+    Запросы к API и отправка остаются в потоках основного процесса;
+    в процессы уходят только тела изменившихся ответов, пачками.
+
+    Процессы запускаются через forkserver, а не fork: к этому моменту
+    в боте уже работают потоки отправки, журнала и команд, и копия
+    процесса с чужой захваченной блокировкой зависла бы навсегда.
+    Метрики, снятые внутри процессов, до /metrics не доходят, поэтому
+    время разбора пачки снимается здесь, как стадия process_render.
+    """
+
+    def __init__(self, *args, processes=PROCESS_WORKERS,
+                 chunksize=PROCESS_CHUNKSIZE,
+                 start_method=PROCESS_START_METHOD, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.process_count = processes or None
+        self.chunksize = chunksize
+        self.context = multiprocessing.get_context(start_method)
+        self.processes = self.start_processes()
+
+    def start_processes(self):
+        """Новый пул процессов."""
+        return ProcessPoolExecutor(self.process_count,
+                                   mp_context=self.context)
+
+    def fetch_raw(self, tenant):
+        """Тело ответа API и параметры запроса; None, если ничего нового."""
+        if self.responses is None:
+            response, request_params = request_api(tenant.timestamp,
+                                                   tenant.headers)
+            return response.content, request_params
+        return self.responses.fetch_raw(tenant.key, tenant.timestamp,
+                                        tenant.headers)
+
+    def download(self, tenant):
+        """Загружает ответ для студента; сбой обрабатывается сразу."""
+        if self.lifecycle.stopping.is_set():
+            return None
+        try:
+            return tenant, self.retry.call(self.fetch_raw, tenant)
+        except Exception as error:
+            self.fail(tenant, error)
+            return None
+
+    def render(self, bodies):
+        """Разбирает тела ответов в пуле процессов."""
+        started = time.perf_counter()
+        try:
+            return list(self.processes.map(decode_and_render, bodies,
+                                           chunksize=self.chunksize))
+        except BrokenProcessPool as error:
+            self.processes = self.start_processes()
+            return [error] * len(bodies)
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - started,
+                                  'process_render')
+
+    def finish(self, item):
+        """Отбирает новые статусы и отправляет их студенту."""
+        tenant, rendered = item
+        try:
+            if isinstance(rendered, Exception):
+                raise rendered
+            response, texts, news = None, {}, []
+            if rendered is not None:
+                response, texts = restore_answer(rendered)
+                news = self.dedup.fresh_homeworks(tenant,
+                                                  response['homeworks'])
+            messages, news, errors = split_rendered(
+                news, [texts[id(work)] for work in news])
+            self.deliver(tenant, response, messages, news)
+        except Exception as error:
+            self.fail(tenant, error)
+            return
+        for error in errors:
+            self.notify_error(tenant, error)
+
+    def poll_many(self, due):
+        """Загрузка в потоках, разбор в процессах, отправка в потоках."""
+        fetched = [item for item in self.executor.map(self.download, due)
+                   if item is not None]
+        rendered = iter(self.render([
+            (*raw, tenant.locale, tenant.markup)
+            for tenant, raw in fetched if raw is not None]))
+        list(self.executor.map(self.finish, [
+            (tenant, None if raw is None else next(rendered))
+            for tenant, raw in fetched]))
+
+    def close(self, timeout=None):
+        """Останавливает пулы потоков и процессов."""
+        super().close(timeout)
+        self.processes.shutdown(cancel_futures=True)
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+
+PRACTICUM_RATE = float(os.getenv('PRACTICUM_RATE', 20))
+PRACTICUM_BURST = int(os.getenv('PRACTICUM_BURST', 20))
+TELEGRAM_RATE = float(os.getenv('TELEGRAM_RATE', 30))
+TELEGRAM_BURST = int(os.getenv('TELEGRAM_BURST', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_CHAT_BURST = int(os.getenv('TELEGRAM_CHAT_BURST', 1))
+MAX_RETRY_AFTER = float(os.getenv('MAX_RETRY_AFTER', 60))
+MAX_KEYS = 10000
+STOP_CHECK_INTERVAL = 0.5
+DEFAULT_RETRY_AFTER = 1
+
+
+class TokenBucket:
+    """Ведро токенов с резервированием: вызывающий сам ждёт свою очередь.
+
+    Токены можно брать в долг - тогда reserve возвращает, сколько
+    секунд осталось до появления взятого токена. rate=None - без лимита.
+    """
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'blocked_until')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0
+
+    def reserve(self, now):
+        """Берёт токен и возвращает задержку до права им воспользоваться."""
+        pause = max(self.blocked_until - now, 0)
+        if self.rate is None:
+            return pause
+        elapsed = max(now - self.updated, 0)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = max(now, self.updated)
+        self.tokens -= 1
+        return max(pause, -self.tokens / self.rate)
+
+    def is_idle(self, now):
+        """Полное ведро без блокировки ничем не отличается от нового."""
+        full = (self.rate is None or self.tokens
+                + (now - self.updated) * self.rate >= self.capacity)
+        return full and self.blocked_until <= now
+
+
+def parse_retry_after(value):
+    """Секунды из заголовка Retry-After (дата не поддерживается)."""
+    try:
+        return max(float(value), 0)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+class RateLimiter:
+    """Общий лимит запросов плюс отдельный лимит на каждый ключ.
+
+    После stop ожидания заканчиваются сразу: при остановке бота поток
+    не должен досыпать паузу лимита.
+    """
+
+    def __init__(self, rate=None, burst=1, key_rate=None, key_burst=1):
+        self.bucket = TokenBucket(rate, burst)
+        self.key_rate = key_rate
+        self.key_burst = key_burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+
+    def _key_bucket(self, key, now):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= MAX_KEYS:
+                self.buckets = {name: known
+                                for name, known in self.buckets.items()
+                                if not known.is_idle(now)}
+            bucket = self.buckets[key] = TokenBucket(self.key_rate,
+                                                     self.key_burst)
+        return bucket
+
+    def reserve(self, key=None):
+        """Резервирует право на запрос и возвращает, сколько ждать."""
+        with self.lock:
+            now = time.monotonic()
+            delay = self.bucket.reserve(now)
+            if key is not None:
+                delay = max(delay, self._key_bucket(key, now).reserve(now))
+            return delay
+
+    def wait(self, key=None):
+        """Блокирует поток до права на запрос."""
+        delay = self.reserve(key)
+        if delay > 0:
+            self.stopping.wait(delay)
+
+    async def wait_async(self, key=None):
+        """Ждёт права на запрос, не блокируя цикл событий."""
+        delay = self.reserve(key)
+        if delay <= 0:
+            return
+        import asyncio
+
+        deadline = time.monotonic() + delay
+        while not self.stopping.is_set():
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return
+            await asyncio.sleep(min(left, STOP_CHECK_INTERVAL))
+
+    def stop(self):
+        """Прерывает текущие и будущие ожидания."""
+        self.stopping.set()
+
+    def defer(self, retry_after, key=None):
+        """Приостанавливает запросы по ключу (или все) на retry_after с.
+
+        Пауза не длиннее MAX_RETRY_AFTER, что бы ни прислал сервер.
+        """
+        retry_after = min(retry_after, MAX_RETRY_AFTER)
+        with self.lock:
+            now = time.monotonic()
+            bucket = (self.bucket if key is None
+                      else self._key_bucket(key, now))
+            bucket.blocked_until = max(bucket.blocked_until,
+                                       now + retry_after)
+
+
+PRACTICUM_LIMITER = RateLimiter(PRACTICUM_RATE, PRACTICUM_BURST)
+TELEGRAM_LIMITER = RateLimiter(TELEGRAM_RATE, TELEGRAM_BURST,
+                               TELEGRAM_CHAT_RATE, TELEGRAM_CHAT_BURST)
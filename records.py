@@ -0,0 +1,95 @@
+import json
+
+from exceptions import MissingKey
+from homework import NOT_IN_LIST, NOT_LIST_TYPE, check_api_errors
+from metrics import timed
+
+try:
+    import orjson
+    loads = orjson.loads
+    DECODER = 'orjson'
+except ImportError:
+    try:
+        import msgspec
+        loads = msgspec.json.decode
+        DECODER = 'msgspec'
+    except ImportError:
+        loads = json.loads
+        DECODER = 'json'
+
+NO_STATUS = 'Ключа "status" нет в описании работы {homework}'
+NOT_DICT_TYPE = 'Ответ API в виде "{type}" а не "dict"'
+HOMEWORK_NOT_DICT = 'Работа в виде "{type}" а не "dict"'
+DATE_NOT_INT = 'current_date в виде "{type}" а не "int"'
+STATUS_NOT_STR = 'Статус работы в виде "{type}" а не "str"'
+
+
+class Homework:
+    """Работа из ответа API; читается и как словарь, как в parse_status."""
+
+    __slots__ = ('id', 'homework_name', 'status', 'reviewer_comment',
+                 'date_updated', 'lesson_name')
+
+    def __init__(self, data):
+        self.id = data.get('id')
+        self.homework_name = data.get('homework_name')
+        self.status = data['status']
+        self.reviewer_comment = data.get('reviewer_comment')
+        self.date_updated = data.get('date_updated')
+        self.lesson_name = data.get('lesson_name')
+
+    def get(self, key, default=None):
+        """Поле работы или default, как у словаря."""
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = getattr(self, key, None)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return getattr(self, key, None) is not None
+
+    def __eq__(self, other):
+        if not isinstance(other, Homework):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name)
+                   for name in self.__slots__)
+
+    def __repr__(self):
+        return f'Homework({self.homework_name!r}, {self.status!r})'
+
+
+def make_homework(data):
+    """Проверяет описание работы и превращает его в Homework."""
+    if not isinstance(data, dict):
+        raise TypeError(HOMEWORK_NOT_DICT.format(type=type(data)))
+    if 'status' not in data:
+        raise MissingKey(NO_STATUS.format(homework=data))
+    if not isinstance(data['status'], str):
+        raise TypeError(STATUS_NOT_STR.format(type=type(data['status'])))
+    return Homework(data)
+
+
+@timed('decode_answer')
+def decode_answer(body, request_params):
+    """Декодирует тело ответа и проверяет его за один проход.
+
+    Возвращает словарь, как get_api_answer, но работы в нём - Homework.
+    """
+    answer = loads(body)
+    if not isinstance(answer, dict):
+        raise TypeError(NOT_DICT_TYPE.format(type=type(answer)))
+    check_api_errors(answer, request_params)
+    if 'homeworks' not in answer:
+        raise MissingKey(NOT_IN_LIST.format(response=answer))
+    homeworks = answer['homeworks']
+    if not isinstance(homeworks, list):
+        raise TypeError(NOT_LIST_TYPE.format(type=type(homeworks)))
+    current_date = answer.get('current_date')
+    if current_date is not None and not isinstance(current_date, int):
+        raise TypeError(DATE_NOT_INT.format(type=type(current_date)))
+    answer['homeworks'] = [make_homework(data) for data in homeworks]
+    return answer
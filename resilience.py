@@ -0,0 +1,165 @@
+import logging
+import os
+import random
+import threading
+import time
+
+from exceptions import CircuitOpen, ServerError, TooManyRequests
+from lifecycle import Lifecycle
+from logs import lazy
+from metrics import CIRCUIT_OPENINGS, RETRIES
+
+RETRY_ATTEMPTS = int(os.getenv('RETRY_ATTEMPTS', 3))
+BACKOFF_BASE = float(os.getenv('BACKOFF_BASE', 1))
+BACKOFF_CAP = float(os.getenv('BACKOFF_CAP', 30))
+FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 20))
+RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', 60))
+MAX_RESET_TIMEOUT = float(os.getenv('BREAKER_MAX_RESET_TIMEOUT', 1200))
+TRANSIENT = (ConnectionError, ServerError, TooManyRequests)
+
+CIRCUIT_OPENED = 'API недоступно, запросы приостановлены на {timeout:.0f} с'
+CIRCUIT_CLOSED = 'API снова доступно, запросы возобновлены'
+CIRCUIT_IS_OPEN = 'API недоступно, следующая проверка через {left:.0f} с'
+RETRYING = 'Временная ошибка, попытка {attempt} через {delay:.1f} с: {error}'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def backoff(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Экспоненциальная задержка с полным случайным разбросом."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Размыкает цепь после череды сбоев API.
+
+    Пока цепь разомкнута, запросы сразу получают CircuitOpen. Когда
+    выйдет reset_timeout, к API пропускается один пробный запрос:
+    успех замыкает цепь, сбой размыкает её снова на вдвое больший срок.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD,
+                 reset_timeout=RESET_TIMEOUT,
+                 max_reset_timeout=MAX_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.base_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def retry_at(self):
+        """Момент (time.monotonic), когда цепь можно пробовать снова."""
+        return self.opened_at + self.reset_timeout
+
+    def probe_delay(self):
+        """Через сколько секунд снова ставить в очередь отбитый запрос.
+
+        Случайный разброс не даёт всем отложенным запросам прийти разом.
+        """
+        left = max(self.retry_at - time.monotonic(), 0)
+        return left + random.uniform(0, self.reset_timeout)
+
+    def before_call(self):
+        """Пропускает запрос или бросает CircuitOpen."""
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            left = self.retry_at - time.monotonic()
+            if self.state == OPEN and left <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return
+            raise CircuitOpen(CIRCUIT_IS_OPEN.format(left=max(left, 0)))
+
+    def record_success(self):
+        """Запрос дошёл до API и получил ответ."""
+        with self.lock:
+            if self.state != CLOSED:
+                logging.warning(CIRCUIT_CLOSED)
+            self.state = CLOSED
+            self.failures = 0
+            self.probing = False
+            self.reset_timeout = self.base_timeout
+
+    def record_failure(self):
+        """API не ответило или ответило ошибкой сервера."""
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self.reset_timeout = min(self.reset_timeout * 2,
+                                         self.max_reset_timeout)
+            elif self.failures < self.failure_threshold:
+                return
+            self.state = OPEN
+            self.probing = False
+            self.opened_at = time.monotonic()
+            CIRCUIT_OPENINGS.inc()
+            logging.warning(CIRCUIT_OPENED.format(timeout=self.reset_timeout))
+
+
+class RetryPolicy:
+    """Повторяет запрос к API при временных сбоях через общий выключатель.
+
+    Временными считаются обрывы соединения, ответы 5xx и 429. Остальные
+    ошибки (например, неверный токен студента) не повторяются.
+    """
+
+    def __init__(self, breaker=None, attempts=RETRY_ATTEMPTS, lifecycle=None):
+        self.breaker = breaker or CircuitBreaker()
+        self.attempts = attempts
+        self.lifecycle = lifecycle or Lifecycle()
+
+    def _failed(self, error, attempt):
+        if isinstance(error, TooManyRequests):
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        if attempt + 1 >= self.attempts:
+            return None
+        delay = backoff(attempt)
+        RETRIES.inc(type(error).__name__)
+        logging.info(lazy(RETRYING, attempt=attempt + 2, delay=delay,
+                          error=error))
+        return delay
+
+    def call(self, func, *args):
+        """Вызывает func(*args) с повторами."""
+        for attempt in range(self.attempts):
+            self.breaker.before_call()
+            try:
+                result = func(*args)
+            except TRANSIENT as error:
+                delay = self._failed(error, attempt)
+                if delay is None or self.lifecycle.wait(delay):
+                    raise
+                continue
+            except Exception:
+                self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def call_async(self, func, *args):
+        """Асинхронный вариант call для корутин."""
+        for attempt in range(self.attempts):
+            self.breaker.before_call()
+            try:
+                result = await func(*args)
+            except TRANSIENT as error:
+                delay = self._failed(error, attempt)
+                if delay is None or await self.lifecycle.wait_async(delay):
+                    raise
+                continue
+            except Exception:
+                self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            return result
@@ -0,0 +1,97 @@
+import hashlib
+import os
+import re
+from http import HTTPStatus
+
+from dedup import ExpiringLRU
+from homework import request_api
+from records import decode_answer
+
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 100000))
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 24 * 3600))
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*\d+')
+
+
+def body_digest(body):
+    """Отпечаток тела ответа без current_date - он меняется каждый раз."""
+    return hashlib.blake2b(CURRENT_DATE.sub(b'', body),
+                           digest_size=16).digest()
+
+
+class ResponseCache:
+    """Помнит последний ответ API на пару (студент, from_date).
+
+    Если сервер присылает ETag или Last-Modified, запрос делается
+    условным, и ответ 304 означает «ничего не изменилось». Иначе
+    сравнивается отпечаток тела. Неизменившийся ответ не разбирается.
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL):
+        self.entries = ExpiringLRU(maxsize, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def conditional_headers(self, key, timestamp, headers):
+        """Заголовки запроса с If-None-Match/If-Modified-Since."""
+        entry = self.entries.get((key, timestamp))
+        if entry is None:
+            return headers
+        etag, last_modified, _ = entry
+        headers = dict(headers)
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def is_unchanged(self, key, timestamp, status, response_headers, body):
+        """Запоминает ответ и сообщает, совпал ли он с прошлым."""
+        cache_key = (key, timestamp)
+        entry = self.entries.get(cache_key)
+        if status == HTTPStatus.NOT_MODIFIED:
+            self.hits += 1
+            return True
+        digest = body_digest(body)
+        self.entries.put(cache_key, (response_headers.get('ETag'),
+                                     response_headers.get('Last-Modified'),
+                                     digest))
+        if entry is not None and entry[2] == digest:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def forget(self, key, timestamp):
+        """Забывает ответ, который не удалось обработать.
+
+        Иначе следующий такой же ответ сочтётся неизменившимся, и новые
+        статусы из него так и не дойдут до студента.
+        """
+        self.entries.pop((key, timestamp))
+
+    def fetch(self, key, timestamp, headers):
+        """Как fetch_api_answer, но None, если ответ не изменился."""
+        raw = self.fetch_raw(key, timestamp, headers)
+        return None if raw is None else decode_answer(*raw)
+
+    def fetch_raw(self, key, timestamp, headers):
+        """Тело ответа и параметры запроса или None, если ничего нового."""
+        response, request_params = request_api(
+            timestamp, self.conditional_headers(key, timestamp, headers))
+        if self.is_unchanged(key, timestamp, response.status_code,
+                             response.headers, response.content):
+            return None
+        return response.content, request_params
+
+    async def fetch_async(self, session, key, timestamp, headers):
+        """Асинхронный вариант fetch."""
+        from aio import request_api_async
+
+        status, response_headers, body, request_params = (
+            await request_api_async(
+                session, timestamp,
+                self.conditional_headers(key, timestamp, headers)))
+        if self.is_unchanged(key, timestamp, status, response_headers,
+                             body):
+            return None
+        return decode_answer(body, request_params)
@@ -0,0 +1,97 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+from config import current
+
+RECENT_CHANGE = 3600
+RECENT_CHANGE_FACTOR = 0.5
+NIGHT_HOURS = range(0, 8)
+NIGHT_FACTOR = 3
+UTC_OFFSET = int(os.getenv('REVIEW_UTC_OFFSET', 3))
+JITTER = 0.1
+
+
+def is_night(now):
+    """Ночь ли сейчас у ревьюеров (по умолчанию - московское время)."""
+    return (time.gmtime(now).tm_hour + UTC_OFFSET) % 24 in NIGHT_HOURS
+
+
+def jittered(interval, jitter=JITTER):
+    """Интервал со случайным разбросом, чтобы опросы не шли стеной."""
+    return interval * random.uniform(1 - jitter, 1 + jitter)
+
+
+def next_interval(tenant, now):
+    """Через сколько секунд снова опрашивать студента.
+
+    Работа на ревью опрашивается чаще принятой, недавно менявшийся
+    статус - ещё чаще, а ночью, когда ревьюеры спят, - реже.
+    Интервалы берутся из действующих настроек.
+    """
+    settings = current()
+    interval = settings.interval(tenant.status)
+    if tenant.changed_at and now - tenant.changed_at < RECENT_CHANGE:
+        interval *= RECENT_CHANGE_FACTOR
+    if is_night(now):
+        interval *= NIGHT_FACTOR
+    return jittered(min(max(interval, settings.min_interval),
+                        settings.max_interval))
+
+
+class PollScheduler:
+    """Очередь опросов с приоритетом по времени на куче.
+
+    Перенос опроса не ищет старую запись в куче: запись устаревает,
+    если next_poll студента с тех пор изменился, и пропускается.
+    Если новый опрос назначен раньше ближайшего, вызываются функции
+    из wakeups - так опрос, уснувший до прежнего срока, просыпается.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.wakeups = set()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def schedule(self, tenant, when):
+        """Назначает опрос студента на момент when."""
+        with self.lock:
+            self._drop_stale()
+            earlier = not self.heap or when < self.heap[0][0]
+            tenant.next_poll = when
+            heapq.heappush(self.heap, (when, next(self.counter), tenant))
+        if earlier:
+            for wakeup in list(self.wakeups):
+                wakeup()
+
+    def _drop_stale(self):
+        while self.heap:
+            when, _, tenant = self.heap[0]
+            if tenant.next_poll == when:
+                return
+            heapq.heappop(self.heap)
+
+    def pop_due(self, now):
+        """Забирает из очереди всех, кого пора опрашивать."""
+        due = {}
+        with self.lock:
+            self._drop_stale()
+            while self.heap and self.heap[0][0] <= now:
+                when, _, tenant = heapq.heappop(self.heap)
+                if tenant.next_poll == when:
+                    due[id(tenant)] = tenant
+                self._drop_stale()
+        return list(due.values())
+
+    def next_due(self):
+        """Момент ближайшего опроса или None, если очередь пуста."""
+        with self.lock:
+            self._drop_stale()
+            return self.heap[0][0] if self.heap else None
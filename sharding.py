@@ -0,0 +1,277 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from subscriptions import apply_subscription
+from tenants import intern_status, tenant_key
+
+SHARD_WORKER_ID = (os.getenv('SHARD_WORKER_ID') or os.getenv('DYNO')
+                   or f'{socket.gethostname()}-{os.getpid()}')
+SHARD_HEARTBEAT = float(os.getenv('SHARD_HEARTBEAT', 10))
+SHARD_TTL = float(os.getenv('SHARD_TTL', 3 * SHARD_HEARTBEAT))
+VNODES = 64
+
+SHARD_JOINED = 'Исполнитель {worker} подключился к {path}'
+SHARD_REBALANCED = ('Состав исполнителей изменился: {members}; '
+                    'к нам перешло студентов: {gained}')
+HEARTBEAT_FAILED = 'Не удалось отметиться в {path}: {error}'
+ROLE_TAKEN = 'Исполнитель {worker} берёт на себя {role}'
+
+
+def ring_hash(value):
+    """Точка на кольце для строки value."""
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Согласованное хеширование: ключ -> исполнитель.
+
+    Каждый исполнитель занимает vnodes точек кольца, поэтому при его
+    появлении или уходе переезжает лишь около 1/N студентов.
+    """
+
+    def __init__(self, members=(), vnodes=VNODES):
+        self.members = tuple(sorted(members))
+        points = sorted((ring_hash(f'{member}#{number}'), member)
+                        for member in self.members
+                        for number in range(vnodes))
+        self.hashes = [point for point, _ in points]
+        self.owners = [member for _, member in points]
+
+    def owner(self, key):
+        """Исполнитель, которому принадлежит ключ; None, если кольцо пусто."""
+        if not self.owners:
+            return None
+        index = bisect.bisect(self.hashes, ring_hash(key))
+        return self.owners[index % len(self.owners)]
+
+
+class Coordinator:
+    """Список живых исполнителей в общей базе SQLite.
+
+    Каждый исполнитель раз в heartbeat секунд обновляет свою отметку;
+    кто не отмечался дольше ttl, считается ушедшим.
+    """
+
+    def __init__(self, path, worker_id=SHARD_WORKER_ID,
+                 heartbeat=SHARD_HEARTBEAT, ttl=SHARD_TTL):
+        self.path = path
+        self.worker_id = worker_id
+        self.heartbeat_interval = heartbeat
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.connection = sqlite3.connect(path, timeout=ttl,
+                                          check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS workers '
+            '(id TEXT PRIMARY KEY, heartbeat REAL NOT NULL)')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS roles '
+            '(role TEXT PRIMARY KEY, worker TEXT NOT NULL)')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS statuses '
+            '(key TEXT PRIMARY KEY, homeworks TEXT NOT NULL,'
+            ' version INTEGER NOT NULL)')
+        self.connection.commit()
+        self.thread = threading.Thread(target=self._beat, daemon=True)
+
+    def heartbeat(self):
+        """Отмечает, что этот исполнитель жив."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO workers VALUES (?, ?)',
+                (self.worker_id, time.time()))
+
+    def members(self):
+        """Живые исполнители, включая этот."""
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT id FROM workers WHERE heartbeat >= ?',
+                (time.time() - self.ttl,)).fetchall()
+        return {worker for worker, in rows} | {self.worker_id}
+
+    def publish(self, key, homeworks):
+        """Сохраняет последние статусы работ студента для остальных."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO statuses '
+                'SELECT ?, ?, COALESCE(MAX(version), 0) + 1 FROM statuses',
+                (key, json.dumps(homeworks, ensure_ascii=False)))
+
+    def statuses(self, since=0):
+        """Тройки (ключ, статусы, версия) с версией больше since."""
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT key, homeworks, version FROM statuses '
+                'WHERE version > ? ORDER BY version', (since,)).fetchall()
+        return [(key, tuple((homework, name, intern_status(status))
+                            for homework, name, status in json.loads(text)),
+                 version)
+                for key, text, version in rows]
+
+    def lead(self, role):
+        """Занимает роль, если её не держит никто из живых.
+
+        True - роль у этого исполнителя. Проверка и захват идут в одной
+        транзакции, поэтому роль достаётся только одному.
+        """
+        alive = self.members()
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.connection.execute(
+                    'SELECT worker FROM roles WHERE role = ?',
+                    (role,)).fetchone()
+                if row is None or row[0] not in alive:
+                    self.connection.execute(
+                        'INSERT OR REPLACE INTO roles VALUES (?, ?)',
+                        (role, self.worker_id))
+                    row = (self.worker_id,)
+                self.connection.commit()
+            except sqlite3.Error:
+                self.connection.rollback()
+                raise
+        return row[0] == self.worker_id
+
+    def _beat(self):
+        while not self.stopped.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except sqlite3.Error as error:
+                logging.error(HEARTBEAT_FAILED.format(path=self.path,
+                                                      error=error))
+
+    def start(self):
+        """Отмечается и продолжает отмечаться в фоновом потоке."""
+        self.heartbeat()
+        self.thread.start()
+        logging.info(SHARD_JOINED.format(worker=self.worker_id,
+                                         path=self.path))
+        return self
+
+    def leave(self):
+        """Уходит из списка, чтобы студенты сразу перешли к остальным."""
+        self.stopped.set()
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM workers WHERE id = ?',
+                                    (self.worker_id,))
+            self.connection.execute('DELETE FROM roles WHERE worker = ?',
+                                    (self.worker_id,))
+
+
+class Shard:
+    """Часть студентов реестра, которую опрашивает этот исполнитель.
+
+    Реестр у всех исполнителей общий, а опрашивает каждый только своих.
+    Чужие студенты убираются из очереди опросов и возвращаются в неё,
+    только если перестройка кольца отдаст их этому исполнителю.
+    Подписки из чата приходят через общее хранилище subscriptions,
+    а роли вроде приёма команд достаются одному исполнителю. Статусы
+    работ публикует тот, кто опрашивает студента, поэтому /status
+    отвечает верно на любом исполнителе.
+    """
+
+    def __init__(self, coordinator, checkpoints=None, subscriptions=None,
+                 vnodes=VNODES):
+        self.coordinator = coordinator
+        self.checkpoints = checkpoints
+        self.subscriptions = subscriptions
+        self.synced = 0
+        self.statuses_synced = 0
+        self.roles = {}
+        self.vnodes = vnodes
+        self.ring = HashRing((coordinator.worker_id,), vnodes)
+
+    @property
+    def worker_id(self):
+        """Идентификатор этого исполнителя."""
+        return self.coordinator.worker_id
+
+    def owns(self, tenant):
+        """Опрашивает ли студента этот исполнитель."""
+        return self.ring.owner(tenant.key) in (None, self.worker_id)
+
+    def when_leading(self, role, callback):
+        """Вызовет callback, когда этот исполнитель получит роль role."""
+        self.roles[role] = callback
+
+    def take_roles(self):
+        """Занимает освободившиеся роли и запускает их обработчики."""
+        for role, callback in list(self.roles.items()):
+            if self.coordinator.lead(role):
+                logging.info(ROLE_TAKEN.format(worker=self.worker_id,
+                                               role=role))
+                del self.roles[role]
+                callback()
+
+    def sync_subscriptions(self, registry, now):
+        """Переносит в реестр подписки, оформленные у других исполнителей."""
+        if self.subscriptions is None:
+            return
+        for subscription in self.subscriptions.load(self.synced):
+            known = tenant_key(subscription.token) in registry
+            tenant = apply_subscription(registry, subscription, int(now))
+            if not known and self.checkpoints is not None:
+                tenant.timestamp = self.checkpoints.get(tenant.key,
+                                                        tenant.timestamp)
+            self.synced = subscription.version
+
+    def publish(self, tenant):
+        """Делится последними статусами работ своего студента."""
+        self.coordinator.publish(tenant.key, tenant.homeworks)
+
+    def sync_statuses(self, registry):
+        """Берёт статусы работ чужих студентов у их исполнителей."""
+        for key, homeworks, version in self.coordinator.statuses(
+                self.statuses_synced):
+            tenant = registry.get(key)
+            if tenant is not None and not self.owns(tenant):
+                tenant.homeworks = homeworks
+            self.statuses_synced = version
+
+    def refresh(self, registry, now):
+        """Перестраивает кольцо, если состав исполнителей изменился."""
+        self.take_roles()
+        self.sync_subscriptions(registry, now)
+        self.sync_statuses(registry)
+        members = tuple(sorted(self.coordinator.members()))
+        if members == self.ring.members:
+            return
+        old, self.ring = self.ring, HashRing(members, self.vnodes)
+        if self.checkpoints is not None:
+            self.checkpoints.reload()
+        gained = 0
+        for tenant in registry:
+            if (old.owner(tenant.key) == self.worker_id
+                    or not self.owns(tenant)):
+                continue
+            gained += 1
+            if self.checkpoints is not None:
+                tenant.timestamp = max(tenant.timestamp, self.checkpoints.get(
+                    tenant.key, tenant.timestamp))
+            registry.reschedule(tenant, now)
+        logging.info(SHARD_REBALANCED.format(members=', '.join(members),
+                                             gained=gained))
+
+    def claim(self, registry, due, now):
+        """Оставляет из due только своих студентов.
+
+        Чужие больше не ставятся в очередь: до перестройки кольца они
+        не занимают место в куче этого исполнителя.
+        """
+        self.refresh(registry, now)
+        owned = []
+        for tenant in due:
+            if self.owns(tenant):
+                owned.append(tenant)
+            else:
+                tenant.next_poll = None
+        return owned
@@ -0,0 +1,59 @@
+import logging
+import os
+
+STARTUP_BUDGET = float(os.getenv('STARTUP_BUDGET', 2))
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+ENV_FILE_KEYS = set()
+
+STARTUP_TIME = 'Бот готов к работе через {seconds:.2f} с после запуска'
+STARTUP_SLOW = ('Запуск занял {seconds:.2f} с - больше бюджета '
+                '{budget:.2f} с')
+
+
+def read_env(path=ENV_FILE):
+    """Значения из .env без записи в окружение; без файла - пусто."""
+    if not os.path.exists(path):
+        return {}
+    from dotenv import dotenv_values
+
+    return {name: value for name, value in dotenv_values(path).items()
+            if value is not None}
+
+
+def load_env(path=ENV_FILE):
+    """Читает .env, только если он есть: python-dotenv грузится не зря.
+
+    На Heroku переменные задаются в настройках приложения и файла нет.
+    Заданное в окружении главнее файла; имена, взятые из файла,
+    запоминаются в ENV_FILE_KEYS.
+    """
+    if not os.path.exists(path):
+        return False
+    for name, value in read_env(path).items():
+        if name not in os.environ:
+            os.environ[name] = value
+            ENV_FILE_KEYS.add(name)
+    return True
+
+
+def process_uptime():
+    """Секунды с запуска процесса по /proc или None вне Linux."""
+    try:
+        with open('/proc/self/stat') as file:
+            started = int(file.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as file:
+            uptime = float(file.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    return uptime - started / os.sysconf('SC_CLK_TCK')
+
+
+def report_startup(budget=STARTUP_BUDGET):
+    """Пишет в журнал время запуска и предупреждает о превышении бюджета."""
+    seconds = process_uptime()
+    if seconds is None:
+        return None
+    logging.info(STARTUP_TIME.format(seconds=seconds))
+    if seconds > budget:
+        logging.warning(STARTUP_SLOW.format(seconds=seconds, budget=budget))
+    return seconds
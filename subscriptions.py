@@ -0,0 +1,92 @@
+import logging
+import sqlite3
+import threading
+from collections import namedtuple
+
+SUBSCRIPTIONS_RESTORED = 'Восстановлено подписок из {path}: {count}'
+
+Subscription = namedtuple('Subscription',
+                          'token chat_id paused locale markup version')
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS subscriptions ('
+    ' key TEXT PRIMARY KEY,'
+    ' token TEXT NOT NULL,'
+    ' chat_id TEXT NOT NULL,'
+    ' paused INTEGER NOT NULL DEFAULT 0,'
+    ' locale TEXT,'
+    ' markup TEXT,'
+    ' version INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS subscriptions_by_version '
+    'ON subscriptions (version)',
+)
+
+
+class SubscriptionStore:
+    """Подписки из чата (/subscribe, /pause, /language, /format) в SQLite.
+
+    Контрольные точки хранят только timestamp, а подписка - это токен,
+    чат и настройки студента; без них после перезапуска подписавшиеся
+    через бота перестали бы получать статусы.
+
+    Каждая запись получает следующий номер версии, поэтому исполнители
+    с общей базой забирают чужие изменения по номеру, не завися от
+    расхождения часов.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+        self.lock = threading.Lock()
+
+    def save(self, tenant):
+        """Запоминает подписку студента в её нынешнем виде."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO subscriptions '
+                'SELECT ?, ?, ?, ?, ?, ?, COALESCE(MAX(version), 0) + 1 '
+                'FROM subscriptions',
+                (tenant.key, tenant.token, str(tenant.chat_id),
+                 int(tenant.paused), tenant.locale, tenant.markup))
+
+    def load(self, since=0):
+        """Подписки с версией больше since, по порядку изменений."""
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT token, chat_id, paused, locale, markup, version '
+                'FROM subscriptions WHERE version > ? ORDER BY version',
+                (since,)).fetchall()
+        return [Subscription(token, chat_id, bool(paused), locale, markup,
+                             version)
+                for token, chat_id, paused, locale, markup, version in rows]
+
+    def close(self):
+        """Закрывает базу."""
+        self.connection.close()
+
+
+def apply_subscription(registry, subscription, timestamp=0):
+    """Переносит подписку в реестр и возвращает студента."""
+    tenant = registry.add(subscription.token, subscription.chat_id,
+                          timestamp)
+    tenant.locale = subscription.locale
+    tenant.markup = subscription.markup
+    if subscription.paused:
+        registry.pause(tenant)
+    elif tenant.paused:
+        registry.resume(tenant)
+    return tenant
+
+
+def restore_subscriptions(registry, subscriptions, timestamp=0):
+    """Возвращает в реестр всех, кто подписывался через бота."""
+    records = subscriptions.load()
+    for subscription in records:
+        apply_subscription(registry, subscription, timestamp)
+    logging.info(SUBSCRIPTIONS_RESTORED.format(path=subscriptions.path,
+                                               count=len(records)))
+    return records
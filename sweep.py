@@ -0,0 +1,96 @@
+import queue
+from collections import deque
+
+from engine import PollingEngine, render_one, split_rendered
+from homework import check_response
+
+SKIPPED = object()
+
+
+class SweepPollingEngine(PollingEngine):
+    """Опрос волнами: все студенты тика - одной волной по общему пулу.
+
+    Каждый поток пула получает свою долю студентов целиком, а не по
+    задаче на студента, и складывает ответы в одну очередь. Ответы
+    обрабатываются потоком по мере прихода цепочкой генераторов
+    check_response -> дедупликация -> тексты -> отправка, без
+    промежуточных списков на всю волну.
+    """
+
+    def fetch_one(self, tenant):
+        """Ответ API для студента или исключение вместо него."""
+        if self.lifecycle.stopping.is_set():
+            return SKIPPED
+        try:
+            return self.retry.call(self.fetch, tenant)
+        except Exception as error:
+            return error
+
+    def fetch_share(self, share, results):
+        """В потоке пула: опрашивает свою долю студентов волны."""
+        for tenant in share:
+            results.put((tenant, self.fetch_one(tenant)))
+
+    def wave(self, due):
+        """Генератор (студент, ответ) в порядке готовности ответов."""
+        results = queue.SimpleQueue()
+        workers = min(self.max_workers, len(due))
+        for number in range(workers):
+            self.executor.submit(self.fetch_share, due[number::workers],
+                                 results)
+        for _ in due:
+            tenant, response = results.get()
+            if response is not SKIPPED:
+                yield tenant, response
+
+    def stage(self, items, step):
+        """Применяет step к потоку (студент, значение); сбои - в fail."""
+        for tenant, value in items:
+            try:
+                if isinstance(value, Exception):
+                    raise value
+                result = step(tenant, value)
+            except Exception as error:
+                self.fail(tenant, error)
+                continue
+            yield tenant, result
+
+    @staticmethod
+    def checked(tenant, response):
+        """Ответ и список работ из него; None - ответ не изменился."""
+        if response is None:
+            return response, []
+        return response, check_response(response)
+
+    def fresh(self, tenant, checked):
+        """Оставляет только новые для студента статусы."""
+        response, homeworks = checked
+        return response, self.dedup.fresh_homeworks(tenant, homeworks)
+
+    @staticmethod
+    def rendered(tenant, fresh):
+        """Тексты сообщений о новых статусах на языке студента."""
+        response, news = fresh
+        return (response, *split_rendered(news, [
+            render_one(work, tenant.locale, tenant.markup)
+            for work in news]))
+
+    def sent(self, tenant, rendered):
+        """Отправляет сообщения и назначает студенту следующий опрос.
+
+        О работах, которые не удалось описать, студенту сообщается
+        отдельно, остальные статусы доставляются как обычно.
+        """
+        response, messages, news, errors = rendered
+        self.deliver(tenant, response, messages, news)
+        for error in errors:
+            self.notify_error(tenant, error)
+
+    def poll_many(self, due):
+        """Опрашивает студентов тика одной волной."""
+        if not due:
+            return
+        items = self.wave(due)
+        for step in (self.checked, self.fresh, self.rendered, self.sent):
+            items = self.stage(items, step)
+        deque(items, maxlen=0)
@@ -0,0 +1,129 @@
+import html
+import re
+from string import Formatter
+
+from homework import (RUNTIME_ERROR, STATUS_SUMMARY, STATUS_UNEXPECTED,
+                      VERDICTS)
+
+PLAIN = 'plain'
+MARKDOWN = 'markdown'
+HTML = 'html'
+MARKUPS = (PLAIN, MARKDOWN, HTML)
+PARSE_MODES = {PLAIN: None, MARKDOWN: 'MarkdownV2', HTML: 'HTML'}
+DEFAULT_LOCALE = 'ru'
+DEFAULT_MARKUP = PLAIN
+MARKDOWN_SPECIAL = re.compile(r'([_*\[\]()~`>#+\-=|{}.!\\])')
+
+LOCALES = {
+    'ru': {
+        'status': STATUS_SUMMARY,
+        'error': RUNTIME_ERROR,
+        'verdicts': VERDICTS,
+    },
+    'en': {
+        'status': 'Review status of "{name}" has changed. \n\n{verdict}',
+        'error': 'The bot has failed: {error}',
+        'verdicts': {
+            'approved': 'The reviewer approved your work. Hooray!',
+            'reviewing': 'A reviewer has started checking your work.',
+            'rejected': 'The reviewer has left some remarks.',
+        },
+    },
+}
+
+
+def escape_markdown(text):
+    """Экранирует текст для MarkdownV2 телеграма."""
+    return MARKDOWN_SPECIAL.sub(r'\\\1', text)
+
+
+def escape_html(text):
+    """Экранирует текст для HTML телеграма."""
+    return html.escape(text, quote=False)
+
+
+ESCAPES = {PLAIN: str, MARKDOWN: escape_markdown, HTML: escape_html}
+EMPHASIS = {PLAIN: '{}', MARKDOWN: '*{}*', HTML: '<b>{}</b>'}
+
+
+class Template:
+    """Шаблон, разобранный один раз на куски текста и подстановки.
+
+    Постоянные подстановки (constants) и весь текст шаблона экранируются
+    при компиляции; render лишь склеивает куски с экранированными
+    значениями, не разбирая шаблон заново.
+    """
+
+    __slots__ = ('parts', 'escape', 'emphasis')
+
+    def __init__(self, source, markup=PLAIN, constants=None,
+                 emphasis=()):
+        self.escape = ESCAPES[markup]
+        self.emphasis = {field: EMPHASIS[markup] for field in emphasis}
+        constants = constants or {}
+        parts = []
+        literal = ''
+        for text, field, _, _ in Formatter().parse(source):
+            literal += self.escape(text)
+            if field is None:
+                continue
+            if field in constants:
+                literal += self.escape(str(constants[field]))
+                continue
+            parts.append((literal, field))
+            literal = ''
+        parts.append((literal, None))
+        self.parts = tuple(parts)
+
+    def render(self, **values):
+        """Текст по шаблону с подставленными values."""
+        pieces = []
+        for literal, field in self.parts:
+            pieces.append(literal)
+            if field is not None:
+                value = self.escape(str(values[field]))
+                pieces.append(self.emphasis.get(field, '{}').format(value))
+        return ''.join(pieces)
+
+
+def compile_templates(locales=LOCALES):
+    """Шаблоны статусов и ошибок для всех языков и разметок."""
+    statuses = {}
+    errors = {}
+    for locale, texts in locales.items():
+        for markup in MARKUPS:
+            for status, verdict in texts['verdicts'].items():
+                statuses[locale, markup, status] = Template(
+                    texts['status'], markup, {'verdict': verdict},
+                    emphasis=('name',))
+            errors[locale, markup] = Template(texts['error'], markup)
+    return statuses, errors
+
+
+STATUS_TEMPLATES, ERROR_TEMPLATES = compile_templates()
+
+
+def choose(locale, markup):
+    """Известные язык и разметка; вместо неизвестных - по умолчанию."""
+    return (locale if locale in LOCALES else DEFAULT_LOCALE,
+            markup if markup in MARKUPS else DEFAULT_MARKUP)
+
+
+def render_status(homework, locale=None, markup=None):
+    """Как parse_status, но на языке и в разметке студента."""
+    name = homework['homework_name']
+    status = homework['status']
+    if status not in VERDICTS:
+        raise ValueError(STATUS_UNEXPECTED.format(status=status))
+    return STATUS_TEMPLATES[(*choose(locale, markup), status)].render(
+        name=name)
+
+
+def render_error(error, locale=None, markup=None):
+    """Текст о сбое опроса на языке и в разметке студента."""
+    return ERROR_TEMPLATES[choose(locale, markup)].render(error=error)
+
+
+def parse_mode(markup):
+    """parse_mode для Bot API по разметке студента."""
+    return PARSE_MODES.get(markup)
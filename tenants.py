@@ -0,0 +1,261 @@
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+
+from homework import VERDICTS
+from scheduler import PollScheduler
+
+TENANTS_LOADED = 'Загружено студентов из файла {path}: {count}'
+TENANT_INVALID = 'Пропущена некорректная запись о студенте №{number}'
+TENANTS_SYNCED = ('Реестр студентов обновлён: добавлено {added}, '
+                  'удалено {removed}')
+STATUSES = {status: status for status in VERDICTS}
+TENANT_OPTIONS = ('locale', 'markup')
+
+
+def tenant_key(token):
+    """Ключ студента по токену: сам токен в журналы и базы не попадает."""
+    return hashlib.sha1(token.encode()).hexdigest()[:16]
+
+
+def read_tenants(path):
+    """Записи о студентах из JSON-файла."""
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def intern_status(status):
+    """Один общий объект строки на каждый статус у всех студентов."""
+    if status is None:
+        return None
+    return STATUSES.get(status) or sys.intern(status)
+
+
+class Tenant:
+    """Студент: токен Практикума, чат в телеграме и момент опроса.
+
+    Работы хранятся кортежем троек (ключ, название, статус), а статусы -
+    общими строками из VERDICTS: на студента уходит минимум памяти.
+    """
+
+    __slots__ = ('key', 'token', 'chat_id', 'timestamp', 'next_poll',
+                 'status', 'changed_at', 'paused', 'homeworks', 'locale',
+                 'markup')
+
+    def __init__(self, token, chat_id, timestamp=0):
+        self.key = tenant_key(token)
+        self.token = token
+        self.chat_id = chat_id
+        self.timestamp = timestamp
+        self.next_poll = 0
+        self.status = None
+        self.changed_at = 0
+        self.paused = False
+        self.homeworks = ()
+        self.locale = None
+        self.markup = None
+
+    @property
+    def headers(self):
+        """Заголовки авторизации для запроса к API Практикума."""
+        return {'Authorization': f'OAuth {self.token}'}
+
+    def remember(self, key, name, status):
+        """Запоминает последний статус работы студента."""
+        entry = (key, name, intern_status(status))
+        keys = [homework[0] for homework in self.homeworks]
+        if key not in keys:
+            self.homeworks += (entry,)
+            return
+        index = keys.index(key)
+        self.homeworks = (self.homeworks[:index] + (entry,)
+                          + self.homeworks[index + 1:])
+
+    def known_homeworks(self):
+        """Пары (название, статус) известных работ студента."""
+        return [(name, status) for _, name, status in self.homeworks]
+
+    def __repr__(self):
+        return f'Tenant(key={self.key!r}, chat_id={self.chat_id!r})'
+
+
+class TenantRegistry:
+    """Реестр студентов, за работами которых следит бот.
+
+    Реестр меняют сразу несколько потоков: команды из чата, слежение
+    за файлом студентов и опрос, поэтому изменения идут под lock.
+    """
+
+    def __init__(self):
+        self.tenants = {}
+        self.chats = {}
+        self.file_keys = set()
+        self.scheduler = PollScheduler()
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.tenants)
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.tenants.values()))
+
+    def __contains__(self, key):
+        return key in self.tenants
+
+    def get(self, key):
+        """Возвращает студента по ключу или None."""
+        return self.tenants.get(key)
+
+    def add(self, token, chat_id, timestamp=0):
+        """Добавляет студента; повторное добавление обновляет чат."""
+        tenant = Tenant(token, chat_id, timestamp)
+        with self.lock:
+            known = self.tenants.get(tenant.key)
+            if known is not None:
+                self._unindex(known)
+                known.chat_id = chat_id
+                self._index(known)
+                return known
+            self.tenants[tenant.key] = tenant
+            self._index(tenant)
+            self.scheduler.schedule(tenant, tenant.next_poll)
+        return tenant
+
+    def _index(self, tenant):
+        chat = str(tenant.chat_id)
+        self.chats[chat] = self.chats.get(chat, ()) + (tenant.key,)
+
+    def _unindex(self, tenant):
+        chat = str(tenant.chat_id)
+        keys = tuple(key for key in self.chats.get(chat, ())
+                     if key != tenant.key)
+        if keys:
+            self.chats[chat] = keys
+        else:
+            self.chats.pop(chat, None)
+
+    def remove(self, key):
+        """Удаляет студента из реестра и из очереди опросов."""
+        with self.lock:
+            tenant = self.tenants.pop(key, None)
+            if tenant is not None:
+                self._unindex(tenant)
+                tenant.next_poll = None
+        return tenant
+
+    def by_chat(self, chat_id):
+        """Студенты, за которыми следят из этого чата."""
+        with self.lock:
+            return [self.tenants[key]
+                    for key in self.chats.get(str(chat_id), ())
+                    if key in self.tenants]
+
+    def reschedule(self, tenant, when):
+        """Назначает следующий опрос студента, если он ещё в реестре."""
+        if tenant.key in self.tenants and not tenant.paused:
+            self.scheduler.schedule(tenant, when)
+
+    def pause(self, tenant):
+        """Приостанавливает опросы студента."""
+        tenant.paused = True
+        tenant.next_poll = None
+
+    def resume(self, tenant, when=0):
+        """Возобновляет опросы студента с момента when."""
+        tenant.paused = False
+        self.reschedule(tenant, when)
+
+    def load(self, path, timestamp=0):
+        """Загружает студентов из JSON-файла вида [{token, chat_id}].
+
+        Необязательные поля locale и markup задают язык и разметку;
+        если их в записи нет, остаётся выбор студента из /language
+        и /format. Возвращает ключи загруженных студентов.
+        """
+        records = read_tenants(path)
+        with self.lock:
+            keys = self._apply_records(records, timestamp)
+            self.file_keys |= keys
+        logging.info(TENANTS_LOADED.format(path=path, count=len(records)))
+        return keys
+
+    def _apply_records(self, records, timestamp):
+        keys = set()
+        for number, record in enumerate(records):
+            try:
+                tenant = self.add(record['token'], record['chat_id'],
+                                  record.get('timestamp', timestamp))
+                for option in TENANT_OPTIONS:
+                    if option in record:
+                        setattr(tenant, option, record[option])
+            except (KeyError, TypeError, AttributeError):
+                logging.warning(TENANT_INVALID.format(number=number))
+                continue
+            keys.add(tenant.key)
+        return keys
+
+    def sync(self, path, timestamp=0):
+        """Приводит реестр к файлу студентов path.
+
+        Новые студенты добавляются, а пропавшие из файла удаляются;
+        подписавшихся через /subscribe это не касается. Без path из
+        реестра уходят все, кто был загружен из файла раньше.
+        Возвращает списки добавленных и удалённых студентов.
+        Файл читается заранее, а реестр меняется целиком под lock:
+        другие потоки видят его либо до, либо после синхронизации.
+        """
+        records = read_tenants(path) if path else []
+        with self.lock:
+            before = set(self.tenants)
+            loaded = self._apply_records(records, timestamp)
+            gone = self.file_keys - loaded
+            self.file_keys = loaded
+            added = [self.tenants[key] for key in loaded - before]
+            removed = [tenant for tenant in map(self.remove, gone)
+                       if tenant is not None]
+        if path:
+            logging.info(TENANTS_LOADED.format(path=path,
+                                               count=len(records)))
+        return added, removed
+
+    def restore(self, checkpoints):
+        """Подставляет студентам timestamp из хранилища контрольных точек."""
+        for tenant in self:
+            tenant.timestamp = checkpoints.get(tenant.key, tenant.timestamp)
+
+    def due(self, now):
+        """Забирает из очереди студентов, которых пора опросить.
+
+        Опрошенного студента нужно снова поставить в очередь reschedule.
+        """
+        return self.scheduler.pop_due(now)
+
+    def next_due(self):
+        """Ближайший момент, когда кого-то из студентов пора опросить."""
+        return self.scheduler.next_due()
+
+
+def sync_tenants(registry, checkpoints=None):
+    """Слушатель настроек, который переносит их в реестр студентов.
+
+    Новые студенты из файла сразу встают в очередь опросов и получают
+    свои контрольные точки, пропавшие из файла перестают опрашиваться.
+    """
+    def apply(old, new):
+        now = int(time.time())
+        if old.practicum_token and old.practicum_token != new.practicum_token:
+            registry.remove(tenant_key(old.practicum_token))
+        if new.practicum_token:
+            registry.add(new.practicum_token, new.chat_id, now)
+        added, removed = registry.sync(new.tenants_file, now)
+        if checkpoints is not None:
+            for tenant in added:
+                tenant.timestamp = checkpoints.get(tenant.key,
+                                                   tenant.timestamp)
+        logging.info(TENANTS_SYNCED.format(added=len(added),
+                                           removed=len(removed)))
+    return apply
@@ -1,9 +1,28 @@
 import sys
 from os.path import abspath, dirname
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
 pytest_plugins = [
     'tests.fixtures.fixture_data'
 ]
+
+
+@pytest.fixture(autouse=True)
+def unlimited_rate(monkeypatch):
+    """Лимиты скорости проверяются отдельно и не замедляют остальные тесты."""
+    import ratelimit
+
+    for name in ('PRACTICUM_LIMITER', 'TELEGRAM_LIMITER'):
+        for module in ('homework', 'aio'):
+            monkeypatch.setattr(f'{module}.{name}', ratelimit.RateLimiter())
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """Повторы запросов в тестах выполняются без пауз."""
+    for module in ('resilience', 'outbox'):
+        monkeypatch.setattr(f'{module}.backoff', lambda attempt: 0)
@@ -0,0 +1,88 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+import aio
+from exceptions import WrongResponseCode
+from tenants import TenantRegistry
+
+
+class MockAsyncBot:
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+
+async def serve(handler, coroutine):
+    app = web.Application()
+    app.router.add_get('/api/user_api/homework_statuses/', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        return await coroutine(
+            f'http://127.0.0.1:{port}/api/user_api/homework_statuses/')
+    finally:
+        await runner.cleanup()
+
+
+class TestAsyncMode:
+
+    def test_fetch_api_answer_async(self, monkeypatch, random_timestamp):
+        async def handler(request):
+            assert request.headers['Authorization'] == 'OAuth token'
+            return web.json_response({
+                'homeworks': [],
+                'current_date': random_timestamp,
+            })
+
+        async def scenario(url):
+            monkeypatch.setattr('homework.ENDPOINT', url)
+            async with aiohttp.ClientSession() as session:
+                return await aio.fetch_api_answer_async(
+                    session, 0, {'Authorization': 'OAuth token'})
+
+        result = asyncio.run(serve(handler, scenario))
+        assert result['current_date'] == random_timestamp
+
+    def test_fetch_api_answer_async_bad_code(self, monkeypatch):
+        async def handler(request):
+            return web.json_response({}, status=500)
+
+        async def scenario(url):
+            monkeypatch.setattr('homework.ENDPOINT', url)
+            async with aiohttp.ClientSession() as session:
+                await aio.fetch_api_answer_async(session, 0, {})
+
+        with pytest.raises(WrongResponseCode):
+            asyncio.run(serve(handler, scenario))
+
+    def test_async_engine_polls_everyone(self, monkeypatch):
+        async def handler(request):
+            return web.json_response({
+                'homeworks': [{'homework_name': 'hw', 'status': 'reviewing'}],
+                'current_date': 42,
+            })
+
+        registry = TenantRegistry()
+        for number in range(20):
+            registry.add(f'token{number}', number)
+        bot = MockAsyncBot()
+
+        async def scenario(url):
+            monkeypatch.setattr('homework.ENDPOINT', url)
+            async with aiohttp.ClientSession() as session:
+                engine = aio.AsyncPollingEngine(
+                    bot, registry, session, max_in_flight=5)
+                return await engine.run_cycle()
+
+        assert asyncio.run(serve(handler, scenario)) == 20
+        assert sorted(chat for chat, _ in bot.sent) == list(range(20))
+        assert all(tenant.timestamp == 42 for tenant in registry)
@@ -1,11 +1,18 @@
 import os
 from http import HTTPStatus
 
+import pytest
 import requests
 import telegram
 import utils
 
 
+@pytest.fixture(autouse=True)
+def pooled_requests_through_requests_get(monkeypatch):
+    """Тесты подменяют requests.get - направляем запросы пула туда же."""
+    monkeypatch.setattr('homework.get_session', lambda: requests)
+
+
 class MockResponseGET:
 
     def __init__(self, url, params=None, random_timestamp=None,
@@ -0,0 +1,67 @@
+import pytest
+
+from checkpoints import (FileCheckpointStore, SqliteCheckpointStore,
+                         open_checkpoints)
+from tenants import TenantRegistry
+
+
+@pytest.fixture(params=['checkpoints.db', 'checkpoints.log'])
+def store_path(request, tmp_path):
+    return str(tmp_path / request.param)
+
+
+class TestCheckpoints:
+
+    def test_backend_by_path(self, tmp_path):
+        assert isinstance(open_checkpoints(str(tmp_path / 'a.db')),
+                          SqliteCheckpointStore)
+        assert isinstance(open_checkpoints(str(tmp_path / 'a.log')),
+                          FileCheckpointStore)
+
+    def test_survives_restart(self, store_path):
+        store = open_checkpoints(store_path, flush_interval=3600)
+        for number in range(1000):
+            store.set(f'key{number}', number)
+        store.set('key0', 500)
+        assert store.flush() == 1000, (
+            'Проверьте, что изменения сбрасываются на диск одной пачкой'
+        )
+        store.set('key1', 700)
+        store.close()
+
+        restored = open_checkpoints(store_path)
+        assert restored.get('key0') == 500
+        assert restored.get('key1') == 700, (
+            'Проверьте, что при закрытии хранилища несохранённое не теряется'
+        )
+        assert restored.get('missing', 42) == 42
+        restored.close()
+
+    def test_nothing_written_before_flush(self, store_path):
+        store = open_checkpoints(store_path, flush_interval=3600)
+        store.set('key', 1)
+        assert open_checkpoints(store_path).get('key') is None
+        store.close()
+
+    def test_registry_restore(self, store_path):
+        registry = TenantRegistry()
+        tenant = registry.add('token', 1, timestamp=10)
+        store = open_checkpoints(store_path)
+        store.set(tenant.key, 99)
+        store.close()
+        registry.restore(open_checkpoints(store_path))
+        assert tenant.timestamp == 99, (
+            'Проверьте, что после перезапуска опрос продолжается '
+            'с сохранённого current_date'
+        )
+
+    def test_shared_store_requires_sqlite(self, tmp_path):
+        for path in (None, str(tmp_path / 'checkpoints.log')):
+            with pytest.raises(ValueError):
+                open_checkpoints(path, shared=True)
+        store = open_checkpoints(str(tmp_path / 'checkpoints.db'),
+                                 shared=True)
+        assert isinstance(store, SqliteCheckpointStore), (
+            'Проверьте, что общее для исполнителей хранилище - SQLite'
+        )
+        store.close()
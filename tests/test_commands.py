@@ -0,0 +1,65 @@
+import commands
+from checkpoints import CheckpointStore
+from engine import PollingEngine
+from tenants import TenantRegistry
+from utils import MockTelegramBot
+
+
+class TestCommands:
+
+    def test_status_from_cache(self, monkeypatch):
+        calls = []
+
+        def mock_fetch(timestamp, headers):
+            calls.append(timestamp)
+            return {
+                'homeworks': [
+                    {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                ],
+                'current_date': 1,
+            }
+
+        monkeypatch.setattr('engine.fetch_api_answer', mock_fetch)
+        registry = TenantRegistry()
+        registry.add('token', 100)
+        assert commands.render_status(registry, 100) == commands.STATUS_EMPTY
+        PollingEngine(MockTelegramBot(), registry).run_cycle()
+        status = commands.render_status(registry, '100')
+        assert len(calls) == 1, (
+            'Проверьте, что /status не делает запросов к API'
+        )
+        assert status == commands.STATUS_LINE.format(
+            name='hw1', verdict=commands.VERDICTS['approved'])
+
+    def test_status_not_subscribed(self):
+        assert (commands.render_status(TenantRegistry(), 1)
+                == commands.NOT_SUBSCRIBED)
+
+    def test_subscribe(self):
+        registry = TenantRegistry()
+        checkpoints = CheckpointStore()
+        assert (commands.subscribe_chat(registry, 5, [], checkpoints)
+                == commands.SUBSCRIBE_USAGE)
+        tenant = registry.add('token', 5)
+        checkpoints.set(tenant.key, 77)
+        registry.remove(tenant.key)
+        assert (commands.subscribe_chat(registry, 5, ['token'], checkpoints)
+                == commands.SUBSCRIBED)
+        [tenant] = registry.by_chat(5)
+        assert tenant.timestamp == 77
+        assert registry.due(0) == [tenant], (
+            'Проверьте, что новый студент опрашивается сразу'
+        )
+
+    def test_pause_and_resume(self):
+        registry = TenantRegistry()
+        tenant = registry.add('token', 5)
+        assert commands.pause_chat(registry, 5) == commands.PAUSED
+        assert registry.due(10 ** 10) == []
+        registry.reschedule(tenant, 0)
+        assert registry.due(10 ** 10) == [], (
+            'Проверьте, что опрос на паузе не возобновляется сам'
+        )
+        assert commands.resume_chat(registry, 5) == commands.RESUMED
+        assert registry.due(10 ** 10) == [tenant]
+        assert commands.pause_chat(registry, 6) == commands.NOT_SUBSCRIBED
@@ -0,0 +1,110 @@
+import json
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+import config
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({'RETRY_TIME': 60}))
+    store = config.ConfigStore(str(path), str(tmp_path / '.env'),
+                               interval=0.01)
+    yield store
+    store.stop()
+
+
+class TestConfig:
+
+    def test_file_overrides_environment(self, tmp_path):
+        path = tmp_path / 'config.json'
+        path.write_text(json.dumps({'MIN_INTERVAL': 30}))
+        settings = config.load_settings(
+            str(path), {'MIN_INTERVAL': '90', 'APPROVED_INTERVAL': '100',
+                        'TENANTS_FILE': ''})
+        assert settings.min_interval == 30, (
+            'Проверьте, что файл настроек главнее окружения'
+        )
+        assert settings.interval('approved') == 100
+        assert settings.interval(None) == settings.default_interval
+        assert settings.tenants_file is None
+
+    def test_environment_beats_env_file(self, store, tmp_path,
+                                        monkeypatch):
+        monkeypatch.setenv('MIN_INTERVAL', '60')
+        env_file = tmp_path / '.env'
+        env_file.write_text('MIN_INTERVAL=600\nAPPROVED_INTERVAL=100\n')
+        assert store.reload().min_interval == 60
+        assert store.reload().min_interval == 60, (
+            'Проверьте, что после перечитывания окружение по-прежнему '
+            'главнее .env'
+        )
+        assert store.current().approved_interval == 100
+        env_file.write_text('APPROVED_INTERVAL=200\n')
+        assert store.reload().approved_interval == 200, (
+            'Проверьте, что изменения в .env подхватываются'
+        )
+
+    def test_endpoint_reloads(self, store, tmp_path, monkeypatch):
+        import homework
+
+        assert homework.api_endpoint() == homework.ENDPOINT
+        monkeypatch.setattr(config, 'current', store.current)
+        (tmp_path / 'config.json').write_text(json.dumps(
+            {'ENDPOINT': 'http://localhost/api/'}))
+        store.reload()
+        assert homework.api_endpoint() == 'http://localhost/api/', (
+            'Проверьте, что адрес API берётся из перечитанных настроек'
+        )
+
+    def test_reload_swaps_settings(self, store, tmp_path):
+        seen = []
+        store.subscribe(lambda old, new: seen.append((old, new)))
+        before = store.current()
+        (tmp_path / 'config.json').write_text(json.dumps({'RETRY_TIME': 5}))
+        store.reload()
+        assert store.current().retry_time == 5
+        assert before.retry_time == 60, (
+            'Проверьте, что старый снимок настроек не меняется'
+        )
+        assert seen == [(before, store.current())]
+
+    def test_invalid_file_keeps_settings(self, store, tmp_path):
+        before = store.current()
+        (tmp_path / 'config.json').write_text('[1, 2')
+        assert store.reload() is None
+        assert store.current() is before, (
+            'Проверьте, что с ошибкой в файле остаются прежние настройки'
+        )
+
+    def test_watch_file_change(self, store, tmp_path):
+        store.start()
+        path = tmp_path / 'config.json'
+        path.write_text(json.dumps({'RETRY_TIME': 7}))
+        os.utime(path, ns=(0, time.time_ns() + 10 ** 9))
+        deadline = time.monotonic() + 2
+        while store.current().retry_time != 7:
+            assert time.monotonic() < deadline, (
+                'Проверьте, что изменение файла настроек подхватывается'
+            )
+            time.sleep(0.01)
+
+    @pytest.mark.skipif(not hasattr(signal, 'SIGHUP'), reason='нет SIGHUP')
+    def test_sighup_reloads(self, store, monkeypatch):
+        reloaded = threading.Event()
+        monkeypatch.setattr(store, 'reload', reloaded.set)
+        store.interval = 60
+        previous = signal.getsignal(signal.SIGHUP)
+        try:
+            store.start()
+            os.kill(os.getpid(), signal.SIGHUP)
+            assert reloaded.wait(2), (
+                'Проверьте, что SIGHUP перечитывает настройки'
+            )
+        finally:
+            signal.signal(signal.SIGHUP, previous)
@@ -0,0 +1,71 @@
+from dedup import Deduplicator, ExpiringLRU, error_fingerprint
+from engine import PollingEngine
+from tenants import TenantRegistry
+from utils import MockTelegramBot
+
+
+class TestDedup:
+
+    def test_lru_eviction(self):
+        cache = ExpiringLRU(maxsize=2, ttl=60)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        assert len(cache) == 2
+        assert cache.get('b') is None, (
+            'Проверьте, что вытесняется давно не использованная запись'
+        )
+        assert cache.get('a') == 1
+
+    def test_ttl_eviction(self):
+        cache = ExpiringLRU(maxsize=10, ttl=-1)
+        cache.put('a', 1)
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+    def test_error_fingerprint_ignores_timestamps(self):
+        first = ConnectionError('timeout, запрос с момента времени: 1000')
+        second = ConnectionError('timeout, запрос с момента времени: 1600')
+        assert error_fingerprint(first) == error_fingerprint(second)
+        assert error_fingerprint(first) != error_fingerprint(
+            ValueError('timeout, запрос с момента времени: 1000'))
+
+    def test_only_transitions_are_sent(self, monkeypatch):
+        answers = iter([
+            [{'id': 1, 'homework_name': 'hw', 'status': 'reviewing'}],
+            [{'id': 1, 'homework_name': 'hw', 'status': 'reviewing'}],
+            [{'id': 1, 'homework_name': 'hw', 'status': 'rejected'}],
+            [{'id': 1, 'homework_name': 'hw', 'status': 'reviewing'}],
+        ])
+
+        def mock_fetch(timestamp, headers):
+            return {'homeworks': next(answers), 'current_date': timestamp}
+
+        monkeypatch.setattr('engine.fetch_api_answer', mock_fetch)
+        registry = TenantRegistry()
+        tenant = registry.add('token', 1)
+        bot = MockTelegramBot()
+        engine = PollingEngine(bot, registry, dedup=Deduplicator())
+        for _ in range(4):
+            engine.poll_tenant(tenant)
+        assert len(bot.sent) == 3, (
+            'Проверьте, что неизменившийся статус не отправляется повторно, '
+            'а возврат к прежнему статусу отправляется'
+        )
+
+    def test_repeated_error_sent_once(self, monkeypatch):
+        def mock_fetch(timestamp, headers):
+            raise ConnectionError(f'from_date {timestamp}')
+
+        monkeypatch.setattr('engine.fetch_api_answer', mock_fetch)
+        registry = TenantRegistry()
+        tenant = registry.add('token', 1)
+        bot = MockTelegramBot()
+        engine = PollingEngine(bot, registry)
+        for timestamp in range(5):
+            tenant.timestamp = timestamp
+            engine.poll_tenant(tenant)
+        assert len(bot.sent) == 1, (
+            'Проверьте, что одна и та же ошибка не отправляется каждый цикл'
+        )
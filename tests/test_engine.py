@@ -0,0 +1,139 @@
+import json
+
+import homework
+from engine import PollingEngine, compose_messages
+from tenants import TenantRegistry
+from utils import MockTelegramBot
+
+
+class TestEngine:
+
+    def test_registry_load(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'token': 'first', 'chat_id': 1},
+            {'token': 'second', 'chat_id': 2},
+            {'chat_id': 3},
+        ]))
+        registry = TenantRegistry()
+        registry.load(path, timestamp=100)
+        assert len(registry) == 2, (
+            'Проверьте, что некорректные записи о студентах пропускаются'
+        )
+        assert all(tenant.timestamp == 100 for tenant in registry), (
+            'Проверьте, что студентам выставляется начальный timestamp'
+        )
+
+    def test_poll_all_tenants(self, monkeypatch, random_timestamp):
+        requested = []
+
+        def mock_fetch(timestamp, headers):
+            requested.append(headers['Authorization'])
+            return {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': random_timestamp,
+            }
+
+        monkeypatch.setattr('engine.fetch_api_answer', mock_fetch)
+        registry = TenantRegistry()
+        for number in range(50):
+            registry.add(f'token{number}', number)
+        bot = MockTelegramBot()
+        engine = PollingEngine(bot, registry, max_workers=4)
+        assert engine.run_cycle() == 50
+        assert sorted(chat for chat, _ in bot.sent) == list(range(50)), (
+            'Проверьте, что каждый студент получает сообщение в свой чат'
+        )
+        assert len(set(requested)) == 50
+        assert all(t.timestamp == random_timestamp for t in registry)
+        assert engine.run_cycle() == 0, (
+            'Проверьте, что студентов не опрашивают раньше срока'
+        )
+
+    def test_poll_error_is_isolated(self, monkeypatch):
+        def mock_fetch(timestamp, headers):
+            if headers['Authorization'] == 'OAuth broken':
+                raise ConnectionError('boom')
+            return {'homeworks': [], 'current_date': 1}
+
+        monkeypatch.setattr('engine.fetch_api_answer', mock_fetch)
+        registry = TenantRegistry()
+        registry.add('broken', 1)
+        registry.add('healthy', 2)
+        bot = MockTelegramBot()
+        PollingEngine(bot, registry).run_cycle()
+        assert [chat for chat, _ in bot.sent] == [1], (
+            'Проверьте, что ошибка одного студента не задевает остальных'
+        )
+        assert bot.sent[0][1] == homework.RUNTIME_ERROR.format(error='boom')
+
+    def test_error_hides_token(self, monkeypatch):
+        def mock_fetch(timestamp, headers):
+            raise ConnectionError(homework.RESPONSE_CODE_ERROR.format(
+                response=401, url=homework.ENDPOINT, headers=headers,
+                params={'from_date': timestamp}))
+
+        monkeypatch.setattr('engine.fetch_api_answer', mock_fetch)
+        registry = TenantRegistry()
+        registry.add('y0_secret', 1)
+        bot = MockTelegramBot()
+        PollingEngine(bot, registry).run_cycle()
+        assert bot.sent and 'y0_secret' not in bot.sent[0][1], (
+            'Проверьте, что токен студента не уходит в чат вместе с ошибкой'
+        )
+
+    def test_unexpected_status_does_not_block_others(self, monkeypatch):
+        def mock_fetch(timestamp, headers):
+            return {
+                'homeworks': [
+                    {'id': 1, 'homework_name': 'good', 'status': 'approved'},
+                    {'id': 2, 'homework_name': 'bad', 'status': 'weird'},
+                ],
+                'current_date': 100,
+            }
+
+        monkeypatch.setattr('engine.fetch_api_answer', mock_fetch)
+        registry = TenantRegistry()
+        tenant = registry.add('token', 1)
+        bot = MockTelegramBot()
+        PollingEngine(bot, registry).run_cycle()
+        texts = [text for _, text in bot.sent]
+        assert texts[0] == homework.parse_status(
+            {'homework_name': 'good', 'status': 'approved'}), (
+            'Проверьте, что работа с неожиданным статусом не мешает '
+            'сообщить об остальных'
+        )
+        assert 'weird' in texts[1]
+        assert tenant.timestamp == 100
+
+    def test_all_homeworks_in_one_message(self, monkeypatch):
+        def mock_fetch(timestamp, headers):
+            return {
+                'homeworks': [
+                    {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                    {'id': 2, 'homework_name': 'hw2', 'status': 'rejected'},
+                    {'id': 3, 'homework_name': 'hw3', 'status': 'reviewing'},
+                ],
+                'current_date': 1,
+            }
+
+        monkeypatch.setattr('engine.fetch_api_answer', mock_fetch)
+        registry = TenantRegistry()
+        registry.add('token', 1)
+        bot = MockTelegramBot()
+        PollingEngine(bot, registry).run_cycle()
+        assert len(bot.sent) == 1, (
+            'Проверьте, что вердикты по одному чату склеиваются в одно '
+            'сообщение'
+        )
+        for name in ('hw1', 'hw2', 'hw3'):
+            assert f'"{name}"' in bot.sent[0][1], (
+                'Проверьте, что обрабатываются все работы из ответа API'
+            )
+
+    def test_compose_messages_limit(self):
+        parts = ['x' * 40] * 5
+        messages = compose_messages(parts, limit=100)
+        assert len(messages) == 3
+        assert all(len(message) <= 100 for message in messages)
+        assert compose_messages([]) == []
@@ -0,0 +1,69 @@
+from engine import PollingEngine
+from history import HistoryLog, changed_at
+from tenants import TenantRegistry
+from utils import MockTelegramBot
+
+
+class TestHistory:
+
+    def test_timeline(self):
+        history = HistoryLog()
+        history.record('t1', 1, 'reviewing', 100)
+        history.record('t1', 1, 'reviewing', 150)
+        history.record('t1', 2, 'reviewing', 120)
+        history.record('t1', 1, 'approved', 200)
+        history.record('t2', 1, 'rejected', 300)
+        timeline = history.timeline('t1')
+        assert [(event.homework, event.old_status, event.new_status)
+                for event in timeline] == [
+            ('1', None, 'reviewing'),
+            ('2', None, 'reviewing'),
+            ('1', 'reviewing', 'approved'),
+        ], 'Проверьте, что в истории есть только смены статуса по порядку'
+        assert [event.at for event in history.timeline('t1', 1)] == [100, 200]
+
+    def test_median_review_time(self):
+        history = HistoryLog()
+        assert history.median_review_time() is None
+        for number, seconds in enumerate((10, 30, 20)):
+            history.record('t', number, 'reviewing', 0)
+            history.record('t', number, 'approved', seconds)
+        assert history.median_review_time() == 20
+        history.record('t', 9, 'reviewing', 0)
+        history.record('t', 9, 'rejected', 40)
+        assert history.median_review_time() == 25, (
+            'Проверьте медиану для чётного числа ревью'
+        )
+
+    def test_continues_after_restart(self, tmp_path):
+        path = str(tmp_path / 'history.db')
+        history = HistoryLog(path)
+        history.record('t', 1, 'reviewing', 100)
+        history.close()
+        history = HistoryLog(path)
+        history.record('t', 1, 'approved', 160)
+        assert history.median_review_time() == 60, (
+            'Проверьте, что начало ревью берётся из базы после перезапуска'
+        )
+
+    def test_changed_at(self):
+        assert changed_at({'date_updated': '1970-01-01T00:01:00Z'}, 0) == 60
+        assert changed_at({'date_updated': 'вчера'}, 5) == 5
+        assert changed_at({}, 5) == 5
+
+    def test_engine_records_news(self, monkeypatch):
+        monkeypatch.setattr('engine.fetch_api_answer', lambda *args: {
+            'homeworks': [{'id': 7, 'homework_name': 'hw',
+                           'status': 'reviewing',
+                           'date_updated': '2022-01-01T00:00:00Z'}],
+            'current_date': 1,
+        })
+        registry = TenantRegistry()
+        tenant = registry.add('token', 1)
+        history = HistoryLog()
+        PollingEngine(MockTelegramBot(), registry,
+                      history=history).run_cycle()
+        event, = history.timeline(tenant.key)
+        assert event.homework == '7' and event.new_status == 'reviewing', (
+            'Проверьте, что движок пишет новые статусы в историю'
+        )
@@ -0,0 +1,52 @@
+from http import HTTPStatus
+
+import homework
+import http_pool
+from utils import MockSession
+
+
+class TestHttpPool:
+
+    def test_session_pool_settings(self):
+        session = http_pool.build_session(pool_connections=2, pool_maxsize=7)
+        adapter = session.get_adapter('https://practicum.yandex.ru/')
+        assert adapter._pool_maxsize == 7, (
+            'Проверьте, что размер пула соединений к хосту настраивается'
+        )
+        assert adapter._pool_block, (
+            'Проверьте, что при исчерпании пула запрос ждёт соединения'
+        )
+        assert session.get_adapter('http://localhost/') is adapter
+        assert session.headers['Connection'] == 'keep-alive'
+
+    def test_pool_stats_without_session(self, monkeypatch):
+        monkeypatch.setattr(http_pool, '_session', None)
+        assert http_pool.pool_stats() == {}
+
+    def test_pool_stats_reports_hosts(self, monkeypatch):
+        session = http_pool.build_session()
+        adapter = session.get_adapter('https://practicum.yandex.ru/')
+        adapter.poolmanager.connection_from_url('https://practicum.yandex.ru/')
+        monkeypatch.setattr(http_pool, '_session', session)
+        stats = http_pool.pool_stats()
+        assert 'https://practicum.yandex.ru:443' in stats
+        assert stats['https://practicum.yandex.ru:443']['maxsize'] == (
+            http_pool.POOL_MAXSIZE)
+
+    def test_request_api_uses_pool(self, monkeypatch):
+        class Response:
+            status_code = HTTPStatus.OK
+            headers = {}
+
+        session = MockSession(lambda url, **kwargs: Response())
+        monkeypatch.setattr('homework.get_session', lambda: session)
+        homework.request_api(5, {'Authorization': 'OAuth t'})
+        assert len(session.requests) == 1, (
+            'Проверьте, что запрос к API идёт через общую сессию пула'
+        )
+        request = session.requests[0]
+        assert request['timeout'] == http_pool.TIMEOUT, (
+            'Проверьте, что запрос к API ограничен таймаутом'
+        )
+        assert request['url'] == homework.ENDPOINT
+        assert request['params'] == {'from_date': 5}
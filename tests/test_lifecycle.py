@@ -0,0 +1,167 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from engine import PollingEngine
+from exceptions import ServerError
+from lifecycle import Lifecycle
+from ratelimit import MAX_RETRY_AFTER, RateLimiter
+from resilience import RetryPolicy
+from tenants import TenantRegistry
+
+
+class TestLifecycle:
+
+    def test_wait_is_interrupted(self):
+        lifecycle = Lifecycle()
+        threading.Timer(0.05, lifecycle.request_stop).start()
+        started = time.monotonic()
+        assert lifecycle.wait(10)
+        assert time.monotonic() - started < 5, (
+            'Проверьте, что пауза прерывается запросом остановки'
+        )
+
+    def test_wait_async_is_interrupted(self):
+        lifecycle = Lifecycle()
+
+        async def wait():
+            threading.Timer(0.05, lifecycle.request_stop).start()
+            return await lifecycle.wait_async(10)
+
+        started = time.monotonic()
+        assert asyncio.run(wait())
+        assert time.monotonic() - started < 5
+        assert not lifecycle.wakeups
+
+    def test_shutdown_steps_in_reverse(self):
+        lifecycle = Lifecycle(timeout=1)
+        done = []
+        lifecycle.on_shutdown(lambda: done.append('checkpoints'))
+        lifecycle.on_shutdown(lambda: 1 / 0)
+        lifecycle.on_shutdown(lambda: done.append('outbox'))
+        lifecycle.shutdown()
+        assert done == ['outbox', 'checkpoints'], (
+            'Проверьте, что шаги остановки идут в обратном порядке и сбой '
+            'одного шага не отменяет остальные'
+        )
+        assert 0 <= lifecycle.remaining() <= 1
+
+    def test_sigterm_stops_engine(self):
+        lifecycle = Lifecycle()
+        previous = signal.getsignal(signal.SIGTERM)
+        try:
+            lifecycle.install(('SIGTERM',))
+            engine = PollingEngine(None, TenantRegistry(),
+                                   lifecycle=lifecycle)
+            threading.Timer(0.05, os.kill,
+                            (os.getpid(), signal.SIGTERM)).start()
+            started = time.monotonic()
+            engine.run()
+            engine.close()
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+        assert time.monotonic() - started < 5, (
+            'Проверьте, что по SIGTERM цикл опроса завершается'
+        )
+
+    def test_no_polls_after_stop(self, monkeypatch):
+        registry = TenantRegistry()
+        registry.add('token', 1)
+        lifecycle = Lifecycle()
+        lifecycle.request_stop()
+        engine = PollingEngine(None, registry, lifecycle=lifecycle)
+        polled = []
+        monkeypatch.setattr(engine, 'fetch', polled.append)
+        engine.run_cycle()
+        engine.close()
+        assert polled == [], (
+            'Проверьте, что после запроса остановки новые опросы не '
+            'начинаются'
+        )
+
+    def test_new_tenant_wakes_engine(self, monkeypatch):
+        registry = TenantRegistry()
+        registry.reschedule(registry.add('sleeper', 1), time.time() + 30)
+        lifecycle = Lifecycle()
+        engine = PollingEngine(None, registry, lifecycle=lifecycle)
+        polled = threading.Event()
+
+        def poll_tenant(tenant):
+            if tenant.token == 'new':
+                polled.set()
+
+        monkeypatch.setattr(engine, 'poll_tenant', poll_tenant)
+        runner = threading.Thread(target=engine.run)
+        runner.start()
+        try:
+            time.sleep(0.1)
+            registry.add('new', 2)
+            assert polled.wait(3), (
+                'Проверьте, что подписавшегося через бота опрашивают сразу, '
+                'не дожидаясь конца паузы'
+            )
+        finally:
+            lifecycle.request_stop()
+            runner.join(5)
+            engine.close()
+
+    def test_waits_end_on_stop(self, monkeypatch):
+        lifecycle = Lifecycle()
+        limiter = RateLimiter()
+        lifecycle.on_stop(limiter.stop)
+        limiter.defer(10 ** 6)
+        assert limiter.reserve() <= MAX_RETRY_AFTER, (
+            'Проверьте, что пауза по Retry-After ограничена сверху'
+        )
+        monkeypatch.setattr('resilience.backoff', lambda attempt: 30)
+        policy = RetryPolicy(attempts=3, lifecycle=lifecycle)
+
+        def broken():
+            raise ServerError('503')
+
+        threading.Timer(0.05, lifecycle.request_stop).start()
+        started = time.monotonic()
+        limiter.wait()
+        with pytest.raises(ServerError):
+            policy.call(broken)
+        assert time.monotonic() - started < 5, (
+            'Проверьте, что паузы лимита и повторов прерываются остановкой'
+        )
+
+    def test_async_waits_end_on_stop(self, monkeypatch):
+        lifecycle = Lifecycle()
+        limiter = RateLimiter()
+        lifecycle.on_stop(limiter.stop)
+        limiter.defer(30)
+        monkeypatch.setattr('resilience.backoff', lambda attempt: 30)
+        policy = RetryPolicy(attempts=3, lifecycle=lifecycle)
+
+        async def broken():
+            raise ServerError('503')
+
+        async def scenario():
+            threading.Timer(0.05, lifecycle.request_stop).start()
+            await limiter.wait_async()
+            with pytest.raises(ServerError):
+                await policy.call_async(broken)
+
+        started = time.monotonic()
+        asyncio.run(scenario())
+        assert time.monotonic() - started < 5, (
+            'Проверьте, что в асинхронном режиме паузы тоже прерываются'
+        )
+
+    def test_close_is_bounded(self):
+        engine = PollingEngine(None, TenantRegistry())
+        release = threading.Event()
+        engine.executor.submit(release.wait, 10)
+        started = time.monotonic()
+        engine.close(0.1)
+        release.set()
+        assert time.monotonic() - started < 5, (
+            'Проверьте, что остановка пула потоков укладывается в срок'
+        )
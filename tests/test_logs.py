@@ -0,0 +1,94 @@
+import json
+import logging
+
+import logs
+
+
+class TestLogs:
+
+    def test_redact_tokens(self):
+        text = logs.redact(
+            "headers {'Authorization': 'OAuth y0_secret'}, "
+            'bot 1234567:AAHdqTcvCH1vGWJxfSeofSAs0K5PALDsaw')
+        assert 'y0_secret' not in text, (
+            'Проверьте, что токен Практикума не попадает в журнал'
+        )
+        assert 'AAHdqTcv' not in text, (
+            'Проверьте, что токен бота не попадает в журнал'
+        )
+        assert logs.redact('my token', secrets=('token',)) == 'my ***'
+
+    def test_lazy_message(self):
+        calls = []
+        message = logs.lazy('{a}-{b}', a=1, b=lambda: calls.append(1) or 2)
+        assert calls == [], (
+            'Проверьте, что сообщение не форматируется до записи'
+        )
+        assert str(message) == '1-2'
+
+    def test_sampling(self):
+        sampler = logs.SamplingFilter(window=60, burst=2)
+        record = logging.LogRecord('root', logging.ERROR, 'homework.py', 1,
+                                   'error', None, None)
+        passed = [sampler.filter(record) for _ in range(5)]
+        assert passed == [True, True, False, False, False], (
+            'Проверьте, что повторяющиеся записи прореживаются'
+        )
+        critical = logging.LogRecord('root', logging.CRITICAL,
+                                     'homework.py', 1, 'error', None, None)
+        assert sampler.filter(critical)
+        sampler.window = 0
+        assert sampler.filter(record)
+        assert record.suppressed == 3
+
+    def test_sampling_keeps_distinct_records(self):
+        sampler = logs.SamplingFilter(window=60, burst=1)
+
+        def record(level, message, *args):
+            return logging.LogRecord('root', level, 'homework.py', 1,
+                                     message, args, None)
+
+        assert all(sampler.filter(record(logging.INFO, 'Статус'))
+                   for _ in range(5)), (
+            'Проверьте, что записи уровня INFO не прореживаются'
+        )
+        assert sampler.filter(record(logging.ERROR, 'Сбой %s', 'timeout'))
+        assert sampler.filter(record(logging.ERROR, 'Сбой %s', 'refused')), (
+            'Проверьте, что разные ошибки из одного места не заглушают '
+            'друг друга'
+        )
+        assert sampler.filter(record(logging.ERROR, 'Пауза %s с', 3))
+        assert not sampler.filter(record(logging.ERROR, 'Пауза %s с', 5)), (
+            'Проверьте, что записи, отличающиеся только числами, '
+            'прореживаются вместе'
+        )
+
+    def test_json_formatter(self):
+        record = logging.LogRecord('root', logging.INFO, 'homework.py', 7,
+                                   logs.lazy('OAuth {token}', token='abc'),
+                                   None, None)
+        entry = json.loads(logs.JsonFormatter(secrets=()).format(record))
+        assert entry['level'] == 'INFO'
+        assert entry['line'] == 7
+        assert entry['message'] == 'OAuth ***'
+
+    def test_setup_logging(self, tmp_path):
+        root = logging.getLogger()
+        handlers, level = list(root.handlers), root.level
+        path = tmp_path / 'bot.log'
+        listener = logs.setup_logging(str(path), level='INFO')
+        try:
+            logging.info(logs.lazy('Статус {status}', status='approved'))
+            logging.debug('не попадёт в журнал')
+        finally:
+            logs.stop_logging(listener)
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            for handler in handlers:
+                root.addHandler(handler)
+            root.setLevel(level)
+        text = path.read_text(encoding='utf-8')
+        assert 'Статус approved' in text, (
+            'Проверьте, что слушатель очереди пишет журнал в файл'
+        )
+        assert 'не попадёт' not in text
@@ -0,0 +1,75 @@
+import asyncio
+from urllib.request import urlopen
+
+import pytest
+
+import homework
+import metrics
+
+
+class TestMetrics:
+
+    def test_histogram_render(self):
+        registry = metrics.Registry()
+        histogram = registry.register(metrics.Histogram(
+            'test_seconds', 'Тест.', ('stage',), buckets=(0.1, 1)))
+        histogram.observe(0.05, 'a')
+        histogram.observe(0.5, 'a')
+        histogram.observe(5, 'a')
+        text = registry.render()
+        assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in text
+        assert 'test_seconds_bucket{stage="a",le="1"} 2' in text
+        assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in text, (
+            'Проверьте, что корзины гистограммы накопительные'
+        )
+        assert 'test_seconds_count{stage="a"} 3' in text
+
+    def test_gauge_is_lazy(self):
+        calls = []
+        gauge = metrics.Gauge('test_depth', 'Тест.')
+        assert gauge.samples() == []
+        gauge.set_function(lambda: calls.append(1) or 7)
+        assert calls == [], (
+            'Проверьте, что значение датчика вычисляется только при опросе'
+        )
+        assert gauge.samples() == ['test_depth 7']
+
+    def test_timed_counts_errors(self):
+        stage = 'test_timed_counts_errors'
+
+        @metrics.timed(stage)
+        def failing(value):
+            raise ValueError(value)
+
+        with pytest.raises(ValueError):
+            failing(1)
+        assert metrics.STAGE_SECONDS.count(stage) == 1
+        assert metrics.STAGE_ERRORS.value(stage, 'ValueError') == 1
+
+    def test_timed_coroutine(self):
+        stage = 'test_timed_coroutine'
+
+        @metrics.timed(stage)
+        async def double(value):
+            return value * 2
+
+        assert asyncio.run(double(2)) == 4
+        assert metrics.STAGE_SECONDS.count(stage) == 1
+
+    def test_parse_status_is_timed(self):
+        before = metrics.STAGE_SECONDS.count('parse_status')
+        homework.parse_status({'homework_name': 'hw', 'status': 'approved'})
+        assert metrics.STAGE_SECONDS.count('parse_status') == before + 1, (
+            'Проверьте, что время parse_status попадает в метрики'
+        )
+
+    def test_metrics_endpoint(self):
+        server = metrics.start_metrics_server(port=0)
+        try:
+            port = server.server_address[1]
+            with urlopen(f'http://127.0.0.1:{port}/metrics') as response:
+                text = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert '# TYPE homework_stage_seconds histogram' in text
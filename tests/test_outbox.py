@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+import pytest
+
+from exceptions import SendMessageError
+from outbox import AsyncOutbox, Outbox
+
+
+class SlowBot:
+
+    def __init__(self, fail_times=0):
+        self.sent = []
+        self.fail_times = fail_times
+        self.release = threading.Event()
+
+    def send_message(self, chat_id, text):
+        self.release.wait(5)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError('telegram недоступен')
+        self.sent.append((chat_id, text))
+
+
+class TestOutbox:
+
+    def test_messages_batched_per_chat(self):
+        bot = SlowBot()
+        outbox = Outbox(bot, workers=2).start()
+        outbox.send(1, 'first')
+        for number in range(5):
+            outbox.send(1, f'queued {number}')
+            outbox.send(2, f'other {number}')
+        bot.release.set()
+        assert outbox.close(timeout=5) == 0
+        chat_one = [text for chat, text in bot.sent if chat == 1]
+        assert len(chat_one) < 6, (
+            'Проверьте, что накопившиеся сообщения одного чата склеиваются'
+        )
+        assert '\n\n'.join(chat_one) == '\n\n'.join(
+            ['first'] + [f'queued {number}' for number in range(5)]), (
+            'Проверьте, что порядок сообщений чата сохраняется'
+        )
+
+    def test_backpressure(self):
+        bot = SlowBot()
+        outbox = Outbox(bot, workers=1, maxsize=1, put_timeout=0.05)
+        outbox.send(1, 'fills the queue')
+        with pytest.raises(SendMessageError):
+            outbox.send(1, 'no room')
+        bot.release.set()
+        outbox.start()
+        assert outbox.close(timeout=5) == 0
+
+    def test_retries_failed_delivery(self):
+        bot = SlowBot(fail_times=1)
+        bot.release.set()
+        outbox = Outbox(bot, workers=1, attempts=2)
+        assert outbox.deliver(1, 'text')
+        assert bot.sent == [(1, 'text')]
+        bot.fail_times = 2
+        assert not outbox.deliver(1, 'lost')
+
+    def test_async_outbox(self):
+        sent = []
+
+        async def send_async(bot, chat_id, message, parse_mode=None):
+            sent.append((chat_id, message))
+
+        async def scenario():
+            outbox = AsyncOutbox(None, send_async, workers=2).start()
+            for number in range(3):
+                await outbox.send(number, 'text')
+            return await outbox.close(timeout=5)
+
+        assert asyncio.run(scenario()) == 0
+        assert sorted(sent) == [(0, 'text'), (1, 'text'), (2, 'text')]
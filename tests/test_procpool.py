@@ -0,0 +1,87 @@
+import json
+
+import homework
+from exceptions import MissingKey
+from procpool import ProcessPollingEngine, decode_and_render, restore_answer
+from tenants import TenantRegistry
+from utils import MockTelegramBot
+
+
+def make_body(status, current_date=100):
+    return json.dumps({
+        'homeworks': [{'id': 1, 'homework_name': 'hw', 'status': status,
+                       'reviewer_comment': 'длинный комментарий'}],
+        'current_date': current_date,
+    }).encode()
+
+
+class TestProcessPool:
+
+    def test_decode_and_render(self):
+        rendered = decode_and_render((make_body('approved'), {}, None, None))
+        answer, texts = restore_answer(rendered)
+        work, = answer['homeworks']
+        assert answer['current_date'] == 100
+        assert texts[id(work)] == homework.parse_status(
+            {'homework_name': 'hw', 'status': 'approved'}), (
+            'Проверьте, что текст в процессе совпадает с parse_status'
+        )
+        assert isinstance(decode_and_render((b'{}', {}, None, None)),
+                          MissingKey)
+        _, [(_, _, _, text)] = decode_and_render(
+            (make_body('approved'), {}, 'en', 'html'))
+        assert text.startswith('Review status of "<b>hw</b>"'), (
+            'Проверьте, что текст готовится на языке и в разметке студента'
+        )
+
+    def test_engine_cycle(self, monkeypatch):
+        registry = TenantRegistry()
+        for number in range(10):
+            registry.add(f'token{number}', number)
+        bot = MockTelegramBot()
+        engine = ProcessPollingEngine(bot, registry, processes=2,
+                                      chunksize=3, max_workers=4)
+        monkeypatch.setattr(engine, 'fetch_raw',
+                            lambda tenant: (make_body('reviewing'), {}))
+        assert engine.context.get_start_method() == 'forkserver', (
+            'Проверьте, что процессы не форкаются из многопоточного бота'
+        )
+        try:
+            assert engine.run_cycle() == 10
+            for tenant in registry:
+                registry.reschedule(tenant, 0)
+            assert engine.run_cycle() == 10
+        finally:
+            engine.close()
+        assert sorted(chat for chat, _ in bot.sent) == list(range(10)), (
+            'Проверьте, что повторный статус не отправляется второй раз'
+        )
+        assert all(tenant.timestamp == 100 for tenant in registry)
+
+    def test_engine_reports_errors(self, monkeypatch):
+        registry = TenantRegistry()
+        registry.add('token', 1)
+        bot = MockTelegramBot()
+        engine = ProcessPollingEngine(bot, registry, processes=1)
+        monkeypatch.setattr(engine, 'fetch_raw',
+                            lambda tenant: (make_body('unknown'), {}))
+        try:
+            engine.run_cycle()
+        finally:
+            engine.close()
+        assert len(bot.sent) == 1 and 'unknown' in bot.sent[0][1], (
+            'Проверьте, что об ошибке разбора сообщается студенту'
+        )
+
+    def test_unexpected_status_is_reported_separately(self):
+        body = json.dumps({'homeworks': [
+            {'id': 1, 'homework_name': 'good', 'status': 'approved'},
+            {'id': 2, 'homework_name': 'bad', 'status': 'weird'},
+        ], 'current_date': 100}).encode()
+        _, works = decode_and_render((body, {}, None, None))
+        assert isinstance(works[0][3], str)
+        assert isinstance(works[1][3], ValueError), (
+            'Проверьте, что неожиданный статус не ломает разбор остальных '
+            'работ ответа'
+        )
+
@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+from telegram.error import RetryAfter
+
+import homework
+from exceptions import SendMessageError, TooManyRequests, WrongResponseCode
+from ratelimit import RateLimiter, TokenBucket, parse_retry_after
+from utils import MockSession
+
+
+class MockResponse429:
+    status_code = HTTPStatus.TOO_MANY_REQUESTS
+    headers = {'Retry-After': '7'}
+
+    def json(self):
+        return {}
+
+
+class TestRateLimit:
+
+    def test_bucket_burst_then_rate(self):
+        bucket = TokenBucket(rate=10, capacity=3)
+        now = bucket.updated
+        delays = [bucket.reserve(now) for _ in range(5)]
+        assert delays[:3] == [0, 0, 0], 'Проверьте, что запас ведра тратится сразу'
+        assert delays[3] == pytest.approx(0.1)
+        assert delays[4] == pytest.approx(0.2)
+        assert bucket.reserve(now + 1) == 0, (
+            'Проверьте, что токены восстанавливаются со временем'
+        )
+
+    def test_per_key_limit(self):
+        limiter = RateLimiter(rate=100, burst=100, key_rate=1, key_burst=1)
+        assert limiter.reserve('chat1') == 0
+        assert limiter.reserve('chat2') == 0, (
+            'Проверьте, что лимит одного чата не тормозит другие'
+        )
+        assert limiter.reserve('chat1') == pytest.approx(1, abs=0.01)
+
+    def test_defer(self):
+        limiter = RateLimiter()
+        assert limiter.reserve() == 0
+        limiter.defer(5)
+        assert limiter.reserve() == pytest.approx(5, abs=0.01)
+        limiter.defer(3, key='chat')
+        assert limiter.reserve('chat') == pytest.approx(5, abs=0.01)
+
+    def test_parse_retry_after(self):
+        assert parse_retry_after('12') == 12
+        assert parse_retry_after(None) == 1
+        assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 1
+
+    def test_practicum_429_defers_requests(self, monkeypatch):
+        limiter = RateLimiter()
+        monkeypatch.setattr(homework, 'PRACTICUM_LIMITER', limiter)
+        monkeypatch.setattr('homework.get_session', lambda: MockSession(
+            lambda *args, **kwargs: MockResponse429()))
+        with pytest.raises(TooManyRequests):
+            homework.get_api_answer(0)
+        assert issubclass(TooManyRequests, WrongResponseCode)
+        assert limiter.reserve() == pytest.approx(7, abs=0.01), (
+            'Проверьте, что Retry-After приостанавливает запросы к API'
+        )
+
+    def test_telegram_retry_after(self, monkeypatch):
+        class FloodedBot:
+            calls = 0
+
+            def send_message(self, chat_id, text):
+                self.calls += 1
+                if self.calls == 1:
+                    raise RetryAfter(0)
+
+        bot = FloodedBot()
+        homework.send_to_chat(bot, 1, 'text')
+        assert bot.calls == 2, (
+            'Проверьте, что после RetryAfter сообщение отправляется повторно'
+        )
+
+        class BrokenBot:
+            def send_message(self, chat_id, text):
+                raise RetryAfter(0)
+
+        with pytest.raises(SendMessageError):
+            homework.send_to_chat(BrokenBot(), 1, 'text')
+
+    def test_retry_after_defers_one_chat(self, monkeypatch):
+        class FloodedBot:
+            def send_message(self, chat_id, text):
+                raise RetryAfter(30)
+
+        limiter = RateLimiter()
+        monkeypatch.setattr(homework, 'TELEGRAM_LIMITER', limiter)
+        monkeypatch.setattr(homework, 'SEND_ATTEMPTS', 1)
+        with pytest.raises(SendMessageError):
+            homework.send_to_chat(FloodedBot(), 1, 'text')
+        assert limiter.reserve(2) == 0, (
+            'Проверьте, что RetryAfter одного чата не задерживает '
+            'сообщения в другие чаты'
+        )
+        assert limiter.reserve(1) == pytest.approx(30, abs=0.01)
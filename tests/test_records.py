@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+import homework
+from exceptions import ErrorInResponse, MissingKey
+from records import Homework, decode_answer
+
+REQUEST_PARAMS = dict(url=homework.ENDPOINT, headers={},
+                      params={'from_date': 0})
+
+
+def decode(data):
+    return decode_answer(json.dumps(data).encode(), REQUEST_PARAMS)
+
+
+class TestRecords:
+
+    def test_decode_into_records(self):
+        answer = decode({
+            'homeworks': [{'id': 1, 'homework_name': 'hw', 'status':
+                           'approved', 'reviewer_comment': 'Ок'}],
+            'current_date': 10,
+        })
+        [work] = answer['homeworks']
+        assert isinstance(work, Homework)
+        assert not hasattr(work, '__dict__'), (
+            'Проверьте, что записи о работах используют __slots__'
+        )
+        assert answer['current_date'] == 10
+        assert homework.check_response(answer) == [work]
+        assert homework.parse_status(work) == homework.STATUS_SUMMARY.format(
+            name='hw', verdict=homework.VERDICTS['approved'])
+
+    @pytest.mark.parametrize('data, error', [
+        ([], TypeError),
+        ({}, MissingKey),
+        ({'homeworks': {}}, TypeError),
+        ({'homeworks': [], 'current_date': '1'}, TypeError),
+        ({'homeworks': [{'homework_name': 'hw'}]}, MissingKey),
+        ({'homeworks': [{'status': 1}]}, TypeError),
+        ({'homeworks': ['hw']}, TypeError),
+        ({'code': 'not_authenticated'}, ErrorInResponse),
+    ])
+    def test_invalid_answers(self, data, error):
+        with pytest.raises(error):
+            decode(data)
+
+    def test_missing_name_raises_key_error(self):
+        [work] = decode({'homeworks': [{'status': 'approved'}]})['homeworks']
+        with pytest.raises(KeyError):
+            homework.parse_status(work)
+        assert work.get('homework_name', 'нет') == 'нет'
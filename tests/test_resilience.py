@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from engine import PollingEngine
+from exceptions import (CircuitOpen, ErrorInResponse, ServerError,
+                        TooManyRequests)
+from resilience import CircuitBreaker, RetryPolicy, backoff
+from tenants import TenantRegistry
+
+
+class Flaky:
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+class TestResilience:
+
+    def test_backoff_grows_and_is_capped(self):
+        assert all(0 <= backoff(0, base=1, cap=30) <= 1 for _ in range(20))
+        assert all(0 <= backoff(10, base=1, cap=30) <= 30 for _ in range(20))
+
+    def test_transient_errors_are_retried(self):
+        flaky = Flaky(ConnectionError(), ServerError())
+        assert RetryPolicy(attempts=3).call(flaky) == 'ok'
+        assert flaky.calls == 3
+
+    def test_permanent_errors_are_not_retried(self):
+        flaky = Flaky(ErrorInResponse())
+        with pytest.raises(ErrorInResponse):
+            RetryPolicy(attempts=3).call(flaky)
+        assert flaky.calls == 1, (
+            'Проверьте, что ошибки вроде неверного токена не повторяются'
+        )
+
+    def test_breaker_opens_and_probes_once(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        policy = RetryPolicy(breaker, attempts=1)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                policy.call(Flaky(ConnectionError()))
+        flaky = Flaky()
+        with pytest.raises(CircuitOpen):
+            policy.call(flaky)
+        assert flaky.calls == 0, (
+            'Проверьте, что при разомкнутой цепи API не опрашивается'
+        )
+        time.sleep(0.06)
+        breaker.before_call()
+        with pytest.raises(CircuitOpen):
+            breaker.before_call()
+        breaker.record_failure()
+        assert breaker.reset_timeout == pytest.approx(0.1), (
+            'Проверьте, что неудачная проба удлиняет паузу'
+        )
+        time.sleep(0.11)
+        assert policy.call(flaky) == 'ok'
+        assert breaker.state == 'closed'
+
+    def test_too_many_requests_does_not_open_breaker(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        policy = RetryPolicy(breaker, attempts=2)
+        assert policy.call(Flaky(TooManyRequests())) == 'ok'
+        assert breaker.state == 'closed'
+
+    def test_engine_defers_tenants_when_open(self, monkeypatch):
+        def mock_fetch(timestamp, headers):
+            raise AssertionError('API не должно опрашиваться')
+
+        monkeypatch.setattr('engine.fetch_api_answer', mock_fetch)
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure()
+        registry = TenantRegistry()
+        tenant = registry.add('token', 1)
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append(text)
+
+        engine = PollingEngine(Bot(), registry,
+                               retry=RetryPolicy(breaker))
+        engine.run_cycle()
+        assert sent == [], (
+            'Проверьте, что о разомкнутой цепи студентам не пишут'
+        )
+        assert tenant.next_poll > time.time()
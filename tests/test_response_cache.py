@@ -0,0 +1,118 @@
+import json
+from http import HTTPStatus
+
+from engine import PollingEngine
+from response_cache import ResponseCache, body_digest
+from tenants import TenantRegistry
+from utils import MockSession, MockTelegramBot
+
+
+class MockResponse:
+
+    def __init__(self, body, status_code=HTTPStatus.OK, headers=None):
+        self.content = json.dumps(body).encode()
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class TestResponseCache:
+
+    def test_digest_ignores_current_date(self):
+        first = b'{"homeworks": [], "current_date": 1000}'
+        second = b'{"homeworks": [], "current_date": 2000}'
+        assert body_digest(first) == body_digest(second)
+        assert body_digest(first) != body_digest(
+            b'{"homeworks": [{}], "current_date": 1000}')
+
+    def test_unchanged_body_skips_parsing(self, monkeypatch):
+        dates = iter(range(100, 200))
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse({'homeworks': [],
+                                 'current_date': next(dates)})
+
+        monkeypatch.setattr('homework.get_session',
+                            lambda: MockSession(mock_get))
+        cache = ResponseCache()
+        assert cache.fetch('key', 0, {}) == {'homeworks': [],
+                                            'current_date': 100}
+        assert cache.fetch('key', 0, {}) is None, (
+            'Проверьте, что неизменившийся ответ не разбирается заново'
+        )
+        assert cache.fetch('other', 0, {}) is not None
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_conditional_request(self, monkeypatch):
+        sent_headers = []
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            sent_headers.append(headers)
+            if headers.get('If-None-Match') == '"v1"':
+                return MockResponse({}, HTTPStatus.NOT_MODIFIED)
+            return MockResponse({'homeworks': [], 'current_date': 1},
+                                headers={'ETag': '"v1"'})
+
+        monkeypatch.setattr('homework.get_session',
+                            lambda: MockSession(mock_get))
+        cache = ResponseCache()
+        assert cache.fetch('key', 0, {'Authorization': 'OAuth t'})
+        assert cache.fetch('key', 0, {'Authorization': 'OAuth t'}) is None
+        assert sent_headers[1]['If-None-Match'] == '"v1"', (
+            'Проверьте, что ETag из прошлого ответа отправляется '
+            'в If-None-Match'
+        )
+        assert 'If-None-Match' not in sent_headers[0]
+
+    def test_engine_keeps_from_date_while_nothing_changes(self, monkeypatch):
+        requested = []
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            requested.append(params['from_date'])
+            return MockResponse({'homeworks': [],
+                                 'current_date': len(requested) * 1000})
+
+        monkeypatch.setattr('homework.get_session',
+                            lambda: MockSession(mock_get))
+        registry = TenantRegistry()
+        tenant = registry.add('token', 1, timestamp=5)
+        cache = ResponseCache()
+        engine = PollingEngine(MockTelegramBot(), registry,
+                               responses=cache)
+        for _ in range(3):
+            engine.poll_tenant(tenant)
+        assert requested == [5, 5, 5]
+        assert cache.hits == 2
+
+    def test_failed_delivery_is_retried(self, monkeypatch):
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse({'homeworks': [{'id': 1,
+                                                'homework_name': 'hw',
+                                                'status': 'approved'}],
+                                 'current_date': 100})
+
+        class FlakyBot(MockTelegramBot):
+            failures = 1
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if self.failures:
+                    self.failures -= 1
+                    raise ConnectionError('telegram недоступен')
+                super().send_message(chat_id, text, **kwargs)
+
+        monkeypatch.setattr('homework.get_session',
+                            lambda: MockSession(mock_get))
+        monkeypatch.setattr('homework.SEND_ATTEMPTS', 1)
+        registry = TenantRegistry()
+        tenant = registry.add('token', 1)
+        bot = FlakyBot()
+        engine = PollingEngine(bot, registry, responses=ResponseCache())
+        for _ in range(3):
+            engine.poll_tenant(tenant)
+        assert any('hw' in text for _, text in bot.sent), (
+            'Проверьте, что ответ, который не удалось доставить, '
+            'не считается неизменившимся при следующем опросе'
+        )
+        assert tenant.timestamp == 100
@@ -0,0 +1,79 @@
+import time
+
+import scheduler
+from config import current
+from tenants import TenantRegistry
+
+
+class TestScheduler:
+
+    def test_pop_due_in_time_order(self):
+        registry = TenantRegistry()
+        late = registry.add('late', 1)
+        early = registry.add('early', 2)
+        registry.reschedule(late, 200)
+        registry.reschedule(early, 100)
+        assert registry.next_due() == 100
+        assert registry.due(150) == [early]
+        assert registry.due(150) == [], (
+            'Проверьте, что опрошенный студент не выдаётся повторно'
+        )
+        assert registry.due(300) == [late]
+        assert registry.next_due() is None
+
+    def test_reschedule_drops_stale_entry(self):
+        registry = TenantRegistry()
+        tenant = registry.add('token', 1)
+        registry.reschedule(tenant, 500)
+        assert registry.due(100) == [], (
+            'Проверьте, что перенесённый опрос не выполняется по старому '
+            'расписанию'
+        )
+        registry.remove(tenant.key)
+        registry.reschedule(tenant, 50)
+        assert registry.due(1000) == []
+
+    def test_earlier_poll_wakes_up(self):
+        registry = TenantRegistry()
+        woken = []
+        registry.scheduler.wakeups.add(lambda: woken.append(True))
+        registry.reschedule(registry.add('first', 1), 100)
+        late = registry.add('late', 2)
+        registry.due(0)
+        woken.clear()
+        registry.reschedule(late, 200)
+        assert woken == [], (
+            'Проверьте, что опрос позже ближайшего не будит цикл опроса'
+        )
+        registry.add('new', 3)
+        assert woken == [True], (
+            'Проверьте, что опрос раньше ближайшего будит цикл опроса'
+        )
+
+    def test_adaptive_intervals(self, monkeypatch):
+        monkeypatch.setattr(scheduler, 'jittered', lambda interval: interval)
+        monkeypatch.setattr(scheduler, 'is_night', lambda now: False)
+        tenant = TenantRegistry().add('token', 1)
+        now = time.time()
+        tenant.status = 'reviewing'
+        reviewing = scheduler.next_interval(tenant, now)
+        tenant.status = 'approved'
+        approved = scheduler.next_interval(tenant, now)
+        assert reviewing < approved, (
+            'Проверьте, что работу на ревью опрашивают чаще принятой'
+        )
+        tenant.changed_at = now
+        assert scheduler.next_interval(tenant, now) < approved
+        monkeypatch.setattr(scheduler, 'is_night', lambda now: True)
+        tenant.changed_at = 0
+        assert scheduler.next_interval(tenant, now) > approved
+
+    def test_interval_bounds_and_jitter(self):
+        tenant = TenantRegistry().add('token', 1)
+        intervals = {scheduler.next_interval(tenant, time.time())
+                     for _ in range(20)}
+        assert len(intervals) > 1, 'Проверьте, что к интервалу добавлен разброс'
+        settings = current()
+        assert all(settings.min_interval * 0.9 <= interval
+                   <= settings.max_interval * 1.1
+                   for interval in intervals)
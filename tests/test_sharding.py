@@ -0,0 +1,178 @@
+import time
+
+import commands
+from checkpoints import open_checkpoints
+from engine import sleep_time
+from sharding import Coordinator, HashRing, Shard
+from subscriptions import SubscriptionStore
+from tenants import TenantRegistry, tenant_key
+
+
+def make_registry(count):
+    registry = TenantRegistry()
+    for number in range(count):
+        registry.add(f'token{number}', number)
+    return registry
+
+
+class TestSharding:
+
+    def test_ring_moves_few_keys(self):
+        keys = [f'key{number}' for number in range(3000)]
+        before = HashRing(['a', 'b', 'c'])
+        after = HashRing(['a', 'b', 'c', 'd'])
+        owners = {key: before.owner(key) for key in keys}
+        assert set(owners.values()) == {'a', 'b', 'c'}
+        moved = [key for key in keys if after.owner(key) != owners[key]]
+        assert all(after.owner(key) == 'd' for key in moved), (
+            'Проверьте, что ключи переезжают только к новому исполнителю'
+        )
+        assert len(moved) < len(keys) / 2
+        assert HashRing().owner('key') is None
+
+    def test_coordinator_members(self, tmp_path):
+        path = str(tmp_path / 'shards.db')
+        first = Coordinator(path, 'first')
+        second = Coordinator(path, 'second', ttl=60)
+        first.heartbeat()
+        assert second.members() == {'first', 'second'}
+        first.leave()
+        assert second.members() == {'second'}, (
+            'Проверьте, что ушедший исполнитель пропадает из списка'
+        )
+        stale = Coordinator(path, 'stale', ttl=-1)
+        stale.heartbeat()
+        assert stale.members() == {'stale'}
+
+    def test_shards_split_tenants(self, tmp_path):
+        path = str(tmp_path / 'shards.db')
+        coordinators = [Coordinator(path, name) for name in ('a', 'b')]
+        for coordinator in coordinators:
+            coordinator.heartbeat()
+        polled = []
+        for coordinator in coordinators:
+            registry = make_registry(100)
+            shard = Shard(coordinator)
+            polled.append({tenant.key for tenant in
+                           shard.claim(registry, registry.due(1), 1)})
+        assert polled[0] and polled[1]
+        assert not polled[0] & polled[1], (
+            'Проверьте, что студента опрашивает только один исполнитель'
+        )
+        assert len(polled[0] | polled[1]) == 100
+
+    def test_rebalance_on_leave(self, tmp_path):
+        path = str(tmp_path / 'shards.db')
+        checkpoints = open_checkpoints(str(tmp_path / 'checkpoints.db'))
+        mine, other = Coordinator(path, 'mine'), Coordinator(path, 'other')
+        mine.heartbeat()
+        other.heartbeat()
+        registry = make_registry(50)
+        shard = Shard(mine, checkpoints)
+        owned = shard.claim(registry, registry.due(1), 1)
+        foreign = [tenant for tenant in registry if not shard.owns(tenant)]
+        assert foreign and len(owned) + len(foreign) == 50
+        checkpoints.set(foreign[0].key, 777)
+        checkpoints.flush()
+        other.leave()
+        assert shard.claim(registry, registry.due(2), 2) == []
+        assert len(shard.claim(registry, registry.due(2), 2)) == len(foreign), (
+            'Проверьте, что студенты ушедшего исполнителя опрашиваются сразу'
+        )
+        assert foreign[0].timestamp == 777, (
+            'Проверьте, что перешедший студент продолжает с контрольной '
+            'точки прежнего исполнителя'
+        )
+
+    def test_foreign_tenants_leave_schedule(self, tmp_path):
+        path = str(tmp_path / 'shards.db')
+        mine, other = Coordinator(path, 'mine'), Coordinator(path, 'other')
+        mine.heartbeat()
+        other.heartbeat()
+        registry = make_registry(50)
+        shard = Shard(mine)
+        owned = shard.claim(registry, registry.due(1), 1)
+        assert len(registry.scheduler) == 0
+        for tenant in owned:
+            registry.reschedule(tenant, 5)
+        assert len(registry.scheduler) == len(owned), (
+            'Проверьте, что чужие студенты не возвращаются в очередь '
+            'опросов исполнителя'
+        )
+        assert all(tenant.next_poll is None for tenant in registry
+                   if not shard.owns(tenant))
+
+    def test_single_leader(self, tmp_path):
+        path = str(tmp_path / 'shards.db')
+        first, second = Coordinator(path, 'first'), Coordinator(path, 'second')
+        first.heartbeat()
+        second.heartbeat()
+        started = []
+        shards = [Shard(first), Shard(second)]
+        for shard in shards:
+            shard.when_leading('commands', lambda shard=shard:
+                               started.append(shard.worker_id))
+            shard.refresh(TenantRegistry(), 1)
+        assert started == ['first'], (
+            'Проверьте, что команды принимает только один исполнитель'
+        )
+        first.leave()
+        for shard in shards:
+            shard.refresh(TenantRegistry(), 2)
+        assert started == ['first', 'second'], (
+            'Проверьте, что роль переходит к другому исполнителю, '
+            'когда прежний уходит'
+        )
+
+    def test_subscriptions_shared(self, tmp_path):
+        path = str(tmp_path / 'shards.db')
+        checkpoints = open_checkpoints(str(tmp_path / 'checkpoints.db'))
+        checkpoints.set(tenant_key('chat-token'), 150)
+        stores = [SubscriptionStore(path) for _ in range(2)]
+        coordinators = [Coordinator(path, name) for name in ('a', 'b')]
+        for coordinator in coordinators:
+            coordinator.heartbeat()
+        receiver, registry = TenantRegistry(), TenantRegistry()
+        shard = Shard(coordinators[1], checkpoints, stores[1])
+        tenant = receiver.add('chat-token', 42, 100)
+        tenant.locale = 'en'
+        stores[0].save(tenant)
+        shard.refresh(registry, 200)
+        shared = next(iter(registry))
+        assert (shared.token, shared.chat_id, shared.locale) == (
+            'chat-token', '42', 'en'), (
+            'Проверьте, что подписка из чата доходит до других исполнителей'
+        )
+        assert shared.timestamp == 150
+        receiver.pause(tenant)
+        stores[0].save(tenant)
+        shard.refresh(registry, 300)
+        assert shared.paused and len(registry) == 1
+
+    def test_status_from_other_worker(self, tmp_path):
+        path = str(tmp_path / 'shards.db')
+        coordinators = [Coordinator(path, name) for name in ('a', 'b')]
+        for coordinator in coordinators:
+            coordinator.heartbeat()
+        registries = [make_registry(20) for _ in coordinators]
+        leader, poller = [Shard(coordinator) for coordinator in coordinators]
+        leader.claim(registries[0], registries[0].due(1), 1)
+        owned = poller.claim(registries[1], registries[1].due(1), 1)
+        polled = owned[0]
+        polled.remember(1, 'hw', 'approved')
+        poller.publish(polled)
+        leader.refresh(registries[0], 2)
+        assert 'hw' in commands.render_status(registries[0], polled.chat_id), (
+            'Проверьте, что /status видит статусы студентов, которых '
+            'опрашивает другой исполнитель'
+        )
+
+    def test_cycle_not_longer_than_heartbeat(self, tmp_path):
+        coordinator = Coordinator(str(tmp_path / 'shards.db'), 'a',
+                                  heartbeat=5)
+        registry = TenantRegistry()
+        registry.reschedule(registry.add('token', 1), time.time() + 3600)
+        assert sleep_time(registry) > 5
+        assert sleep_time(registry, Shard(coordinator)) == 5, (
+            'Проверьте, что при шардировании цикл идёт не реже heartbeat'
+        )
@@ -0,0 +1,65 @@
+import logging
+import os
+import subprocess
+import sys
+
+import startup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('requests', 'telegram', 'asyncio', 'aiohttp', 'http.server')
+
+
+class TestStartup:
+
+    def test_heavy_modules_not_imported(self):
+        code = ('import sys, homework; print(" ".join(m for m in {!r} '
+                'if m in sys.modules))'.format(HEAVY))
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == '', (
+            'Проверьте, что тяжёлые библиотеки загружаются при первом '
+            'использовании, а не при импорте homework'
+        )
+
+    def test_load_env_without_file(self, tmp_path):
+        assert startup.load_env(tmp_path / '.env') is False, (
+            'Проверьте, что без файла .env python-dotenv не загружается'
+        )
+
+    def test_load_env_from_file(self, tmp_path, monkeypatch):
+        monkeypatch.delenv('STARTUP_TEST_VALUE', raising=False)
+        path = tmp_path / '.env'
+        path.write_text('STARTUP_TEST_VALUE=42\n')
+        startup.load_env(path)
+        assert os.environ['STARTUP_TEST_VALUE'] == '42'
+        assert 'STARTUP_TEST_VALUE' in startup.ENV_FILE_KEYS
+        startup.ENV_FILE_KEYS.discard('STARTUP_TEST_VALUE')
+        monkeypatch.setenv('STARTUP_TEST_VALUE', '7')
+        startup.load_env(path)
+        assert os.environ['STARTUP_TEST_VALUE'] == '7', (
+            'Проверьте, что заданное в окружении главнее файла .env'
+        )
+        monkeypatch.delenv('STARTUP_TEST_VALUE')
+
+    def test_process_uptime(self):
+        uptime = startup.process_uptime()
+        if uptime is None:
+            return
+        assert 0 <= uptime < 24 * 3600, (
+            'Проверьте, что время с запуска процесса считается в секундах'
+        )
+
+    def test_report_over_budget(self, monkeypatch, caplog):
+        monkeypatch.setattr(startup, 'process_uptime', lambda: 3.5)
+        with caplog.at_level(logging.INFO):
+            assert startup.report_startup(budget=1) == 3.5
+        levels = [record.levelno for record in caplog.records]
+        assert levels == [logging.INFO, logging.WARNING], (
+            'Проверьте, что превышение бюджета запуска попадает в журнал '
+            'предупреждением'
+        )
+
+    def test_report_without_proc(self, monkeypatch, caplog):
+        monkeypatch.setattr(startup, 'process_uptime', lambda: None)
+        assert startup.report_startup() is None
+        assert not caplog.records
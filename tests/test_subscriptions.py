@@ -0,0 +1,43 @@
+import commands
+import homework
+from checkpoints import CheckpointStore
+from subscriptions import SubscriptionStore
+from tenants import TenantRegistry
+
+
+class TestSubscriptions:
+
+    def test_survive_restart(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'owner')
+        path = str(tmp_path / 'bot.db')
+        store = SubscriptionStore(path)
+        registry = TenantRegistry()
+        commands.subscribe_chat(registry, 5, ['token'], None, store)
+        commands.subscribe_chat(registry, 6, ['other'], None, store)
+        commands.pause_chat(registry, 6, store)
+        commands.language_chat(registry, 5, ['en'], store)
+        store.close()
+
+        store = SubscriptionStore(path)
+        restored = homework.build_registry(CheckpointStore(), None, store)
+        [tenant] = restored.by_chat(5)
+        assert tenant.token == 'token' and tenant.locale == 'en', (
+            'Проверьте, что подписки из чата восстанавливаются после '
+            'перезапуска'
+        )
+        [paused] = restored.by_chat(6)
+        assert paused.paused, (
+            'Проверьте, что пауза переживает перезапуск'
+        )
+        assert paused not in restored.due(10 ** 10)
+
+    def test_load_since(self):
+        store = SubscriptionStore()
+        tenant = TenantRegistry().add('token', 1)
+        store.save(tenant)
+        [first] = store.load()
+        assert store.load(since=first.version) == []
+        tenant.paused = True
+        store.save(tenant)
+        assert [record.paused for record in store.load(first.version)] == [
+            True]
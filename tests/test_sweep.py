@@ -0,0 +1,75 @@
+from lifecycle import Lifecycle
+from sweep import SweepPollingEngine
+from tenants import TenantRegistry
+from utils import MockTelegramBot
+
+
+def answer(status):
+    return {'homeworks': [{'id': 1, 'homework_name': 'hw',
+                           'status': status}],
+            'current_date': 100}
+
+
+class TestSweep:
+
+    def test_wave_sends_news_once(self, monkeypatch):
+        registry = TenantRegistry()
+        for number in range(10):
+            registry.add(f'token{number}', number)
+        bot = MockTelegramBot()
+        engine = SweepPollingEngine(bot, registry, max_workers=3)
+        monkeypatch.setattr(engine, 'fetch',
+                            lambda tenant: answer('reviewing'))
+        try:
+            assert engine.run_cycle() == 10
+            assert sorted(chat for chat, _ in bot.sent) == list(range(10)), (
+                'Проверьте, что волна опрашивает всех студентов тика'
+            )
+            for tenant in registry:
+                assert tenant.timestamp == 100
+                registry.reschedule(tenant, 0)
+            engine.run_cycle()
+            assert len(bot.sent) == 10, (
+                'Проверьте, что известные статусы не отправляются повторно'
+            )
+        finally:
+            engine.close()
+
+    def test_failure_does_not_stop_wave(self, monkeypatch):
+        registry = TenantRegistry()
+        broken = registry.add('broken', 1)
+        registry.add('healthy', 2)
+        bot = MockTelegramBot()
+        engine = SweepPollingEngine(bot, registry, max_workers=2)
+
+        def fetch(tenant):
+            if tenant is broken:
+                return {'homeworks': 'not a list'}
+            return answer('approved')
+
+        monkeypatch.setattr(engine, 'fetch', fetch)
+        try:
+            engine.run_cycle()
+        finally:
+            engine.close()
+        texts = dict(bot.sent)
+        assert 'Сбой' in texts[1], (
+            'Проверьте, что сбой разбора ответа уходит студенту как ошибка'
+        )
+        assert 'hw' in texts[2], (
+            'Проверьте, что сбой одного студента не мешает остальным'
+        )
+
+    def test_stopped_wave_skips_tenants(self, monkeypatch):
+        registry = TenantRegistry()
+        registry.add('token', 1)
+        lifecycle = Lifecycle()
+        lifecycle.request_stop()
+        bot = MockTelegramBot()
+        engine = SweepPollingEngine(bot, registry, lifecycle=lifecycle)
+        monkeypatch.setattr(engine, 'fetch', lambda tenant: 1 / 0)
+        try:
+            assert engine.run_cycle() == 1
+        finally:
+            engine.close()
+        assert bot.sent == []
@@ -0,0 +1,60 @@
+import pytest
+
+import commands
+import homework
+import templates
+from engine import PollingEngine
+from tenants import TenantRegistry
+from utils import MockTelegramBot
+
+
+class TestTemplates:
+
+    @pytest.mark.parametrize('status', list(homework.VERDICTS))
+    def test_default_matches_parse_status(self, status):
+        work = {'homework_name': 'student__hw05_final.zip', 'status': status}
+        assert templates.render_status(work) == homework.parse_status(work), (
+            'Проверьте, что шаблон по умолчанию совпадает с parse_status'
+        )
+
+    def test_markup_escaping(self):
+        work = {'homework_name': 'hw_1 <b>', 'status': 'approved'}
+        markdown = templates.render_status(work, 'ru', templates.MARKDOWN)
+        assert '*hw\\_1 <b\\>*' in markdown
+        assert markdown.endswith('Ура\\!'), (
+            'Проверьте, что текст шаблона экранирован для MarkdownV2'
+        )
+        assert '<b>hw_1 &lt;b&gt;</b>' in templates.render_status(
+            work, 'ru', templates.HTML)
+        assert templates.parse_mode(templates.HTML) == 'HTML'
+        assert templates.parse_mode(None) is None
+
+    def test_unknown_locale_and_status(self):
+        work = {'homework_name': 'hw', 'status': 'approved'}
+        assert (templates.render_status(work, 'xx', 'xx')
+                == homework.parse_status(work))
+        with pytest.raises(ValueError):
+            templates.render_status({'homework_name': 'hw',
+                                     'status': 'unknown'}, 'en')
+        assert templates.render_error('boom', 'en') == (
+            'The bot has failed: boom')
+
+    def test_tenant_language(self, monkeypatch):
+        monkeypatch.setattr('engine.fetch_api_answer', lambda *args: {
+            'homeworks': [{'homework_name': 'hw', 'status': 'reviewing'}],
+            'current_date': 1,
+        })
+        registry = TenantRegistry()
+        registry.add('token', 7)
+        assert commands.language_chat(registry, 7, ['EN']) == (
+            commands.LANGUAGE_SET.format(choice='en'))
+        assert commands.format_chat(registry, 7, ['rtf']).startswith(
+            'Выберите разметку')
+        commands.format_chat(registry, 7, ['html'])
+        bot = MockTelegramBot()
+        PollingEngine(bot, registry).run_cycle()
+        assert bot.sent == [(7, templates.render_status(
+            {'homework_name': 'hw', 'status': 'reviewing'}, 'en', 'html'))]
+        assert bot.parse_modes == ['HTML'], (
+            'Проверьте, что сообщение уходит на языке и в разметке студента'
+        )
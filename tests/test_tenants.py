@@ -0,0 +1,100 @@
+import json
+from collections import namedtuple
+
+from homework import VERDICTS
+from tenants import (TenantRegistry, intern_status, sync_tenants,
+                     tenant_key)
+
+
+class TestTenants:
+
+    def test_status_is_interned(self):
+        status = json.loads('"reviewing"')
+        assert intern_status(status) is next(
+            verdict for verdict in VERDICTS if verdict == 'reviewing'), (
+            'Проверьте, что статус из ответа API заменяется строкой из '
+            'VERDICTS'
+        )
+        assert intern_status(None) is None
+
+    def test_remember_keeps_order(self):
+        tenant = TenantRegistry().add('token', 1)
+        assert tenant.known_homeworks() == []
+        tenant.remember(1, 'hw1', 'reviewing')
+        tenant.remember(2, 'hw2', 'reviewing')
+        tenant.remember(1, 'hw1', 'approved')
+        assert tenant.known_homeworks() == [
+            ('hw1', 'approved'), ('hw2', 'reviewing')], (
+            'Проверьте, что новый статус работы заменяет старый на том же '
+            'месте'
+        )
+
+    def test_chat_index(self):
+        registry = TenantRegistry()
+        first = registry.add('first', 1)
+        second = registry.add('second', 1)
+        assert registry.by_chat('1') == [first, second]
+        registry.add('first', 2)
+        assert registry.by_chat(1) == [second]
+        assert registry.by_chat(2) == [first]
+        registry.remove(second.key)
+        assert registry.by_chat(1) == [], (
+            'Проверьте, что удалённый студент пропадает из индекса чатов'
+        )
+        assert '1' not in registry.chats
+
+    def test_sync_follows_file(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([{'token': 'a', 'chat_id': 1},
+                                    {'token': 'b', 'chat_id': 2}]))
+        registry = TenantRegistry()
+        registry.load(path)
+        manual = registry.add('manual', 3)
+        path.write_text(json.dumps([{'token': 'b', 'chat_id': 2},
+                                    {'token': 'c', 'chat_id': 4}]))
+        added, removed = registry.sync(path)
+        assert [tenant.token for tenant in added] == ['c']
+        assert [tenant.token for tenant in removed] == ['a'], (
+            'Проверьте, что пропавший из файла студент удаляется из реестра'
+        )
+        assert manual.key in registry, (
+            'Проверьте, что подписавшиеся через бота студенты не удаляются'
+        )
+
+    def test_sync_keeps_chosen_options(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([{'token': 'a', 'chat_id': 1},
+                                    {'token': 'b', 'chat_id': 2,
+                                     'locale': 'ru'}]))
+        registry = TenantRegistry()
+        registry.load(path)
+        first, second = registry.get(tenant_key('a')), registry.get(
+            tenant_key('b'))
+        first.locale, first.markup = 'en', 'HTML'
+        second.locale = 'en'
+        registry.sync(path)
+        assert (first.locale, first.markup) == ('en', 'HTML'), (
+            'Проверьте, что перечитывание файла не сбрасывает выбор '
+            'из /language и /format'
+        )
+        assert second.locale == 'ru', (
+            'Проверьте, что язык из файла студентов по-прежнему применяется'
+        )
+
+    def test_sync_tenants_listener(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([{'token': 'new', 'chat_id': 2}]))
+        registry = TenantRegistry()
+        old_owner = registry.add('old', 1)
+        Settings = namedtuple('Settings',
+                              'practicum_token chat_id tenants_file')
+        apply = sync_tenants(registry, {tenant_key('new'): 77})
+        apply(Settings('old', 1, None), Settings('owner', 5, str(path)))
+        assert old_owner.key not in registry, (
+            'Проверьте, что при смене PRACTICUM_TOKEN прежний владелец '
+            'удаляется из реестра'
+        )
+        assert [tenant.token for tenant in registry.by_chat(5)] == ['owner']
+        assert registry.get(tenant_key('new')).timestamp == 77, (
+            'Проверьте, что новый студент продолжает с контрольной точки'
+        )
@@ -37,3 +37,26 @@ def check_default_var_exists(scope: ModuleType, var_name: str) -> None:
         f'{var_name} должна быть переменной, а не функцией.'
     )
 
+
+class MockTelegramBot:
+    """Бот телеграма для тестов: запоминает отправленные сообщения."""
+
+    def __init__(self):
+        self.sent = []
+        self.parse_modes = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+        self.parse_modes.append(kwargs.get('parse_mode'))
+
+
+class MockSession:
+    """Сессия requests для тестов: запоминает запросы, ответы берёт у get."""
+
+    def __init__(self, get):
+        self.respond = get
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append(dict(url=url, **kwargs))
+        return self.respond(url, **kwargs)